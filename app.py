@@ -4,15 +4,36 @@
 Parquet'ten okur - Süper Hızlı
 Dosya yükleme YOK - Direkt açılır
 
-Güncelleme: Ayda 1 kez parquet dosyalarını değiştir
+Güncelleme: Ayda 1 kez yeni ayı ekle (python veritabani.py --ekle veri_2025_12.parquet)
+Veri sürümü değişince önbellekler kendiliğinden yenilenir
 """
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 import duckdb
+import pyarrow as pa
+import pyarrow.parquet as pq
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
 from io import BytesIO
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import glob
+import os
+import threading
 import warnings
 
+from veritabani import (VERITABANI, BOLUMLU_KLASOR, BOLUM_BILGISI, bolum_bilgisi, filtre_secenekleri,
+                        gorunumleri_olustur, tablolari_olustur, varsayilan_kaynaklar, veritabani_bilgi)
+from donem import donem_coz
+from indeks import BoyutIndeksi
+from metrikler import degisim, degisim_ekle, marj_oran_ekle, oran
+from onbellek import ONBELLEK, onbellekli
+from sorgu import (BOS, FILTRE_KOLONLARI, YONLENDIRICI, Kosul, calistir, esik, filtre_kosulu, kirilim, secim_kosulu,
+                   secim_listesi)
+
 warnings.filterwarnings('ignore')
 
 # ============================================================================
@@ -29,12 +50,9 @@ st.set_page_config(
 # SABİTLER
 # ============================================================================
 
-# GitHub'daki parquet dosyaları (raw URL)
-# Bu URL'leri kendi repo'na göre güncelle!
-PARQUET_2024 = "veri_2024.parquet"
-PARQUET_2025 = "veri_2025.parquet"
-
-NUMERIK_KOLONLAR = ['Adet', 'Ciro', 'Marj', 'Fire', 'Envanter', 'Kampanya_Zarar']
+# Karşılaştırılan dönemler - veri yüklenince veritabanındaki bilgiden güncellenir.
+# Ekranda "Adet 2024" gibi etiketler ve rapor kolon adları buradan gelir.
+DONEM = {'once': donem_coz('2024'), 'sonra': donem_coz('2025')}
 
 # ============================================================================
 # CSS
@@ -82,8 +100,8 @@ st.markdown("""
     }
     
     /* Streamlit varsayılanlarını sıkıştır */
-    .stTabs [data-baseweb="tab-list"] {gap: 8px;}
-    .stTabs [data-baseweb="tab"] {padding: 8px 16px; font-size: 0.9rem;}
+    div[data-testid="stRadio"] div[role="radiogroup"] {gap: 8px 16px;}
+    div[data-testid="stRadio"] label {font-size: 0.9rem;}
     div[data-testid="stExpander"] {margin-bottom: 0.3rem;}
     
     /* Detay bölümü için highlight */
@@ -118,191 +136,200 @@ def scroll_to(element_id: str):
 # VERİ OKUMA (PARQUET - SÜPER HIZLI)
 # ============================================================================
 
-@st.cache_resource
-def get_db_connection():
-    """DuckDB bağlantısı - tek sefer oluştur"""
-    return duckdb.connect()
+def kaynak_dosyalari() -> list:
+    """Parquet dosyaları (veri/ altındaki bölümler veya veri_*.parquet)"""
+    return sorted(yol for desen in varsayilan_kaynaklar() for yol in glob.glob(desen, recursive=True))
+
+
+def veri_surumu() -> str:
+    """
+    Veri dosyalarının boyut/değişiklik zamanından veri sürümü
+    Kurulum ve --ekle sürüm dosyasını değiştirir; önbellekler süreye değil buna bağlı
+    """
+    
+    bolum_bilgisi = os.path.join(BOLUMLU_KLASOR, BOLUM_BILGISI)
+    
+    if os.path.exists(VERITABANI):
+        dosyalar = [VERITABANI]
+    elif os.path.exists(bolum_bilgisi):
+        dosyalar = [bolum_bilgisi]
+    else:
+        dosyalar = kaynak_dosyalari()
+    
+    parcalar = []
+    for yol in dosyalar:
+        if os.path.exists(yol):
+            bilgi = os.stat(yol)
+            parcalar.append(f"{bilgi.st_mtime_ns}-{bilgi.st_size}")
+    
+    return "|".join(parcalar)
+
+
+@st.cache_resource(max_entries=1)
+def get_db_connection(surum: str):
+    """
+    Paylaşılan DuckDB bağlantısı - veri sürümü başına bir kez kurulur
+    Tüm oturumlar aynı katalog, tampon havuzu ve önbellekleri kullanır
+    """
+    
+    if os.path.exists(VERITABANI):
+        con = duckdb.connect(VERITABANI, read_only=True)
+    elif os.path.isdir(BOLUMLU_KLASOR):
+        # Bölümlü veri seti: tablo kurulmaz, her sorgu sadece eşleşen klasörleri ve kolonları okur
+        con = duckdb.connect()
+        gorunumleri_olustur(con, varsayilan_kaynaklar(), filtreler=bolum_bilgisi().get('filtreler'))
+    else:
+        # veri.duckdb yoksa aynı tablolar bellekte kurulur (pandas'a uğramaz, en son iki yıl)
+        con = duckdb.connect()
+        tablolari_olustur(con, kaynak_dosyalari())
+        # Bellekteki tablolar ancak checkpoint'te sıkıştırılır (ALP/sözlük) - ~3 kat daha az bellek
+        con.execute("CHECKPOINT")
+    
+    # Sorgular, bu veride bulunan en küçük uygun ön toplama yönlendirilir
+    YONLENDIRICI.ayarla(con)
+    
+    return con
+
 
+def baglanti_ac(veri: dict):
+    """Paylaşılan bağlantıdan yeni hafif cursor"""
+    return get_db_connection(veri['surum']).cursor()
 
-@st.cache_data(ttl=86400)  # 24 saat cache
-def veri_yukle():
-    """Parquet dosyalarını oku - ÇOK HIZLI"""
+
+def oturum_baglantisi(veri: dict):
+    """Oturuma ait cursor - veri sürümü değişene kadar yeniden kullanılır"""
+    
+    kayit = st.session_state.get('db_cursor')
+    
+    if kayit is None or kayit[0] != veri['surum']:
+        kayit = (veri['surum'], baglanti_ac(veri))
+        st.session_state['db_cursor'] = kayit
+    
+    return kayit[1]
+
+
+@st.cache_data(max_entries=1)  # veri sürümü başına bir kez
+def veri_yukle(surum: str):
+    """Veri özetini oku - veri.duckdb varsa salt-okunur bağlanır, yoksa parquet DuckDB'ye okunur"""
+    
+    if not os.path.exists(VERITABANI) and not kaynak_dosyalari():
+        return {'loaded': False, 'error': 'Parquet dosyaları bulunamadı'}
     
     try:
-        df_2024 = pd.read_parquet(PARQUET_2024)
-        df_2025 = pd.read_parquet(PARQUET_2025)
-        
-        df_all = pd.concat([df_2024, df_2025], ignore_index=True)
+        con = get_db_connection(surum).cursor()
         
-        # Filtre seçenekleri
-        filtreler = {
-            'sm': sorted(df_all[df_all['SM'] != '']['SM'].unique().tolist()),
-            'nitelik': sorted(df_all[df_all['Nitelik'] != '']['Nitelik'].unique().tolist()),
-            'urun_grubu': sorted(df_all[df_all['Urun_Grubu'] != '']['Urun_Grubu'].unique().tolist()),
-        }
-        
-        # BS by SM
-        bs_df = df_all[df_all['BS'] != ''][['SM', 'BS']].drop_duplicates()
-        filtreler['bs_map'] = bs_df.groupby('SM')['BS'].apply(list).to_dict()
-        
-        # Mağaza by BS
-        mag_df = df_all[df_all['Magaza_Kod'] != ''][['BS', 'Magaza_Kod', 'Magaza_Ad']].drop_duplicates()
-        filtreler['magaza_map'] = mag_df.groupby('BS').apply(
-            lambda x: list(zip(x['Magaza_Kod'], x['Magaza_Ad']))
-        ).to_dict()
-        
-        # Üst Mal by Ürün Grubu
-        ust_df = df_all[df_all['Ust_Mal'] != ''][['Urun_Grubu', 'Ust_Mal']].drop_duplicates()
-        filtreler['ust_mal_map'] = ust_df.groupby('Urun_Grubu')['Ust_Mal'].apply(list).to_dict()
-        
-        # Mal Grubu by Üst Mal
-        mal_df = df_all[df_all['Mal_Grubu'] != ''][['Ust_Mal', 'Mal_Grubu']].drop_duplicates()
-        filtreler['mal_grubu_map'] = mal_df.groupby('Ust_Mal')['Mal_Grubu'].apply(list).to_dict()
-        
-        sayilar = {'2024': len(df_2024), '2025': len(df_2025)}
+        try:
+            bilgi = veritabani_bilgi(con)
+            
+            # Kurulumda hazırlanır; eski veri.duckdb dosyalarında yoksa burada hesaplanır
+            filtreler = bilgi.get('filtreler') or filtre_secenekleri(con)
+        finally:
+            con.close()
         
         return {
-            'df': df_all,
             'filtreler': filtreler,
-            'sayilar': sayilar,
+            'magaza_adlari': {kod: ad for liste in filtreler['magaza_map'].values() for kod, ad in liste},
+            'donemler': bilgi['donemler'],
+            'sayilar': bilgi['sayilar'],
+            'surum': surum,
             'loaded': True
         }
-        
-    except FileNotFoundError:
-        return {'loaded': False, 'error': 'Parquet dosyaları bulunamadı'}
+    
     except Exception as e:
         return {'loaded': False, 'error': str(e)}
 
 
+@st.cache_resource(max_entries=1)
+def get_boyut_indeksi(surum: str) -> BoyutIndeksi:
+    """Sidebar ters indeksi - veri sürümü başına bir kez kurulur, tüm oturumlar paylaşır"""
+    
+    con = get_db_connection(surum).cursor()
+    
+    try:
+        return BoyutIndeksi.olustur(con)
+    finally:
+        con.close()
+
+
 # ============================================================================
 # DUCKDB SORGULARI
 # ============================================================================
 
-def build_where(f: dict) -> str:
-    """Filtre → SQL WHERE"""
-    
-    kosullar = []
-    
-    if f.get('sm') and f['sm'] != 'Tümü':
-        kosullar.append(f"SM = '{f['sm']}'")
-    if f.get('bs') and f['bs'] != 'Tümü':
-        kosullar.append(f"BS = '{f['bs']}'")
-    if f.get('magaza') and f['magaza'] != 'Tümü':
-        kosullar.append(f"Magaza_Kod = '{f['magaza']}'")
-    if f.get('nitelik') and f['nitelik'] != 'Tümü':
-        kosullar.append(f"Nitelik = '{f['nitelik']}'")
-    if f.get('urun_grubu') and f['urun_grubu'] != 'Tümü':
-        kosullar.append(f"Urun_Grubu = '{f['urun_grubu']}'")
-    if f.get('ust_mal') and f['ust_mal'] != 'Tümü':
-        kosullar.append(f"Ust_Mal = '{f['ust_mal']}'")
-    if f.get('mal_grubu') and f['mal_grubu'] != 'Tümü':
-        kosullar.append(f"Mal_Grubu = '{f['mal_grubu']}'")
-    
-    return "WHERE " + " AND ".join(kosullar) if kosullar else ""
-
-
-def get_ozet(con, where: str) -> dict:
-    """Özet KPI'lar"""
-    
-    sql = f"""
-        SELECT 
-            Yil,
-            SUM(Adet) as Adet,
-            SUM(Ciro) as Ciro,
-            SUM(Marj) as Marj,
-            SUM(ABS(Fire)) as Fire
-        FROM veri
-        {where}
-        GROUP BY Yil
+@onbellekli
+def get_ozet(con, where: Kosul) -> dict:
+    """
+    Başlık KPI'ları - tek taramada tüm metrikler
+    Satış sekmelerindeki kpi_goster ve marj sekmesindeki marj_kpi_goster bunu kullanır
     """
     
-    df = con.execute(sql).fetchdf()
-    df.columns = df.columns.str.lower()
+    cur = calistir(con, 'ozet', where)
+    kolonlar = [k[0] for k in cur.description]
     
     sonuc = {}
-    for _, row in df.iterrows():
-        yil = int(row['yil'])
-        for col in ['adet', 'ciro', 'marj', 'fire']:
-            sonuc[f'{col}_{yil}'] = float(row[col]) if pd.notna(row[col]) else 0
+    for col, deger in zip(kolonlar, cur.fetchone()):
+        sonuc[col] = float(deger) if deger is not None else 0
     
     # Değişim
-    for m in ['adet', 'ciro', 'marj', 'fire']:
-        v24 = sonuc.get(f'{m}_2024', 0) or 0
-        v25 = sonuc.get(f'{m}_2025', 0) or 0
-        sonuc[f'{m}_degisim'] = ((v25 / v24) - 1) * 100 if v24 > 0 else 0
+    for m in ['adet', 'ciro', 'marj', 'fire', 'envanter', 'kampanya']:
+        sonuc[f'{m}_degisim'] = float(degisim(sonuc[f'{m}_sonra'], sonuc[f'{m}_once']))
+    
+    # Marj tutar farkı ve oranları
+    sonuc['marj_fark'] = sonuc['marj_sonra'] - sonuc['marj_once']
+    sonuc['marj_oran_once'] = float(oran(sonuc['marj_once'], sonuc['ciro_once']))
+    sonuc['marj_oran_sonra'] = float(oran(sonuc['marj_sonra'], sonuc['ciro_sonra']))
+    sonuc['marj_oran_fark'] = sonuc['marj_oran_sonra'] - sonuc['marj_oran_once']
     
     return sonuc
 
 
-def get_mal_grubu_analiz(con, where: str, min_ciro: float) -> pd.DataFrame:
-    """Mal Grubu bazında analiz"""
+def get_kirilim(con, ad: str, ebeveyn: str, degerler: tuple, where: Kosul, limit: int) -> pd.DataFrame:
+    """
+    Mağaza/ürün kırılımı - ilk N SQL'de seçilir, sadece gösterilecek satırlar gelir
+    Önbelleğe çağıran get_* alınır (üzerine değişim kolonları eklenir)
+    """
     
-    ciro_filtre = f"HAVING SUM(CASE WHEN Yil=2025 THEN Ciro ELSE 0 END) >= {min_ciro}" if min_ciro > 0 else ""
+    df = kirilim(con, ad, ebeveyn, degerler, where, limit).fetchdf()
+    df.columns = [c.lower() for c in df.columns]
     
-    if where:
-        where_mal = f"{where} AND Mal_Grubu != ''"
-    else:
-        where_mal = "WHERE Mal_Grubu != ''"
-    
-    sql = f"""
-        SELECT 
-            Mal_Grubu,
-            MAX(Ust_Mal) as Ust_Mal,
-            SUM(CASE WHEN Yil=2024 THEN Adet ELSE 0 END) as Adet_2024,
-            SUM(CASE WHEN Yil=2025 THEN Adet ELSE 0 END) as Adet_2025,
-            SUM(CASE WHEN Yil=2024 THEN Ciro ELSE 0 END) as Ciro_2024,
-            SUM(CASE WHEN Yil=2025 THEN Ciro ELSE 0 END) as Ciro_2025,
-            SUM(CASE WHEN Yil=2024 THEN Marj ELSE 0 END) as Marj_2024,
-            SUM(CASE WHEN Yil=2025 THEN Marj ELSE 0 END) as Marj_2025,
-            SUM(CASE WHEN Yil=2024 THEN ABS(Fire) ELSE 0 END) as Fire_2024,
-            SUM(CASE WHEN Yil=2025 THEN ABS(Fire) ELSE 0 END) as Fire_2025
-        FROM veri
-        {where_mal}
-        GROUP BY Mal_Grubu
-        {ciro_filtre}
-    """
+    return df
+
+
+@onbellekli
+def get_mal_grubu_analiz(con, where: Kosul, min_ciro: float) -> pd.DataFrame:
+    """Mal Grubu bazında analiz"""
     
-    df = con.execute(sql).fetchdf()
+    df = calistir(con, 'mal_grubu_analiz', where.ekle("Mal_Grubu != ''"), esik('SUM(Ciro_Sonra)', min_ciro)).fetchdf()
     
     if df.empty:
         return df
     
     df.columns = [c.lower() for c in df.columns]
+    degisim_ekle(df, 'adet', 'ciro', 'marj', 'fire')
     
-    df['adet_deg'] = df.apply(lambda r: ((r['adet_2025']/r['adet_2024'])-1)*100 if r['adet_2024']>0 else 0, axis=1)
-    df['ciro_deg'] = df.apply(lambda r: ((r['ciro_2025']/r['ciro_2024'])-1)*100 if r['ciro_2024']>0 else 0, axis=1)
-    df['marj_deg'] = df.apply(lambda r: ((r['marj_2025']/r['marj_2024'])-1)*100 if r['marj_2024']>0 else 0, axis=1)
-    df['fire_deg'] = df.apply(lambda r: ((r['fire_2025']/r['fire_2024'])-1)*100 if r['fire_2024']>0 else 0, axis=1)
+    return df
+
+
+@onbellekli
+def get_urun_detay_toplu(con, mal_gruplari: tuple, where: Kosul) -> pd.DataFrame:
+    """Kartlardaki tüm mal gruplarının ürün detayları (tek sorgu)"""
+    
+    df = calistir(con, 'urun_detay_toplu', secim_kosulu(where, 'Mal_Grubu', mal_gruplari)).fetchdf()
+    df.columns = [c.lower() for c in df.columns]
     
     return df
 
 
-def get_urun_detay(con, mal_grubu: str, where: str) -> pd.DataFrame:
-    """Ürün detayları"""
-    
-    mal_kosul = f"Mal_Grubu = '{mal_grubu}'"
-    full_where = f"{where} AND {mal_kosul}" if where else f"WHERE {mal_kosul}"
-    
-    sql = f"""
-        SELECT 
-            Urun_Kod,
-            MAX(Urun_Ad) as Urun_Ad,
-            SUM(CASE WHEN Yil=2024 THEN Adet ELSE 0 END) as Adet_2024,
-            SUM(CASE WHEN Yil=2025 THEN Adet ELSE 0 END) as Adet_2025,
-            SUM(CASE WHEN Yil=2024 THEN Ciro ELSE 0 END) as Ciro_2024,
-            SUM(CASE WHEN Yil=2025 THEN Ciro ELSE 0 END) as Ciro_2025,
-            SUM(CASE WHEN Yil=2025 THEN ABS(Fire) ELSE 0 END) as Fire_2025
-        FROM veri
-        {full_where}
-        GROUP BY Urun_Kod
-        ORDER BY Adet_2025 DESC
+def get_urun_detay(con, mal_grubu: str, where: Kosul, gruplar: tuple = ()) -> pd.DataFrame:
+    """
+    Ürün detayları
+    gruplar: aynı sorguda hesaplanacak kart mal grupları; diğer kartlar önbellekten açılır
     """
     
-    df = con.execute(sql).fetchdf()
-    df.columns = [c.lower() for c in df.columns]
+    toplu = get_urun_detay_toplu(con, gruplar or (mal_grubu,), where)
+    df = toplu[toplu['mal_grubu'] == mal_grubu].drop(columns='mal_grubu').reset_index(drop=True)
     
     if not df.empty:
-        df['adet_deg'] = df.apply(lambda r: ((r['adet_2025']/r['adet_2024'])-1)*100 if r['adet_2024']>0 else 0, axis=1)
+        degisim_ekle(df, 'adet')
     
     return df
 
@@ -311,147 +338,56 @@ def get_urun_detay(con, mal_grubu: str, where: str) -> pd.DataFrame:
 # ÜRÜN GRUBU ANALİZİ FONKSİYONLARI
 # ============================================================================
 
-def get_urun_grubu_analiz(con, where: str, min_ciro: float) -> pd.DataFrame:
+@onbellekli
+def get_urun_grubu_analiz(con, where: Kosul, min_ciro: float) -> pd.DataFrame:
     """Ürün Grubu bazında analiz"""
     
-    ciro_filtre = f"HAVING SUM(CASE WHEN Yil=2025 THEN Ciro ELSE 0 END) >= {min_ciro}" if min_ciro > 0 else ""
-    
-    if where:
-        where_ug = f"{where} AND Urun_Grubu != ''"
-    else:
-        where_ug = "WHERE Urun_Grubu != ''"
-    
-    sql = f"""
-        SELECT 
-            Urun_Grubu,
-            SUM(CASE WHEN Yil=2024 THEN Adet ELSE 0 END) as Adet_2024,
-            SUM(CASE WHEN Yil=2025 THEN Adet ELSE 0 END) as Adet_2025,
-            SUM(CASE WHEN Yil=2024 THEN Ciro ELSE 0 END) as Ciro_2024,
-            SUM(CASE WHEN Yil=2025 THEN Ciro ELSE 0 END) as Ciro_2025,
-            SUM(CASE WHEN Yil=2024 THEN Marj ELSE 0 END) as Marj_2024,
-            SUM(CASE WHEN Yil=2025 THEN Marj ELSE 0 END) as Marj_2025,
-            SUM(CASE WHEN Yil=2024 THEN ABS(Fire) ELSE 0 END) as Fire_2024,
-            SUM(CASE WHEN Yil=2025 THEN ABS(Fire) ELSE 0 END) as Fire_2025
-        FROM veri
-        {where_ug}
-        GROUP BY Urun_Grubu
-        {ciro_filtre}
-    """
-    
-    df = con.execute(sql).fetchdf()
+    df = calistir(con, 'urun_grubu_analiz', where.ekle("Urun_Grubu != ''"), esik('SUM(Ciro_Sonra)', min_ciro)).fetchdf()
     
     if df.empty:
         return df
     
     df.columns = [c.lower() for c in df.columns]
-    
-    df['adet_deg'] = df.apply(lambda r: ((r['adet_2025']/r['adet_2024'])-1)*100 if r['adet_2024']>0 else 0, axis=1)
-    df['ciro_deg'] = df.apply(lambda r: ((r['ciro_2025']/r['ciro_2024'])-1)*100 if r['ciro_2024']>0 else 0, axis=1)
-    df['marj_deg'] = df.apply(lambda r: ((r['marj_2025']/r['marj_2024'])-1)*100 if r['marj_2024']>0 else 0, axis=1)
-    df['fire_deg'] = df.apply(lambda r: ((r['fire_2025']/r['fire_2024'])-1)*100 if r['fire_2024']>0 else 0, axis=1)
+    degisim_ekle(df, 'adet', 'ciro', 'marj', 'fire')
     
     return df
 
 
-def get_mal_grubu_by_urun_grubu(con, urun_grubu: str, where: str) -> pd.DataFrame:
+@onbellekli
+def get_mal_grubu_by_urun_grubu(con, urun_grubu: str, where: Kosul) -> pd.DataFrame:
     """Ürün Grubu için mal grupları detayı"""
     
-    ug_kosul = f"Urun_Grubu = '{urun_grubu}'"
-    full_where = f"{where} AND {ug_kosul}" if where else f"WHERE {ug_kosul}"
-    
-    sql = f"""
-        SELECT 
-            Mal_Grubu,
-            MAX(Ust_Mal) as Ust_Mal,
-            SUM(CASE WHEN Yil=2024 THEN Adet ELSE 0 END) as Adet_2024,
-            SUM(CASE WHEN Yil=2025 THEN Adet ELSE 0 END) as Adet_2025,
-            SUM(CASE WHEN Yil=2024 THEN Ciro ELSE 0 END) as Ciro_2024,
-            SUM(CASE WHEN Yil=2025 THEN Ciro ELSE 0 END) as Ciro_2025,
-            SUM(CASE WHEN Yil=2025 THEN ABS(Fire) ELSE 0 END) as Fire_2025
-        FROM veri
-        {full_where}
-        AND Mal_Grubu != ''
-        GROUP BY Mal_Grubu
-        ORDER BY Adet_2025 DESC
-    """
-    
-    df = con.execute(sql).fetchdf()
+    df = calistir(con, 'mal_grubu_detay', secim_kosulu(where, 'Urun_Grubu', (urun_grubu,)).ekle("Mal_Grubu != ''")).fetchdf()
     df.columns = [c.lower() for c in df.columns]
     
     if not df.empty:
-        df['adet_deg'] = df.apply(lambda r: ((r['adet_2025']/r['adet_2024'])-1)*100 if r['adet_2024']>0 else 0, axis=1)
+        degisim_ekle(df, 'adet')
     
     return df
 
 
-def get_magaza_dusus_ug(con, urun_grubu: str, where: str, limit: int = 5) -> pd.DataFrame:
+@onbellekli
+def get_magaza_dusus_ug(con, urun_grubu: str, where: Kosul, limit: int = 5) -> pd.DataFrame:
     """Ürün Grubu için en çok düşen mağazalar"""
     
-    ug_kosul = f"Urun_Grubu = '{urun_grubu}'"
-    full_where = f"{where} AND {ug_kosul}" if where else f"WHERE {ug_kosul}"
-    
-    sql = f"""
-        SELECT 
-            Magaza_Kod,
-            MAX(Magaza_Ad) as Magaza_Ad,
-            MAX(BS) as BS,
-            SUM(CASE WHEN Yil=2024 THEN Adet ELSE 0 END) as Adet_2024,
-            SUM(CASE WHEN Yil=2025 THEN Adet ELSE 0 END) as Adet_2025,
-            SUM(CASE WHEN Yil=2024 THEN Ciro ELSE 0 END) as Ciro_2024,
-            SUM(CASE WHEN Yil=2025 THEN Ciro ELSE 0 END) as Ciro_2025,
-            SUM(CASE WHEN Yil=2025 THEN ABS(Fire) ELSE 0 END) as Fire_2025
-        FROM veri
-        {full_where}
-        GROUP BY Magaza_Kod
-        HAVING Adet_2024 > 0
-    """
-    
-    df = con.execute(sql).fetchdf()
-    df.columns = [c.lower() for c in df.columns]
-    
-    if df.empty:
-        return df
+    df = get_kirilim(con, 'magaza_dusus', 'Urun_Grubu', (urun_grubu,), where, limit)
     
-    df['adet_fark'] = df['adet_2025'] - df['adet_2024']
-    df['adet_deg'] = df.apply(lambda r: ((r['adet_2025']/r['adet_2024'])-1)*100 if r['adet_2024']>0 else 0, axis=1)
-    df['ciro_deg'] = df.apply(lambda r: ((r['ciro_2025']/r['ciro_2024'])-1)*100 if r['ciro_2024']>0 else 0, axis=1)
+    if not df.empty:
+        degisim_ekle(df, 'adet', 'ciro')
     
-    return df.nsmallest(limit, 'adet_fark')
+    return df
 
 
-def get_magaza_artis_ug(con, urun_grubu: str, where: str, limit: int = 5) -> pd.DataFrame:
+@onbellekli
+def get_magaza_artis_ug(con, urun_grubu: str, where: Kosul, limit: int = 5) -> pd.DataFrame:
     """Ürün Grubu için en çok yükselen mağazalar"""
     
-    ug_kosul = f"Urun_Grubu = '{urun_grubu}'"
-    full_where = f"{where} AND {ug_kosul}" if where else f"WHERE {ug_kosul}"
-    
-    sql = f"""
-        SELECT 
-            Magaza_Kod,
-            MAX(Magaza_Ad) as Magaza_Ad,
-            MAX(BS) as BS,
-            SUM(CASE WHEN Yil=2024 THEN Adet ELSE 0 END) as Adet_2024,
-            SUM(CASE WHEN Yil=2025 THEN Adet ELSE 0 END) as Adet_2025,
-            SUM(CASE WHEN Yil=2024 THEN Ciro ELSE 0 END) as Ciro_2024,
-            SUM(CASE WHEN Yil=2025 THEN Ciro ELSE 0 END) as Ciro_2025,
-            SUM(CASE WHEN Yil=2025 THEN ABS(Fire) ELSE 0 END) as Fire_2025
-        FROM veri
-        {full_where}
-        GROUP BY Magaza_Kod
-        HAVING Adet_2024 > 0 OR Adet_2025 > 0
-    """
-    
-    df = con.execute(sql).fetchdf()
-    df.columns = [c.lower() for c in df.columns]
+    df = get_kirilim(con, 'magaza_artis', 'Urun_Grubu', (urun_grubu,), where, limit)
     
-    if df.empty:
-        return df
-    
-    df['adet_fark'] = df['adet_2025'] - df['adet_2024']
-    df['adet_deg'] = df.apply(lambda r: ((r['adet_2025']/r['adet_2024'])-1)*100 if r['adet_2024']>0 else 100, axis=1)
-    df['ciro_deg'] = df.apply(lambda r: ((r['ciro_2025']/r['ciro_2024'])-1)*100 if r['ciro_2024']>0 else 100, axis=1)
+    if not df.empty:
+        degisim_ekle(df, 'adet', 'ciro', bos=100)
     
-    return df.nlargest(limit, 'adet_fark')
+    return df
 
 
 def karar_goster_ug(df: pd.DataFrame, baslik: str, limit: int = 10, ters: bool = False):
@@ -479,11 +415,11 @@ def karar_goster_ug(df: pd.DataFrame, baslik: str, limit: int = 10, ters: bool =
         with st.expander(f"**{ug}** → Adet: {adet_deg:+.1f}%"):
             col1, col2 = st.columns(2)
             with col1:
-                st.metric("Adet 2024", f"{row['adet_2024']:,.0f}")
-                st.metric("Ciro 2024", f"₺{row['ciro_2024']:,.0f}")
+                st.metric(f"Adet {DONEM['once'].etiket}", f"{row['adet_once']:,.0f}")
+                st.metric(f"Ciro {DONEM['once'].etiket}", f"₺{row['ciro_once']:,.0f}")
             with col2:
-                st.metric("Adet 2025", f"{row['adet_2025']:,.0f}", f"{adet_deg:+.1f}%")
-                st.metric("Ciro 2025", f"₺{row['ciro_2025']:,.0f}", f"{row.get('ciro_deg',0):+.1f}%")
+                st.metric(f"Adet {DONEM['sonra'].etiket}", f"{row['adet_sonra']:,.0f}", f"{adet_deg:+.1f}%")
+                st.metric(f"Ciro {DONEM['sonra'].etiket}", f"₺{row['ciro_sonra']:,.0f}", f"{row.get('ciro_deg',0):+.1f}%")
             
             st.markdown(f'<div class="neden-box"><strong>Neden:</strong> {neden}</div>', unsafe_allow_html=True)
             st.markdown(f'<div class="aksiyon-box">💡 <strong>Aksiyon:</strong> {aksiyon}</div>', unsafe_allow_html=True)
@@ -503,152 +439,72 @@ def karar_goster_ug(df: pd.DataFrame, baslik: str, limit: int = 10, ters: bool =
     return selected_mal, selected_mag_dusus, selected_mag_artis
 
 
-def excel_rapor_ug(con, where: str, min_ciro: float, filtre_text: str) -> BytesIO:
+def excel_rapor_ug(con, where: Kosul, min_ciro: float, filtre_text: str, bicim: str = 'xlsx') -> BytesIO:
     """Ürün Grubu Excel raporu"""
     
-    output = BytesIO()
-    
     df = get_urun_grubu_analiz(con, where, min_ciro)
     
     if not df.empty:
-        df['neden'] = df.apply(lambda r: neden_tespit(r)[0], axis=1)
-        df['aksiyon'] = df.apply(lambda r: neden_tespit(r)[1], axis=1)
+        neden_ekle(df)
     
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        pd.DataFrame([{
+    sayfalar = {
+        'Bilgi': pd.DataFrame([{
             'Filtre': filtre_text,
             'Min Ciro': f"₺{min_ciro:,.0f}",
             'Tarih': pd.Timestamp.now().strftime('%Y-%m-%d %H:%M'),
             'Rapor': 'Ürün Grubu Analizi'
-        }]).to_excel(writer, sheet_name='Bilgi', index=False)
-        
-        if not df.empty:
-            df.nsmallest(20, 'adet_deg').to_excel(writer, sheet_name='En Kötü 20', index=False)
-            df.nlargest(20, 'adet_deg').to_excel(writer, sheet_name='En İyi 20', index=False)
-            df.to_excel(writer, sheet_name='Tüm Veriler', index=False)
+        }]),
+    }
     
-    output.seek(0)
-    return output
+    if not df.empty:
+        sayfalar['En Kötü 20'] = df.nsmallest(20, 'adet_deg')
+        sayfalar['En İyi 20'] = df.nlargest(20, 'adet_deg')
+        sayfalar['Tüm Veriler'] = df
+    
+    return rapor_yaz(sayfalar, bicim)
 
 
 # ============================================================================
 # ÜRÜN (MALZEME) ANALİZİ FONKSİYONLARI
 # ============================================================================
 
-def get_urun_analiz(con, where: str, min_ciro: float) -> pd.DataFrame:
+@onbellekli
+def get_urun_analiz(con, where: Kosul, min_ciro: float) -> pd.DataFrame:
     """Ürün (Malzeme) bazında analiz"""
     
-    ciro_filtre = f"HAVING SUM(CASE WHEN Yil=2025 THEN Ciro ELSE 0 END) >= {min_ciro/5}" if min_ciro > 0 else ""
-    
-    if where:
-        where_u = f"{where} AND Urun_Kod != ''"
-    else:
-        where_u = "WHERE Urun_Kod != ''"
-    
-    sql = f"""
-        SELECT 
-            Urun_Kod,
-            MAX(Urun_Ad) as Urun_Ad,
-            MAX(Mal_Grubu) as Mal_Grubu,
-            MAX(Ust_Mal) as Ust_Mal,
-            MAX(Urun_Grubu) as Urun_Grubu,
-            SUM(CASE WHEN Yil=2024 THEN Adet ELSE 0 END) as Adet_2024,
-            SUM(CASE WHEN Yil=2025 THEN Adet ELSE 0 END) as Adet_2025,
-            SUM(CASE WHEN Yil=2024 THEN Ciro ELSE 0 END) as Ciro_2024,
-            SUM(CASE WHEN Yil=2025 THEN Ciro ELSE 0 END) as Ciro_2025,
-            SUM(CASE WHEN Yil=2024 THEN Marj ELSE 0 END) as Marj_2024,
-            SUM(CASE WHEN Yil=2025 THEN Marj ELSE 0 END) as Marj_2025,
-            SUM(CASE WHEN Yil=2024 THEN ABS(Fire) ELSE 0 END) as Fire_2024,
-            SUM(CASE WHEN Yil=2025 THEN ABS(Fire) ELSE 0 END) as Fire_2025
-        FROM veri
-        {where_u}
-        GROUP BY Urun_Kod
-        {ciro_filtre}
-    """
-    
-    df = con.execute(sql).fetchdf()
+    df = calistir(con, 'urun_analiz', where.ekle("Urun_Kod != ''"), esik('SUM(Ciro_Sonra)', min_ciro / 5)).fetchdf()
     
     if df.empty:
         return df
     
     df.columns = [c.lower() for c in df.columns]
-    
-    df['adet_deg'] = df.apply(lambda r: ((r['adet_2025']/r['adet_2024'])-1)*100 if r['adet_2024']>0 else 0, axis=1)
-    df['ciro_deg'] = df.apply(lambda r: ((r['ciro_2025']/r['ciro_2024'])-1)*100 if r['ciro_2024']>0 else 0, axis=1)
-    df['marj_deg'] = df.apply(lambda r: ((r['marj_2025']/r['marj_2024'])-1)*100 if r['marj_2024']>0 else 0, axis=1)
-    df['fire_deg'] = df.apply(lambda r: ((r['fire_2025']/r['fire_2024'])-1)*100 if r['fire_2024']>0 else 0, axis=1)
+    degisim_ekle(df, 'adet', 'ciro', 'marj', 'fire')
     
     return df
 
 
-def get_magaza_dusus_urun(con, urun_kod: str, where: str, limit: int = 5) -> pd.DataFrame:
+@onbellekli
+def get_magaza_dusus_urun(con, urun_kod: str, where: Kosul, limit: int = 5) -> pd.DataFrame:
     """Ürün için en çok düşen mağazalar"""
     
-    u_kosul = f"Urun_Kod = '{urun_kod}'"
-    full_where = f"{where} AND {u_kosul}" if where else f"WHERE {u_kosul}"
-    
-    sql = f"""
-        SELECT 
-            Magaza_Kod,
-            MAX(Magaza_Ad) as Magaza_Ad,
-            MAX(BS) as BS,
-            SUM(CASE WHEN Yil=2024 THEN Adet ELSE 0 END) as Adet_2024,
-            SUM(CASE WHEN Yil=2025 THEN Adet ELSE 0 END) as Adet_2025,
-            SUM(CASE WHEN Yil=2024 THEN Ciro ELSE 0 END) as Ciro_2024,
-            SUM(CASE WHEN Yil=2025 THEN Ciro ELSE 0 END) as Ciro_2025,
-            SUM(CASE WHEN Yil=2025 THEN ABS(Fire) ELSE 0 END) as Fire_2025
-        FROM veri
-        {full_where}
-        GROUP BY Magaza_Kod
-        HAVING Adet_2024 > 0
-    """
+    df = get_kirilim(con, 'magaza_dusus', 'Urun_Kod', (urun_kod,), where, limit)
     
-    df = con.execute(sql).fetchdf()
-    df.columns = [c.lower() for c in df.columns]
-    
-    if df.empty:
-        return df
-    
-    df['adet_fark'] = df['adet_2025'] - df['adet_2024']
-    df['adet_deg'] = df.apply(lambda r: ((r['adet_2025']/r['adet_2024'])-1)*100 if r['adet_2024']>0 else 0, axis=1)
-    df['ciro_deg'] = df.apply(lambda r: ((r['ciro_2025']/r['ciro_2024'])-1)*100 if r['ciro_2024']>0 else 0, axis=1)
+    if not df.empty:
+        degisim_ekle(df, 'adet', 'ciro')
     
-    return df.nsmallest(limit, 'adet_fark')
+    return df
 
 
-def get_magaza_artis_urun(con, urun_kod: str, where: str, limit: int = 5) -> pd.DataFrame:
+@onbellekli
+def get_magaza_artis_urun(con, urun_kod: str, where: Kosul, limit: int = 5) -> pd.DataFrame:
     """Ürün için en çok yükselen mağazalar"""
     
-    u_kosul = f"Urun_Kod = '{urun_kod}'"
-    full_where = f"{where} AND {u_kosul}" if where else f"WHERE {u_kosul}"
-    
-    sql = f"""
-        SELECT 
-            Magaza_Kod,
-            MAX(Magaza_Ad) as Magaza_Ad,
-            MAX(BS) as BS,
-            SUM(CASE WHEN Yil=2024 THEN Adet ELSE 0 END) as Adet_2024,
-            SUM(CASE WHEN Yil=2025 THEN Adet ELSE 0 END) as Adet_2025,
-            SUM(CASE WHEN Yil=2024 THEN Ciro ELSE 0 END) as Ciro_2024,
-            SUM(CASE WHEN Yil=2025 THEN Ciro ELSE 0 END) as Ciro_2025,
-            SUM(CASE WHEN Yil=2025 THEN ABS(Fire) ELSE 0 END) as Fire_2025
-        FROM veri
-        {full_where}
-        GROUP BY Magaza_Kod
-        HAVING Adet_2024 > 0 OR Adet_2025 > 0
-    """
-    
-    df = con.execute(sql).fetchdf()
-    df.columns = [c.lower() for c in df.columns]
-    
-    if df.empty:
-        return df
+    df = get_kirilim(con, 'magaza_artis', 'Urun_Kod', (urun_kod,), where, limit)
     
-    df['adet_fark'] = df['adet_2025'] - df['adet_2024']
-    df['adet_deg'] = df.apply(lambda r: ((r['adet_2025']/r['adet_2024'])-1)*100 if r['adet_2024']>0 else 100, axis=1)
-    df['ciro_deg'] = df.apply(lambda r: ((r['ciro_2025']/r['ciro_2024'])-1)*100 if r['ciro_2024']>0 else 100, axis=1)
+    if not df.empty:
+        degisim_ekle(df, 'adet', 'ciro', bos=100)
     
-    return df.nlargest(limit, 'adet_fark')
+    return df
 
 
 def karar_goster_urun(df: pd.DataFrame, baslik: str, limit: int = 20, ters: bool = False):
@@ -677,13 +533,13 @@ def karar_goster_urun(df: pd.DataFrame, baslik: str, limit: int = 20, ters: bool
             
             col1, col2 = st.columns(2)
             with col1:
-                st.metric("Adet 2024", f"{row['adet_2024']:,.0f}")
-                st.metric("Ciro 2024", f"₺{row['ciro_2024']:,.0f}")
-                st.metric("Fire 2024", f"₺{row['fire_2024']:,.0f}")
+                st.metric(f"Adet {DONEM['once'].etiket}", f"{row['adet_once']:,.0f}")
+                st.metric(f"Ciro {DONEM['once'].etiket}", f"₺{row['ciro_once']:,.0f}")
+                st.metric(f"Fire {DONEM['once'].etiket}", f"₺{row['fire_once']:,.0f}")
             with col2:
-                st.metric("Adet 2025", f"{row['adet_2025']:,.0f}", f"{adet_deg:+.1f}%")
-                st.metric("Ciro 2025", f"₺{row['ciro_2025']:,.0f}", f"{row.get('ciro_deg',0):+.1f}%")
-                st.metric("Fire 2025", f"₺{row['fire_2025']:,.0f}", f"{row.get('fire_deg',0):+.1f}%")
+                st.metric(f"Adet {DONEM['sonra'].etiket}", f"{row['adet_sonra']:,.0f}", f"{adet_deg:+.1f}%")
+                st.metric(f"Ciro {DONEM['sonra'].etiket}", f"₺{row['ciro_sonra']:,.0f}", f"{row.get('ciro_deg',0):+.1f}%")
+                st.metric(f"Fire {DONEM['sonra'].etiket}", f"₺{row['fire_sonra']:,.0f}", f"{row.get('fire_deg',0):+.1f}%")
             
             st.markdown(f'<div class="neden-box"><strong>Neden:</strong> {neden}</div>', unsafe_allow_html=True)
             st.markdown(f'<div class="aksiyon-box">💡 <strong>Aksiyon:</strong> {aksiyon}</div>', unsafe_allow_html=True)
@@ -700,106 +556,62 @@ def karar_goster_urun(df: pd.DataFrame, baslik: str, limit: int = 20, ters: bool
     return selected_mag_dusus, selected_mag_artis
 
 
-def excel_rapor_urun(con, where: str, min_ciro: float, filtre_text: str) -> BytesIO:
+def excel_rapor_urun(con, where: Kosul, min_ciro: float, filtre_text: str, bicim: str = 'xlsx') -> BytesIO:
     """Ürün Excel raporu"""
     
-    output = BytesIO()
-    
     df = get_urun_analiz(con, where, min_ciro)
     
     if not df.empty:
-        df['neden'] = df.apply(lambda r: neden_tespit(r)[0], axis=1)
-        df['aksiyon'] = df.apply(lambda r: neden_tespit(r)[1], axis=1)
+        neden_ekle(df)
     
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        pd.DataFrame([{
+    sayfalar = {
+        'Bilgi': pd.DataFrame([{
             'Filtre': filtre_text,
             'Min Ciro': f"₺{min_ciro:,.0f}",
             'Tarih': pd.Timestamp.now().strftime('%Y-%m-%d %H:%M'),
             'Rapor': 'Ürün Analizi'
-        }]).to_excel(writer, sheet_name='Bilgi', index=False)
-        
-        if not df.empty:
-            df.nsmallest(50, 'adet_deg').to_excel(writer, sheet_name='En Kötü 50', index=False)
-            df.nlargest(50, 'adet_deg').to_excel(writer, sheet_name='En İyi 50', index=False)
-            df.to_excel(writer, sheet_name='Tüm Veriler', index=False)
+        }]),
+    }
     
-    output.seek(0)
-    return output
+    if not df.empty:
+        sayfalar['En Kötü 50'] = df.nsmallest(50, 'adet_deg')
+        sayfalar['En İyi 50'] = df.nlargest(50, 'adet_deg')
+        sayfalar['Tüm Veriler'] = df
+    
+    return rapor_yaz(sayfalar, bicim)
 
 
 # ============================================================================
 # EN ÇOK / EN AZ SATAN FONKSİYONLARI
 # ============================================================================
 
-def get_urun_adet_sirali(con, where: str, min_adet: int = 0) -> pd.DataFrame:
-    """Ürünleri 2025 adet bazında sırala"""
-    
-    adet_filtre = f"HAVING SUM(CASE WHEN Yil=2025 THEN Adet ELSE 0 END) >= {min_adet}" if min_adet > 0 else ""
+@onbellekli
+def get_urun_adet_uclar(con, where: Kosul, limit: int = 20) -> pd.DataFrame:
+    """En çok ve en az (satışı olan) satan ilk N ürün - iki uç tek sorguda (cok_sira / az_sira)"""
     
-    if where:
-        where_u = f"{where} AND Urun_Kod != ''"
-    else:
-        where_u = "WHERE Urun_Kod != ''"
-    
-    sql = f"""
-        SELECT 
-            Urun_Kod,
-            MAX(Urun_Ad) as Urun_Ad,
-            MAX(Mal_Grubu) as Mal_Grubu,
-            MAX(Urun_Grubu) as Urun_Grubu,
-            SUM(CASE WHEN Yil=2024 THEN Adet ELSE 0 END) as Adet_2024,
-            SUM(CASE WHEN Yil=2025 THEN Adet ELSE 0 END) as Adet_2025,
-            SUM(CASE WHEN Yil=2024 THEN Ciro ELSE 0 END) as Ciro_2024,
-            SUM(CASE WHEN Yil=2025 THEN Ciro ELSE 0 END) as Ciro_2025,
-            SUM(CASE WHEN Yil=2024 THEN Marj ELSE 0 END) as Marj_2024,
-            SUM(CASE WHEN Yil=2025 THEN Marj ELSE 0 END) as Marj_2025
-        FROM veri
-        {where_u}
-        GROUP BY Urun_Kod
-        {adet_filtre}
-    """
+    df = get_kirilim(con, 'urun_adet_uclar', '', (), where.ekle("Urun_Kod != ''"), limit)
     
-    df = con.execute(sql).fetchdf()
-    
-    if df.empty:
-        return df
-    
-    df.columns = [c.lower() for c in df.columns]
-    
-    df['adet_deg'] = df.apply(lambda r: ((r['adet_2025']/r['adet_2024'])-1)*100 if r['adet_2024']>0 else 0, axis=1)
-    df['ciro_deg'] = df.apply(lambda r: ((r['ciro_2025']/r['ciro_2024'])-1)*100 if r['ciro_2024']>0 else 0, axis=1)
+    if not df.empty:
+        degisim_ekle(df, 'adet', 'ciro')
     
     return df
 
 
-def get_magaza_adet_sirali(con, urun_kod: str, where: str) -> pd.DataFrame:
-    """Ürün için mağazaları adet bazında sırala"""
-    
-    u_kosul = f"Urun_Kod = '{urun_kod}'"
-    full_where = f"{where} AND {u_kosul}" if where else f"WHERE {u_kosul}"
-    
-    sql = f"""
-        SELECT 
-            Magaza_Kod,
-            MAX(Magaza_Ad) as Magaza_Ad,
-            MAX(BS) as BS,
-            SUM(CASE WHEN Yil=2024 THEN Adet ELSE 0 END) as Adet_2024,
-            SUM(CASE WHEN Yil=2025 THEN Adet ELSE 0 END) as Adet_2025,
-            SUM(CASE WHEN Yil=2024 THEN Ciro ELSE 0 END) as Ciro_2024,
-            SUM(CASE WHEN Yil=2025 THEN Ciro ELSE 0 END) as Ciro_2025
-        FROM veri
-        {full_where}
-        GROUP BY Magaza_Kod
-    """
+def uc_dilimi(df: pd.DataFrame, uc: str, limit: int) -> pd.DataFrame:
+    """Uçlar sonucundan bir ucun sıralı ilk N satırı (uc: 'cok' / 'az')"""
     
-    df = con.execute(sql).fetchdf()
-    df.columns = [c.lower() for c in df.columns]
+    kolon = f'{uc}_sira'
+    return df[df[kolon] <= limit].sort_values(kolon).drop(columns=['cok_sira', 'az_sira'])
+
+
+@onbellekli
+def get_magaza_adet_sirali(con, urun_kod: str, where: Kosul, limit: int = 10, en_cok: bool = True) -> pd.DataFrame:
+    """Ürün için en çok / en az (satışı olan) adet satan mağazalar"""
     
-    if df.empty:
-        return df
+    df = get_kirilim(con, 'magaza_adet_cok' if en_cok else 'magaza_adet_az', 'Urun_Kod', (urun_kod,), where, limit)
     
-    df['adet_deg'] = df.apply(lambda r: ((r['adet_2025']/r['adet_2024'])-1)*100 if r['adet_2024']>0 else 0, axis=1)
+    if not df.empty:
+        degisim_ekle(df, 'adet')
     
     return df
 
@@ -813,10 +625,8 @@ def karar_goster_adet(df: pd.DataFrame, baslik: str, limit: int = 20, en_cok: bo
         st.info("Gösterilecek veri yok")
         return None, None
     
-    df_sorted = df.nlargest(limit, 'adet_2025') if en_cok else df.nsmallest(limit, 'adet_2025')
-    # En az satan için 0'dan büyük olanları filtrele
-    if not en_cok:
-        df_sorted = df[df['adet_2025'] > 0].nsmallest(limit, 'adet_2025')
+    # En az satan ucu sadece satışı olan ürünleri sıralar
+    df_sorted = uc_dilimi(df, 'cok' if en_cok else 'az', limit)
     
     prefix = "adet_cok" if en_cok else "adet_az"
     selected_mag_cok = None
@@ -825,22 +635,22 @@ def karar_goster_adet(df: pd.DataFrame, baslik: str, limit: int = 20, en_cok: bo
     for i, (idx, row) in enumerate(df_sorted.iterrows()):
         urun_ad = row['urun_ad'][:35] + "..." if len(str(row['urun_ad'])) > 35 else row['urun_ad']
         urun_kod = row['urun_kod']
-        adet_2025 = row['adet_2025']
+        adet_sonra = row['adet_sonra']
         adet_deg = row.get('adet_deg', 0)
         
         # Renk belirle
         deg_renk = "🟢" if adet_deg > 0 else "🔴" if adet_deg < 0 else "⚪"
         
-        with st.expander(f"**{urun_ad}** → {adet_2025:,.0f} adet ({deg_renk} {adet_deg:+.1f}%)"):
+        with st.expander(f"**{urun_ad}** → {adet_sonra:,.0f} adet ({deg_renk} {adet_deg:+.1f}%)"):
             st.caption(f"Kod: {urun_kod} | Mal Grubu: {row['mal_grubu']}")
             
             col1, col2 = st.columns(2)
             with col1:
-                st.metric("Adet 2024", f"{row['adet_2024']:,.0f}")
-                st.metric("Ciro 2024", f"₺{row['ciro_2024']:,.0f}")
+                st.metric(f"Adet {DONEM['once'].etiket}", f"{row['adet_once']:,.0f}")
+                st.metric(f"Ciro {DONEM['once'].etiket}", f"₺{row['ciro_once']:,.0f}")
             with col2:
-                st.metric("Adet 2025", f"{row['adet_2025']:,.0f}", f"{adet_deg:+.1f}%")
-                st.metric("Ciro 2025", f"₺{row['ciro_2025']:,.0f}", f"{row.get('ciro_deg',0):+.1f}%")
+                st.metric(f"Adet {DONEM['sonra'].etiket}", f"{row['adet_sonra']:,.0f}", f"{adet_deg:+.1f}%")
+                st.metric(f"Ciro {DONEM['sonra'].etiket}", f"₺{row['ciro_sonra']:,.0f}", f"{row.get('ciro_deg',0):+.1f}%")
             
             # 2 buton
             btn_col1, btn_col2 = st.columns(2)
@@ -854,100 +664,51 @@ def karar_goster_adet(df: pd.DataFrame, baslik: str, limit: int = 20, en_cok: bo
     return selected_mag_cok, selected_mag_az
 
 
-def excel_rapor_adet(con, where: str, filtre_text: str) -> BytesIO:
+def excel_rapor_adet(con, where: Kosul, filtre_text: str, bicim: str = 'xlsx') -> BytesIO:
     """En Çok/Az Satan Excel raporu"""
     
-    output = BytesIO()
+    df = get_urun_adet_uclar(con, where, 50)
     
-    df = get_urun_adet_sirali(con, where, 0)
-    
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        pd.DataFrame([{
+    sayfalar = {
+        'Bilgi': pd.DataFrame([{
             'Filtre': filtre_text,
             'Tarih': pd.Timestamp.now().strftime('%Y-%m-%d %H:%M'),
             'Rapor': 'En Çok / En Az Satan Ürünler'
-        }]).to_excel(writer, sheet_name='Bilgi', index=False)
-        
-        if not df.empty:
-            df.nlargest(50, 'adet_2025').to_excel(writer, sheet_name='En Çok Satan 50', index=False)
-            df[df['adet_2025'] > 0].nsmallest(50, 'adet_2025').to_excel(writer, sheet_name='En Az Satan 50', index=False)
-            df.to_excel(writer, sheet_name='Tüm Veriler', index=False)
+        }]),
+    }
     
-    output.seek(0)
-    return output
+    if not df.empty:
+        sayfalar['En Çok Satan 50'] = uc_dilimi(df, 'cok', 50)
+        sayfalar['En Az Satan 50'] = uc_dilimi(df, 'az', 50)
+        sayfalar['Tüm Veriler'] = sorgu_parcalari(calistir(con, 'urun_sirali', where.ekle("Urun_Kod != ''")), 'adet', 'ciro')
+    
+    return rapor_yaz(sayfalar, bicim)
 
 
 # ============================================================================
 # CİRO BAZLI ANALİZ FONKSİYONLARI
 # ============================================================================
 
-def get_urun_ciro_sirali(con, where: str) -> pd.DataFrame:
-    """Ürünleri 2025 ciro bazında sırala"""
+@onbellekli
+def get_urun_ciro_uclar(con, where: Kosul, limit: int = 20) -> pd.DataFrame:
+    """En çok ve en az ciro yapan ilk N ürün (cirosu olanlar) - iki uç tek sorguda"""
     
-    if where:
-        where_u = f"{where} AND Urun_Kod != ''"
-    else:
-        where_u = "WHERE Urun_Kod != ''"
-    
-    sql = f"""
-        SELECT 
-            Urun_Kod,
-            MAX(Urun_Ad) as Urun_Ad,
-            MAX(Mal_Grubu) as Mal_Grubu,
-            MAX(Urun_Grubu) as Urun_Grubu,
-            SUM(CASE WHEN Yil=2024 THEN Adet ELSE 0 END) as Adet_2024,
-            SUM(CASE WHEN Yil=2025 THEN Adet ELSE 0 END) as Adet_2025,
-            SUM(CASE WHEN Yil=2024 THEN Ciro ELSE 0 END) as Ciro_2024,
-            SUM(CASE WHEN Yil=2025 THEN Ciro ELSE 0 END) as Ciro_2025,
-            SUM(CASE WHEN Yil=2024 THEN Marj ELSE 0 END) as Marj_2024,
-            SUM(CASE WHEN Yil=2025 THEN Marj ELSE 0 END) as Marj_2025
-        FROM veri
-        {where_u}
-        GROUP BY Urun_Kod
-        HAVING Ciro_2025 > 0
-    """
-    
-    df = con.execute(sql).fetchdf()
-    
-    if df.empty:
-        return df
-    
-    df.columns = [c.lower() for c in df.columns]
+    df = get_kirilim(con, 'urun_ciro_uclar', '', (), where.ekle("Urun_Kod != ''"), limit)
     
-    df['adet_deg'] = df.apply(lambda r: ((r['adet_2025']/r['adet_2024'])-1)*100 if r['adet_2024']>0 else 0, axis=1)
-    df['ciro_deg'] = df.apply(lambda r: ((r['ciro_2025']/r['ciro_2024'])-1)*100 if r['ciro_2024']>0 else 0, axis=1)
+    if not df.empty:
+        degisim_ekle(df, 'adet', 'ciro')
     
     return df
 
 
-def get_magaza_ciro_sirali(con, urun_kod: str, where: str) -> pd.DataFrame:
-    """Ürün için mağazaları ciro bazında sırala"""
-    
-    u_kosul = f"Urun_Kod = '{urun_kod}'"
-    full_where = f"{where} AND {u_kosul}" if where else f"WHERE {u_kosul}"
-    
-    sql = f"""
-        SELECT 
-            Magaza_Kod,
-            MAX(Magaza_Ad) as Magaza_Ad,
-            MAX(BS) as BS,
-            SUM(CASE WHEN Yil=2024 THEN Adet ELSE 0 END) as Adet_2024,
-            SUM(CASE WHEN Yil=2025 THEN Adet ELSE 0 END) as Adet_2025,
-            SUM(CASE WHEN Yil=2024 THEN Ciro ELSE 0 END) as Ciro_2024,
-            SUM(CASE WHEN Yil=2025 THEN Ciro ELSE 0 END) as Ciro_2025
-        FROM veri
-        {full_where}
-        GROUP BY Magaza_Kod
-    """
+@onbellekli
+def get_magaza_ciro_sirali(con, urun_kod: str, where: Kosul, limit: int = 10, en_cok: bool = True) -> pd.DataFrame:
+    """Ürün için en çok / en az (cirosu olan) ciro yapan mağazalar"""
     
-    df = con.execute(sql).fetchdf()
-    df.columns = [c.lower() for c in df.columns]
+    df = get_kirilim(con, 'magaza_ciro_cok' if en_cok else 'magaza_ciro_az', 'Urun_Kod', (urun_kod,), where, limit)
     
-    if df.empty:
-        return df
-    
-    df['adet_deg'] = df.apply(lambda r: ((r['adet_2025']/r['adet_2024'])-1)*100 if r['adet_2024']>0 else 0, axis=1)
-    df['ciro_deg'] = df.apply(lambda r: ((r['ciro_2025']/r['ciro_2024'])-1)*100 if r['ciro_2024']>0 else 0, axis=1)
+    if not df.empty:
+        degisim_ekle(df, 'adet', 'ciro')
     
     return df
 
@@ -961,7 +722,7 @@ def karar_goster_ciro(df: pd.DataFrame, baslik: str, limit: int = 20, en_cok: bo
         st.info("Gösterilecek veri yok")
         return None, None
     
-    df_sorted = df.nlargest(limit, 'ciro_2025') if en_cok else df.nsmallest(limit, 'ciro_2025')
+    df_sorted = uc_dilimi(df, 'cok' if en_cok else 'az', limit)
     
     prefix = "ciro_cok" if en_cok else "ciro_az"
     selected_mag_cok = None
@@ -970,24 +731,24 @@ def karar_goster_ciro(df: pd.DataFrame, baslik: str, limit: int = 20, en_cok: bo
     for i, (idx, row) in enumerate(df_sorted.iterrows()):
         urun_ad = row['urun_ad'][:35] + "..." if len(str(row['urun_ad'])) > 35 else row['urun_ad']
         urun_kod = row['urun_kod']
-        ciro_2025 = row['ciro_2025']
+        ciro_sonra = row['ciro_sonra']
         ciro_deg = row.get('ciro_deg', 0)
-        adet_2025 = row['adet_2025']
+        adet_sonra = row['adet_sonra']
         adet_deg = row.get('adet_deg', 0)
         
         # Renk belirle
         deg_renk = "🟢" if ciro_deg > 0 else "🔴" if ciro_deg < 0 else "⚪"
         
-        with st.expander(f"**{urun_ad}** → ₺{ciro_2025:,.0f} ({deg_renk} {ciro_deg:+.1f}%)"):
+        with st.expander(f"**{urun_ad}** → ₺{ciro_sonra:,.0f} ({deg_renk} {ciro_deg:+.1f}%)"):
             st.caption(f"Kod: {urun_kod} | Mal Grubu: {row['mal_grubu']}")
             
             col1, col2 = st.columns(2)
             with col1:
-                st.metric("Ciro 2024", f"₺{row['ciro_2024']:,.0f}")
-                st.metric("Adet 2024", f"{row['adet_2024']:,.0f}")
+                st.metric(f"Ciro {DONEM['once'].etiket}", f"₺{row['ciro_once']:,.0f}")
+                st.metric(f"Adet {DONEM['once'].etiket}", f"{row['adet_once']:,.0f}")
             with col2:
-                st.metric("Ciro 2025", f"₺{row['ciro_2025']:,.0f}", f"{ciro_deg:+.1f}%")
-                st.metric("Adet 2025", f"{row['adet_2025']:,.0f}", f"{adet_deg:+.1f}%")
+                st.metric(f"Ciro {DONEM['sonra'].etiket}", f"₺{row['ciro_sonra']:,.0f}", f"{ciro_deg:+.1f}%")
+                st.metric(f"Adet {DONEM['sonra'].etiket}", f"{row['adet_sonra']:,.0f}", f"{adet_deg:+.1f}%")
             
             # 2 buton
             btn_col1, btn_col2 = st.columns(2)
@@ -1001,107 +762,61 @@ def karar_goster_ciro(df: pd.DataFrame, baslik: str, limit: int = 20, en_cok: bo
     return selected_mag_cok, selected_mag_az
 
 
-def excel_rapor_ciro(con, where: str, filtre_text: str) -> BytesIO:
+def excel_rapor_ciro(con, where: Kosul, filtre_text: str, bicim: str = 'xlsx') -> BytesIO:
     """En Çok/Az Ciro Excel raporu"""
     
-    output = BytesIO()
-    
-    df = get_urun_ciro_sirali(con, where)
+    df = get_urun_ciro_uclar(con, where, 50)
     
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        pd.DataFrame([{
+    sayfalar = {
+        'Bilgi': pd.DataFrame([{
             'Filtre': filtre_text,
             'Tarih': pd.Timestamp.now().strftime('%Y-%m-%d %H:%M'),
             'Rapor': 'En Çok / En Az Ciro Yapan Ürünler'
-        }]).to_excel(writer, sheet_name='Bilgi', index=False)
-        
-        if not df.empty:
-            df.nlargest(50, 'ciro_2025').to_excel(writer, sheet_name='En Çok Ciro 50', index=False)
-            df.nsmallest(50, 'ciro_2025').to_excel(writer, sheet_name='En Az Ciro 50', index=False)
-            df.to_excel(writer, sheet_name='Tüm Veriler', index=False)
+        }]),
+    }
     
-    output.seek(0)
-    return output
+    if not df.empty:
+        sayfalar['En Çok Ciro 50'] = uc_dilimi(df, 'cok', 50)
+        sayfalar['En Az Ciro 50'] = uc_dilimi(df, 'az', 50)
+        sayfalar['Tüm Veriler'] = sorgu_parcalari(
+            calistir(con, 'urun_sirali', where.ekle("Urun_Kod != ''"), BOS.ekle('SUM(Ciro_Sonra) > 0')), 'adet', 'ciro')
+    
+    return rapor_yaz(sayfalar, bicim)
 
 
-def get_magaza_dusus(con, mal_grubu: str, where: str, limit: int = 5) -> pd.DataFrame:
-    """Mal grubu için en çok düşen mağazalar"""
-    
-    mal_kosul = f"Mal_Grubu = '{mal_grubu}'"
-    full_where = f"{where} AND {mal_kosul}" if where else f"WHERE {mal_kosul}"
-    
-    sql = f"""
-        SELECT 
-            Magaza_Kod,
-            MAX(Magaza_Ad) as Magaza_Ad,
-            MAX(BS) as BS,
-            SUM(CASE WHEN Yil=2024 THEN Adet ELSE 0 END) as Adet_2024,
-            SUM(CASE WHEN Yil=2025 THEN Adet ELSE 0 END) as Adet_2025,
-            SUM(CASE WHEN Yil=2024 THEN Ciro ELSE 0 END) as Ciro_2024,
-            SUM(CASE WHEN Yil=2025 THEN Ciro ELSE 0 END) as Ciro_2025,
-            SUM(CASE WHEN Yil=2024 THEN Marj ELSE 0 END) as Marj_2024,
-            SUM(CASE WHEN Yil=2025 THEN Marj ELSE 0 END) as Marj_2025,
-            SUM(CASE WHEN Yil=2025 THEN ABS(Fire) ELSE 0 END) as Fire_2025
-        FROM veri
-        {full_where}
-        GROUP BY Magaza_Kod
-        HAVING Adet_2024 > 0
-    """
-    
-    df = con.execute(sql).fetchdf()
-    df.columns = [c.lower() for c in df.columns]
+@onbellekli
+def get_magaza_degisim_toplu(con, mal_gruplari: tuple, where: Kosul, limit: int = 5) -> pd.DataFrame:
+    """Kartlardaki tüm mal grupları için ilk N düşen + ilk N yükselen mağaza (tek sorgu)"""
+    return get_kirilim(con, 'magaza_degisim_marj', 'Mal_Grubu', mal_gruplari, where, limit)
+
+
+def magaza_dilimi(toplu: pd.DataFrame, mal_grubu: str, sira: str, limit: int) -> pd.DataFrame:
+    """Toplu sonuçtan bir mal grubunun sıralı mağazaları"""
     
-    if df.empty:
-        return df
+    df = toplu[(toplu['mal_grubu'] == mal_grubu) & (toplu[sira] <= limit)].sort_values(sira)
+    return df.drop(columns=['mal_grubu', 'dusus_sira', 'artis_sira']).reset_index(drop=True)
+
+
+def get_magaza_dusus(con, mal_grubu: str, where: Kosul, limit: int = 5, gruplar: tuple = ()) -> pd.DataFrame:
+    """Mal grubu için en çok düşen mağazalar (gruplar: get_urun_detay ile aynı)"""
     
-    # Değişim hesapla
-    df['adet_fark'] = df['adet_2025'] - df['adet_2024']
-    df['adet_deg'] = df.apply(lambda r: ((r['adet_2025']/r['adet_2024'])-1)*100 if r['adet_2024']>0 else 0, axis=1)
-    df['ciro_deg'] = df.apply(lambda r: ((r['ciro_2025']/r['ciro_2024'])-1)*100 if r['ciro_2024']>0 else 0, axis=1)
+    df = magaza_dilimi(get_magaza_degisim_toplu(con, gruplar or (mal_grubu,), where, limit),
+                       mal_grubu, 'dusus_sira', limit)
     
-    # En çok düşene göre sırala
-    df = df.nsmallest(limit, 'adet_fark')
+    if not df.empty:
+        degisim_ekle(df, 'adet', 'ciro')
     
     return df
 
 
-def get_magaza_artis(con, mal_grubu: str, where: str, limit: int = 5) -> pd.DataFrame:
-    """Mal grubu için en çok yükselen mağazalar"""
-    
-    mal_kosul = f"Mal_Grubu = '{mal_grubu}'"
-    full_where = f"{where} AND {mal_kosul}" if where else f"WHERE {mal_kosul}"
-    
-    sql = f"""
-        SELECT 
-            Magaza_Kod,
-            MAX(Magaza_Ad) as Magaza_Ad,
-            MAX(BS) as BS,
-            SUM(CASE WHEN Yil=2024 THEN Adet ELSE 0 END) as Adet_2024,
-            SUM(CASE WHEN Yil=2025 THEN Adet ELSE 0 END) as Adet_2025,
-            SUM(CASE WHEN Yil=2024 THEN Ciro ELSE 0 END) as Ciro_2024,
-            SUM(CASE WHEN Yil=2025 THEN Ciro ELSE 0 END) as Ciro_2025,
-            SUM(CASE WHEN Yil=2024 THEN Marj ELSE 0 END) as Marj_2024,
-            SUM(CASE WHEN Yil=2025 THEN Marj ELSE 0 END) as Marj_2025,
-            SUM(CASE WHEN Yil=2025 THEN ABS(Fire) ELSE 0 END) as Fire_2025
-        FROM veri
-        {full_where}
-        GROUP BY Magaza_Kod
-        HAVING Adet_2024 > 0 OR Adet_2025 > 0
-    """
+def get_magaza_artis(con, mal_grubu: str, where: Kosul, limit: int = 5, gruplar: tuple = ()) -> pd.DataFrame:
+    """Mal grubu için en çok yükselen mağazalar (gruplar: get_urun_detay ile aynı)"""
     
-    df = con.execute(sql).fetchdf()
-    df.columns = [c.lower() for c in df.columns]
-    
-    if df.empty:
-        return df
+    df = magaza_dilimi(get_magaza_degisim_toplu(con, gruplar or (mal_grubu,), where, limit),
+                       mal_grubu, 'artis_sira', limit)
     
-    # Değişim hesapla
-    df['adet_fark'] = df['adet_2025'] - df['adet_2024']
-    df['adet_deg'] = df.apply(lambda r: ((r['adet_2025']/r['adet_2024'])-1)*100 if r['adet_2024']>0 else 100, axis=1)
-    df['ciro_deg'] = df.apply(lambda r: ((r['ciro_2025']/r['ciro_2024'])-1)*100 if r['ciro_2024']>0 else 100, axis=1)
-    
-    # En çok artana göre sırala
-    df = df.nlargest(limit, 'adet_fark')
+    if not df.empty:
+        degisim_ekle(df, 'adet', 'ciro', bos=100)
     
     return df
 
@@ -1110,69 +825,261 @@ def get_magaza_artis(con, mal_grubu: str, where: str, limit: int = 5) -> pd.Data
 # OTOMATİK YORUM
 # ============================================================================
 
+# Kural tablosu: (koşul, neden, aksiyon, renk) - yukarıdan aşağı ilk eşleşen kazanır.
+# Koşullar hem tek satırın sayılarıyla hem de tüm kolonlarla (Series) çalışır.
+NEDEN_KURALLARI = [
+    (lambda d: d['fire_deg'] > 50,
+     "🔥 Fire artışı kritik", "SKT kontrolü, sipariş azalt", "red"),
+    (lambda d: (d['adet_deg'] < -15) & (d['fire_deg'] < 20),
+     "📦 Bulunurluk problemi", "Raf yerleşimi ve stok kontrol", "yellow"),
+    (lambda d: (d['adet_deg'] < -10) & (d['fire_deg'] > 30),
+     "⚠️ Stok/SKT sorunu", "Sipariş miktarını düşür", "red"),
+    (lambda d: d['marj_deg'] < -20,
+     "💰 Marj erimesi", "Fiyatlama ve SMM kontrol", "yellow"),
+    (lambda d: d['adet_deg'] > 20,
+     "✅ Başarılı performans", "Başarı faktörlerini analiz et", "green"),
+    (lambda d: d['adet_deg'] < 0,
+     "📉 Performans düşüşü", "Detaylı analiz gerekli", "yellow"),
+]
+
+NEDEN_VARSAYILAN = ("📊 Normal", "-", "green")
+NEDEN_KOLONLARI = ['marj_deg', 'adet_deg', 'fire_deg']
+
+
 def neden_tespit(row: pd.Series) -> tuple:
-    """Neden ve aksiyon"""
+    """Neden ve aksiyon (tek satır)"""
     
-    marj_deg = row.get('marj_deg', 0) or 0
-    adet_deg = row.get('adet_deg', 0) or 0
-    fire_deg = row.get('fire_deg', 0) or 0
+    d = {k: row.get(k, 0) or 0 for k in NEDEN_KOLONLARI}
     
-    if fire_deg > 50:
-        return ("🔥 Fire artışı kritik", "SKT kontrolü, sipariş azalt", "red")
+    for kosul, neden, aksiyon, renk in NEDEN_KURALLARI:
+        if kosul(d):
+            return (neden, aksiyon, renk)
     
-    if adet_deg < -15 and fire_deg < 20:
-        return ("📦 Bulunurluk problemi", "Raf yerleşimi ve stok kontrol", "yellow")
-    
-    if adet_deg < -10 and fire_deg > 30:
-        return ("⚠️ Stok/SKT sorunu", "Sipariş miktarını düşür", "red")
-    
-    if marj_deg < -20:
-        return ("💰 Marj erimesi", "Fiyatlama ve SMM kontrol", "yellow")
+    return NEDEN_VARSAYILAN
+
+
+def neden_ekle(df: pd.DataFrame) -> pd.DataFrame:
+    """Tüm satırlara neden/aksiyon kolonlarını tek vektörel geçişte ekle"""
     
-    if adet_deg > 20:
-        return ("✅ Başarılı performans", "Başarı faktörlerini analiz et", "green")
+    d = {k: df[k] if k in df else pd.Series(0, index=df.index) for k in NEDEN_KOLONLARI}
+    kosullar = [kural[0](d).to_numpy() for kural in NEDEN_KURALLARI]
     
-    if adet_deg < 0:
-        return ("📉 Performans düşüşü", "Detaylı analiz gerekli", "yellow")
+    df['neden'] = np.select(kosullar, [k[1] for k in NEDEN_KURALLARI], NEDEN_VARSAYILAN[0]).astype(object)
+    df['aksiyon'] = np.select(kosullar, [k[2] for k in NEDEN_KURALLARI], NEDEN_VARSAYILAN[1]).astype(object)
     
-    return ("📊 Normal", "-", "green")
+    return df
 
 
 # ============================================================================
 # EXCEL RAPOR
 # ============================================================================
 
-def excel_rapor(con, where: str, min_ciro: float, filtre_text: str) -> BytesIO:
-    """Excel raporu"""
+EXCEL_PARCA_SATIR = 5000  # akış halinde yazarken tek seferde işlenen satır
+RAPOR_PARCA_VEKTOR = 8    # tam listeler DuckDB'den bu kadar vektörlük (x 2048 satır) parçalarla okunur
+
+# Biçim → (etiket, mime). CSV/Parquet sadece "Tüm Veriler" sayfasını içerir.
+RAPOR_BICIMLERI = {
+    'xlsx': ("Excel", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    'csv': ("CSV (Tüm Veriler)", "text/csv"),
+    'parquet': ("Parquet (Tüm Veriler)", "application/octet-stream"),
+}
+
+
+def kolon_adi(kolon) -> str:
+    """Rapor başlığı: adet_once → adet_2024 (dönem kodu ile)"""
+    
+    kolon = str(kolon)
+    for rol in ('once', 'sonra'):
+        if kolon.endswith(f'_{rol}'):
+            return kolon[:-len(rol)] + DONEM[rol].kod
+    
+    return kolon
+
+
+def excel_yaz(sayfalar: dict) -> BytesIO:
+    """
+    Sayfa adı → DataFrame (veya DataFrame parçaları) sözlüğünü xlsx'e yaz
+    openpyxl write-only modda satırlar akış halinde diske/belleğe gider,
+    hücre nesneleri tutulmaz → büyük sayfalarda bellek sabit kalır
+    """
+    
+    wb = Workbook(write_only=True)
+    
+    for ad, veri in sayfalar.items():
+        ws = wb.create_sheet(ad)
+        parcalar = [veri] if isinstance(veri, pd.DataFrame) else veri
+        baslik = False
+        
+        for parca in parcalar:
+            if not baslik:
+                hucreler = []
+                for kolon in parca.columns:
+                    hucre = WriteOnlyCell(ws, value=kolon_adi(kolon))
+                    hucre.font = Font(bold=True)
+                    hucreler.append(hucre)
+                ws.append(hucreler)
+                baslik = True
+            
+            for bas in range(0, len(parca), EXCEL_PARCA_SATIR):
+                dilim = parca.iloc[bas:bas + EXCEL_PARCA_SATIR].astype(object)
+                dilim = dilim.where(dilim.notna(), None)
+                for satir in dilim.itertuples(index=False, name=None):
+                    ws.append(satir)
     
     output = BytesIO()
+    wb.save(output)
+    output.seek(0)
+    return output
+
+
+def sorgu_parcalari(cur, *metrikler: str):
+    """
+    Sorgu sonucunu DataFrame parçaları halinde oku (tam liste belleğe toplanmaz)
+    Parçalar rapor yazılırken tüketilir; bu sırada aynı cursor başka sorgu çalıştırmamalı.
+    """
+    
+    while True:
+        parca = cur.fetch_df_chunk(RAPOR_PARCA_VEKTOR)
+        if parca.empty:
+            return
+        
+        parca.columns = [c.lower() for c in parca.columns]
+        yield degisim_ekle(parca, *metrikler)
+
+
+def tablo_yaz(veri, bicim: str) -> BytesIO:
+    """Tek tabloyu (DataFrame veya parçaları) CSV ya da Parquet olarak yaz"""
+    
+    output = BytesIO()
+    parcalar = [veri] if isinstance(veri, pd.DataFrame) else veri
+    yazici = None
+    
+    for i, parca in enumerate(parcalar):
+        parca = parca.rename(columns=kolon_adi)
+        
+        if bicim == 'csv':
+            parca.to_csv(output, index=False, header=i == 0, encoding='utf-8-sig' if i == 0 else 'utf-8')
+        else:
+            tablo = pa.Table.from_pandas(parca, preserve_index=False)
+            if yazici is None:
+                yazici = pq.ParquetWriter(output, tablo.schema)
+            yazici.write_table(tablo)
+    
+    if yazici is not None:
+        yazici.close()
+    
+    output.seek(0)
+    return output
+
+
+def rapor_yaz(sayfalar: dict, bicim: str = 'xlsx', tum_sayfa: str = 'Tüm Veriler') -> BytesIO:
+    """Rapor sayfalarını istenen biçimde yaz"""
+    
+    if bicim == 'xlsx':
+        return excel_yaz(sayfalar)
+    
+    return tablo_yaz(sayfalar.get(tum_sayfa, pd.DataFrame()), bicim)
+
+
+def excel_rapor(con, where: Kosul, min_ciro: float, filtre_text: str, bicim: str = 'xlsx') -> BytesIO:
+    """Excel raporu"""
     
     df = get_mal_grubu_analiz(con, where, min_ciro)
     
     if not df.empty:
-        df['neden'] = df.apply(lambda r: neden_tespit(r)[0], axis=1)
-        df['aksiyon'] = df.apply(lambda r: neden_tespit(r)[1], axis=1)
+        neden_ekle(df)
     
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        pd.DataFrame([{
+    sayfalar = {
+        'Bilgi': pd.DataFrame([{
             'Filtre': filtre_text,
             'Min Ciro': f"₺{min_ciro:,.0f}",
             'Tarih': pd.Timestamp.now().strftime('%Y-%m-%d %H:%M')
-        }]).to_excel(writer, sheet_name='Bilgi', index=False)
-        
-        if not df.empty:
-            df.nsmallest(20, 'adet_deg').to_excel(writer, sheet_name='En Kötü 20', index=False)
-            df.nlargest(20, 'adet_deg').to_excel(writer, sheet_name='En İyi 20', index=False)
-            df.to_excel(writer, sheet_name='Tüm Veriler', index=False)
+        }]),
+    }
     
-    output.seek(0)
-    return output
+    if not df.empty:
+        sayfalar['En Kötü 20'] = df.nsmallest(20, 'adet_deg')
+        sayfalar['En İyi 20'] = df.nlargest(20, 'adet_deg')
+        sayfalar['Tüm Veriler'] = df
+    
+    return rapor_yaz(sayfalar, bicim)
 
 
 # ============================================================================
 # MARJ ANALİZİ FONKSİYONLARI (YENİ)
 # ============================================================================
 
+def marj_degerleri(df: pd.DataFrame) -> dict:
+    """Marj neden kurallarının kullandığı kolonlar (dizi olarak)"""
+    
+    def kolon(ad):
+        return df[ad].to_numpy(dtype=float) if ad in df else np.zeros(len(df))
+    
+    d = {}
+    for m in ['adet', 'envanter', 'fire', 'kampanya']:
+        d[f'{m}_once'] = kolon(f'{m}_once')
+        d[f'{m}_sonra'] = kolon(f'{m}_sonra')
+    
+    # Fire ve kampanya zararı işaretten bağımsız (tutar) karşılaştırılır
+    for m in ['fire', 'kampanya']:
+        d[f'{m}_once'] = np.abs(d[f'{m}_once'])
+        d[f'{m}_sonra'] = np.abs(d[f'{m}_sonra'])
+    
+    for m in ['adet', 'envanter', 'fire', 'kampanya']:
+        d[f'{m}_fark'] = d[f'{m}_sonra'] - d[f'{m}_once']
+    
+    d['adet_deg'] = degisim(d['adet_sonra'], d['adet_once'])
+    d['envanter_deg'] = degisim(d['envanter_sonra'], d['envanter_once'], bos=100)
+    d['fire_deg'] = degisim(d['fire_sonra'], d['fire_once'], bos=100)
+    
+    return d
+
+
+# Kural tablosu: (neden, koşul, öncelik, açıklama) - en yüksek öncelikli 2 neden seçilir.
+# Eşit öncelikte tablodaki sıra korunur.
+MARJ_NEDEN_KURALLARI = [
+    ('📉 Satış Düşüşü + Kampanya Artışı',
+     lambda d: (d['adet_fark'] < 0) & (d['kampanya_fark'] > 0),
+     lambda d: np.abs(d['adet_fark']) + d['kampanya_fark'],
+     lambda d: f"Satış: {d['adet_once']:,.0f} → {d['adet_sonra']:,.0f} ({d['adet_deg']:+.1f}%)\nKampanya Zararı: ₺{d['kampanya_once']:,.0f} → ₺{d['kampanya_sonra']:,.0f} (+₺{d['kampanya_fark']:,.0f})"),
+    ('📉 Satış Düşüşü',
+     lambda d: (d['adet_fark'] < 0) & ~(d['kampanya_fark'] > 0),
+     lambda d: np.abs(d['adet_fark']),
+     lambda d: f"Satış: {d['adet_once']:,.0f} → {d['adet_sonra']:,.0f} ({d['adet_deg']:+.1f}%)"),
+    ('📦 Envanter Artışı',
+     lambda d: d['envanter_fark'] > 0,
+     lambda d: d['envanter_fark'],
+     lambda d: f"Envanter: ₺{d['envanter_once']:,.0f} → ₺{d['envanter_sonra']:,.0f} (+₺{d['envanter_fark']:,.0f}, {d['envanter_deg']:+.1f}%)"),
+    ('🔥 Fire Artışı',
+     lambda d: d['fire_fark'] > 0,
+     lambda d: d['fire_fark'],
+     lambda d: f"Fire: ₺{d['fire_once']:,.0f} → ₺{d['fire_sonra']:,.0f} (+₺{d['fire_fark']:,.0f}, {d['fire_deg']:+.1f}%)"),
+    ('🏷️ Kampanya Zararı Artışı',
+     lambda d: (d['kampanya_fark'] > 0) & (d['adet_fark'] >= 0),
+     lambda d: d['kampanya_fark'],
+     lambda d: f"Kampanya: ₺{d['kampanya_once']:,.0f} → ₺{d['kampanya_sonra']:,.0f} (+₺{d['kampanya_fark']:,.0f})"),
+]
+
+MARJ_NEDEN_YOK = {'neden': '📊 Belirgin neden yok', 'aciklama': 'Detaylı analiz gerekli'}
+
+
+def marj_neden_sirala(d: dict, adet: int = 2) -> np.ndarray:
+    """
+    Her satır için eşleşen kuralları önceliğe göre sırala
+    Dönüş: (satır x adet) kural indeksleri, boş yerler -1
+    """
+    
+    kosullar = np.column_stack([kural[1](d) for kural in MARJ_NEDEN_KURALLARI])
+    oncelikler = np.column_stack([kural[2](d) for kural in MARJ_NEDEN_KURALLARI])
+    
+    # Eşleşmeyen kurallar en sona; stable sıralama eşitlikte tablo sırasını korur
+    anahtar = np.where(kosullar, -oncelikler, np.inf)
+    sira = np.argsort(anahtar, axis=1, kind='stable')[:, :adet]
+    
+    gecerli = np.take_along_axis(kosullar, sira, axis=1)
+    return np.where(gecerli, sira, -1)
+
+
 def marj_neden_tespit(row: pd.Series) -> list:
     """
     Marj kaybının nedenlerini tespit et
@@ -1183,179 +1090,63 @@ def marj_neden_tespit(row: pd.Series) -> list:
     En yüksek 2 nedeni döndür
     """
     
-    nedenler = []
-    
-    # Değerleri al
-    adet_2024 = row.get('adet_2024', 0) or 0
-    adet_2025 = row.get('adet_2025', 0) or 0
-    adet_fark = adet_2025 - adet_2024
-    adet_deg = ((adet_2025/adet_2024)-1)*100 if adet_2024 > 0 else 0
-    
-    envanter_2024 = row.get('envanter_2024', 0) or 0
-    envanter_2025 = row.get('envanter_2025', 0) or 0
-    envanter_fark = envanter_2025 - envanter_2024
-    
-    fire_2024 = abs(row.get('fire_2024', 0) or 0)
-    fire_2025 = abs(row.get('fire_2025', 0) or 0)
-    fire_fark = fire_2025 - fire_2024
-    
-    kampanya_2024 = abs(row.get('kampanya_2024', 0) or 0)
-    kampanya_2025 = abs(row.get('kampanya_2025', 0) or 0)
-    kampanya_fark = kampanya_2025 - kampanya_2024
-    
-    # 1. Satış düşüşü kontrolü
-    if adet_fark < 0:
-        # Satış düştü - kampanya/indirim kontrolü
-        if kampanya_fark > 0:
-            nedenler.append({
-                'neden': '📉 Satış Düşüşü + Kampanya Artışı',
-                'aciklama': f"Satış: {adet_2024:,.0f} → {adet_2025:,.0f} ({adet_deg:+.1f}%)\nKampanya Zararı: ₺{kampanya_2024:,.0f} → ₺{kampanya_2025:,.0f} (+₺{kampanya_fark:,.0f})",
-                'oncelik': abs(adet_fark) + kampanya_fark
-            })
-        else:
-            nedenler.append({
-                'neden': '📉 Satış Düşüşü',
-                'aciklama': f"Satış: {adet_2024:,.0f} → {adet_2025:,.0f} ({adet_deg:+.1f}%)",
-                'oncelik': abs(adet_fark)
-            })
-    
-    # 2. Envanter artışı kontrolü
-    if envanter_fark > 0:
-        envanter_deg = ((envanter_2025/envanter_2024)-1)*100 if envanter_2024 > 0 else 100
-        nedenler.append({
-            'neden': '📦 Envanter Artışı',
-            'aciklama': f"Envanter: ₺{envanter_2024:,.0f} → ₺{envanter_2025:,.0f} (+₺{envanter_fark:,.0f}, {envanter_deg:+.1f}%)",
-            'oncelik': envanter_fark
-        })
-    
-    # 3. Fire artışı kontrolü
-    if fire_fark > 0:
-        fire_deg = ((fire_2025/fire_2024)-1)*100 if fire_2024 > 0 else 100
-        nedenler.append({
-            'neden': '🔥 Fire Artışı',
-            'aciklama': f"Fire: ₺{fire_2024:,.0f} → ₺{fire_2025:,.0f} (+₺{fire_fark:,.0f}, {fire_deg:+.1f}%)",
-            'oncelik': fire_fark
-        })
-    
-    # 4. Kampanya zararı (satış düşmese bile)
-    if kampanya_fark > 0 and adet_fark >= 0:
-        nedenler.append({
-            'neden': '🏷️ Kampanya Zararı Artışı',
-            'aciklama': f"Kampanya: ₺{kampanya_2024:,.0f} → ₺{kampanya_2025:,.0f} (+₺{kampanya_fark:,.0f})",
-            'oncelik': kampanya_fark
-        })
-    
-    # Önceliğe göre sırala ve en yüksek 2'yi döndür
-    nedenler.sort(key=lambda x: x['oncelik'], reverse=True)
-    
-    if not nedenler:
-        return [{'neden': '📊 Belirgin neden yok', 'aciklama': 'Detaylı analiz gerekli'}]
-    
-    return nedenler[:2]
-
-
-def get_marj_magaza_by_mal_grubu(con, mal_grubu: str, where: str, limit: int = 10) -> pd.DataFrame:
-    """Mal grubu için marj bazında en iyi mağazalar"""
+    d = marj_degerleri(pd.DataFrame([row]))
+    sira = marj_neden_sirala(d)[0]
     
-    mal_kosul = f"Mal_Grubu = '{mal_grubu}'"
-    full_where = f"{where} AND {mal_kosul}" if where else f"WHERE {mal_kosul}"
-    
-    sql = f"""
-        SELECT 
-            Magaza_Kod,
-            MAX(Magaza_Ad) as Magaza_Ad,
-            MAX(BS) as BS,
-            SUM(CASE WHEN Yil=2024 THEN Marj ELSE 0 END) as Marj_2024,
-            SUM(CASE WHEN Yil=2025 THEN Marj ELSE 0 END) as Marj_2025,
-            SUM(CASE WHEN Yil=2024 THEN Ciro ELSE 0 END) as Ciro_2024,
-            SUM(CASE WHEN Yil=2025 THEN Ciro ELSE 0 END) as Ciro_2025,
-            SUM(CASE WHEN Yil=2024 THEN Adet ELSE 0 END) as Adet_2024,
-            SUM(CASE WHEN Yil=2025 THEN Adet ELSE 0 END) as Adet_2025
-        FROM veri
-        {full_where}
-        GROUP BY Magaza_Kod
-        HAVING Marj_2025 > 0
-    """
+    tek = {k: v[0] for k, v in d.items()}
+    nedenler = [
+        {'neden': kural[0], 'aciklama': kural[3](tek), 'oncelik': kural[2](tek)}
+        for kural in (MARJ_NEDEN_KURALLARI[k] for k in sira if k >= 0)
+    ]
     
-    df = con.execute(sql).fetchdf()
-    df.columns = [c.lower() for c in df.columns]
+    return nedenler or [MARJ_NEDEN_YOK]
+
+
+def marj_neden_ekle(df: pd.DataFrame) -> pd.DataFrame:
+    """Marj kaybı olan satırlara neden_1/neden_2 kolonlarını tek vektörel geçişte ekle"""
     
-    if df.empty:
-        return df
+    etiketler = np.array([k[0] for k in MARJ_NEDEN_KURALLARI] + [''], dtype=object)
+    sira = marj_neden_sirala(marj_degerleri(df))
+    
+    # -1 → boş etiket; ilk sütunda neden yoksa "belirgin neden yok"
+    kayip = (df['marj_fark'] < 0).to_numpy()
+    neden_1 = np.where(sira[:, 0] >= 0, etiketler[sira[:, 0]], MARJ_NEDEN_YOK['neden'])
     
-    df['marj_fark'] = df['marj_2025'] - df['marj_2024']
-    df['marj_deg'] = df.apply(lambda r: ((r['marj_2025']/r['marj_2024'])-1)*100 if r['marj_2024']>0 else 0, axis=1)
+    df['neden_1'] = np.where(kayip, neden_1, '')
+    df['neden_2'] = np.where(kayip, etiketler[sira[:, 1]], '')
     
-    return df.nlargest(limit, 'marj_2025')
+    return df
 
 
-def get_marj_urun_by_mal_grubu(con, mal_grubu: str, where: str, limit: int = 10) -> pd.DataFrame:
-    """Mal grubu için marj bazında en iyi ürünler"""
+@onbellekli
+def get_marj_magaza_by_mal_grubu(con, mal_grubu: str, where: Kosul, limit: int = 10) -> pd.DataFrame:
+    """Mal grubu için marj bazında en iyi mağazalar"""
     
-    mal_kosul = f"Mal_Grubu = '{mal_grubu}'"
-    full_where = f"{where} AND {mal_kosul}" if where else f"WHERE {mal_kosul}"
-    
-    sql = f"""
-        SELECT 
-            Urun_Kod,
-            MAX(Urun_Ad) as Urun_Ad,
-            SUM(CASE WHEN Yil=2024 THEN Marj ELSE 0 END) as Marj_2024,
-            SUM(CASE WHEN Yil=2025 THEN Marj ELSE 0 END) as Marj_2025,
-            SUM(CASE WHEN Yil=2024 THEN Ciro ELSE 0 END) as Ciro_2024,
-            SUM(CASE WHEN Yil=2025 THEN Ciro ELSE 0 END) as Ciro_2025,
-            SUM(CASE WHEN Yil=2024 THEN Adet ELSE 0 END) as Adet_2024,
-            SUM(CASE WHEN Yil=2025 THEN Adet ELSE 0 END) as Adet_2025
-        FROM veri
-        {full_where}
-        GROUP BY Urun_Kod
-        HAVING Marj_2025 > 0
-    """
+    df = get_kirilim(con, 'magaza_marj', 'Mal_Grubu', (mal_grubu,), where, limit)
     
-    df = con.execute(sql).fetchdf()
-    df.columns = [c.lower() for c in df.columns]
+    if not df.empty:
+        degisim_ekle(df, 'marj')
     
-    if df.empty:
-        return df
+    return df
+
+
+@onbellekli
+def get_marj_urun_by_mal_grubu(con, mal_grubu: str, where: Kosul, limit: int = 10) -> pd.DataFrame:
+    """Mal grubu için marj bazında en iyi ürünler"""
+    
+    df = get_kirilim(con, 'urun_marj', 'Mal_Grubu', (mal_grubu,), where, limit)
     
-    df['marj_fark'] = df['marj_2025'] - df['marj_2024']
-    df['marj_deg'] = df.apply(lambda r: ((r['marj_2025']/r['marj_2024'])-1)*100 if r['marj_2024']>0 else 0, axis=1)
+    if not df.empty:
+        degisim_ekle(df, 'marj')
     
-    return df.nlargest(limit, 'marj_2025')
+    return df
 
 
-def get_marj_mal_grubu(con, where: str, min_ciro: float) -> pd.DataFrame:
+@onbellekli
+def get_marj_mal_grubu(con, where: Kosul, min_ciro: float) -> pd.DataFrame:
     """Mal Grubu bazında marj analizi - genişletilmiş"""
     
-    ciro_filtre = f"HAVING SUM(CASE WHEN Yil=2025 THEN Ciro ELSE 0 END) >= {min_ciro}" if min_ciro > 0 else ""
-    
-    if where:
-        where_mal = f"{where} AND Mal_Grubu != ''"
-    else:
-        where_mal = "WHERE Mal_Grubu != ''"
-    
-    sql = f"""
-        SELECT 
-            Mal_Grubu,
-            MAX(Ust_Mal) as Ust_Mal,
-            SUM(CASE WHEN Yil=2024 THEN Marj ELSE 0 END) as Marj_2024,
-            SUM(CASE WHEN Yil=2025 THEN Marj ELSE 0 END) as Marj_2025,
-            SUM(CASE WHEN Yil=2024 THEN Ciro ELSE 0 END) as Ciro_2024,
-            SUM(CASE WHEN Yil=2025 THEN Ciro ELSE 0 END) as Ciro_2025,
-            SUM(CASE WHEN Yil=2024 THEN Adet ELSE 0 END) as Adet_2024,
-            SUM(CASE WHEN Yil=2025 THEN Adet ELSE 0 END) as Adet_2025,
-            SUM(CASE WHEN Yil=2024 THEN ABS(Fire) ELSE 0 END) as Fire_2024,
-            SUM(CASE WHEN Yil=2025 THEN ABS(Fire) ELSE 0 END) as Fire_2025,
-            SUM(CASE WHEN Yil=2024 THEN ABS(Envanter) ELSE 0 END) as Envanter_2024,
-            SUM(CASE WHEN Yil=2025 THEN ABS(Envanter) ELSE 0 END) as Envanter_2025,
-            SUM(CASE WHEN Yil=2024 THEN ABS(Kampanya_Zarar) ELSE 0 END) as Kampanya_2024,
-            SUM(CASE WHEN Yil=2025 THEN ABS(Kampanya_Zarar) ELSE 0 END) as Kampanya_2025
-        FROM veri
-        {where_mal}
-        GROUP BY Mal_Grubu
-        {ciro_filtre}
-    """
-    
-    df = con.execute(sql).fetchdf()
+    df = calistir(con, 'marj_mal_grubu', where.ekle("Mal_Grubu != ''"), esik('SUM(Ciro_Sonra)', min_ciro)).fetchdf()
     
     if df.empty:
         return df
@@ -1363,53 +1154,23 @@ def get_marj_mal_grubu(con, where: str, min_ciro: float) -> pd.DataFrame:
     df.columns = [c.lower() for c in df.columns]
     
     # Marj farkı (tutar olarak)
-    df['marj_fark'] = df['marj_2025'] - df['marj_2024']
+    df['marj_fark'] = df['marj_sonra'] - df['marj_once']
     
     # Marj değişim %
-    df['marj_deg'] = df.apply(lambda r: ((r['marj_2025']/r['marj_2024'])-1)*100 if r['marj_2024']>0 else 0, axis=1)
+    degisim_ekle(df, 'marj')
     
     # Marj oranı
-    df['marj_oran_2024'] = df.apply(lambda r: (r['marj_2024']/r['ciro_2024'])*100 if r['ciro_2024']>0 else 0, axis=1)
-    df['marj_oran_2025'] = df.apply(lambda r: (r['marj_2025']/r['ciro_2025'])*100 if r['ciro_2025']>0 else 0, axis=1)
-    df['marj_oran_fark'] = df['marj_oran_2025'] - df['marj_oran_2024']
+    marj_oran_ekle(df)
+    df['marj_oran_fark'] = df['marj_oran_sonra'] - df['marj_oran_once']
     
     return df
 
 
-def get_marj_malzeme(con, where: str, min_ciro: float) -> pd.DataFrame:
+@onbellekli
+def get_marj_malzeme(con, where: Kosul, min_ciro: float) -> pd.DataFrame:
     """Malzeme bazında marj analizi - genişletilmiş"""
     
-    ciro_filtre = f"HAVING SUM(CASE WHEN Yil=2025 THEN Ciro ELSE 0 END) >= {min_ciro/10}" if min_ciro > 0 else ""
-    
-    if where:
-        where_mal = f"{where} AND Urun_Kod != ''"
-    else:
-        where_mal = "WHERE Urun_Kod != ''"
-    
-    sql = f"""
-        SELECT 
-            Urun_Kod,
-            MAX(Urun_Ad) as Urun_Ad,
-            MAX(Mal_Grubu) as Mal_Grubu,
-            SUM(CASE WHEN Yil=2024 THEN Marj ELSE 0 END) as Marj_2024,
-            SUM(CASE WHEN Yil=2025 THEN Marj ELSE 0 END) as Marj_2025,
-            SUM(CASE WHEN Yil=2024 THEN Ciro ELSE 0 END) as Ciro_2024,
-            SUM(CASE WHEN Yil=2025 THEN Ciro ELSE 0 END) as Ciro_2025,
-            SUM(CASE WHEN Yil=2024 THEN Adet ELSE 0 END) as Adet_2024,
-            SUM(CASE WHEN Yil=2025 THEN Adet ELSE 0 END) as Adet_2025,
-            SUM(CASE WHEN Yil=2024 THEN ABS(Fire) ELSE 0 END) as Fire_2024,
-            SUM(CASE WHEN Yil=2025 THEN ABS(Fire) ELSE 0 END) as Fire_2025,
-            SUM(CASE WHEN Yil=2024 THEN ABS(Envanter) ELSE 0 END) as Envanter_2024,
-            SUM(CASE WHEN Yil=2025 THEN ABS(Envanter) ELSE 0 END) as Envanter_2025,
-            SUM(CASE WHEN Yil=2024 THEN ABS(Kampanya_Zarar) ELSE 0 END) as Kampanya_2024,
-            SUM(CASE WHEN Yil=2025 THEN ABS(Kampanya_Zarar) ELSE 0 END) as Kampanya_2025
-        FROM veri
-        {where_mal}
-        GROUP BY Urun_Kod
-        {ciro_filtre}
-    """
-    
-    df = con.execute(sql).fetchdf()
+    df = calistir(con, 'marj_malzeme', where.ekle("Urun_Kod != ''"), esik('SUM(Ciro_Sonra)', min_ciro / 10)).fetchdf()
     
     if df.empty:
         return df
@@ -1417,63 +1178,42 @@ def get_marj_malzeme(con, where: str, min_ciro: float) -> pd.DataFrame:
     df.columns = [c.lower() for c in df.columns]
     
     # Marj farkı (tutar olarak)
-    df['marj_fark'] = df['marj_2025'] - df['marj_2024']
+    df['marj_fark'] = df['marj_sonra'] - df['marj_once']
     
     # Marj değişim %
-    df['marj_deg'] = df.apply(lambda r: ((r['marj_2025']/r['marj_2024'])-1)*100 if r['marj_2024']>0 else 0, axis=1)
+    degisim_ekle(df, 'marj')
     
     # Marj oranı
-    df['marj_oran_2024'] = df.apply(lambda r: (r['marj_2024']/r['ciro_2024'])*100 if r['ciro_2024']>0 else 0, axis=1)
-    df['marj_oran_2025'] = df.apply(lambda r: (r['marj_2025']/r['ciro_2025'])*100 if r['ciro_2025']>0 else 0, axis=1)
+    marj_oran_ekle(df)
     
     return df
 
 
-def marj_kpi_goster(con, where: str):
+def marj_kpi_goster(ozet: dict):
     """Marj KPI kartları"""
     
-    sql = f"""
-        SELECT 
-            Yil,
-            SUM(Marj) as Marj,
-            SUM(Ciro) as Ciro
-        FROM veri
-        {where}
-        GROUP BY Yil
-    """
-    
-    df = con.execute(sql).fetchdf()
-    df.columns = df.columns.str.lower()
-    
-    marj_2024 = df[df['yil']==2024]['marj'].sum() if len(df[df['yil']==2024]) > 0 else 0
-    marj_2025 = df[df['yil']==2025]['marj'].sum() if len(df[df['yil']==2025]) > 0 else 0
-    ciro_2024 = df[df['yil']==2024]['ciro'].sum() if len(df[df['yil']==2024]) > 0 else 0
-    ciro_2025 = df[df['yil']==2025]['ciro'].sum() if len(df[df['yil']==2025]) > 0 else 0
-    
-    marj_fark = marj_2025 - marj_2024
-    marj_deg = ((marj_2025/marj_2024)-1)*100 if marj_2024 > 0 else 0
-    
-    marj_oran_2024 = (marj_2024/ciro_2024)*100 if ciro_2024 > 0 else 0
-    marj_oran_2025 = (marj_2025/ciro_2025)*100 if ciro_2025 > 0 else 0
-    oran_fark = marj_oran_2025 - marj_oran_2024
+    marj_once, marj_sonra = ozet['marj_once'], ozet['marj_sonra']
+    marj_fark, marj_deg = ozet['marj_fark'], ozet['marj_degisim']
+    marj_oran_once, marj_oran_sonra = ozet['marj_oran_once'], ozet['marj_oran_sonra']
+    oran_fark = ozet['marj_oran_fark']
     
     cols = st.columns(4)
     
     with cols[0]:
         st.markdown(f"""
         <div class="kpi-card">
-            <div class="kpi-label">💰 Marj 2024</div>
-            <div class="kpi-value">₺{marj_2024:,.0f}</div>
-            <div class="kpi-delta">%{marj_oran_2024:.1f} oran</div>
+            <div class="kpi-label">💰 Marj {DONEM['once'].etiket}</div>
+            <div class="kpi-value">₺{marj_once:,.0f}</div>
+            <div class="kpi-delta">%{marj_oran_once:.1f} oran</div>
         </div>
         """, unsafe_allow_html=True)
     
     with cols[1]:
         st.markdown(f"""
         <div class="kpi-card">
-            <div class="kpi-label">💰 Marj 2025</div>
-            <div class="kpi-value">₺{marj_2025:,.0f}</div>
-            <div class="kpi-delta">%{marj_oran_2025:.1f} oran</div>
+            <div class="kpi-label">💰 Marj {DONEM['sonra'].etiket}</div>
+            <div class="kpi-value">₺{marj_sonra:,.0f}</div>
+            <div class="kpi-delta">%{marj_oran_sonra:.1f} oran</div>
         </div>
         """, unsafe_allow_html=True)
     
@@ -1493,7 +1233,7 @@ def marj_kpi_goster(con, where: str):
         <div class="kpi-card">
             <div class="kpi-label">📈 Oran Değişimi</div>
             <div class="kpi-value {delta_class}">{oran_fark:+.2f}%</div>
-            <div class="kpi-delta">{marj_oran_2024:.1f}% → {marj_oran_2025:.1f}%</div>
+            <div class="kpi-delta">{marj_oran_once:.1f}% → {marj_oran_sonra:.1f}%</div>
         </div>
         """, unsafe_allow_html=True)
 
@@ -1523,11 +1263,11 @@ def marj_liste_goster(df: pd.DataFrame, baslik: str, limit: int = 10, ters: bool
             # Marj bilgileri
             col1, col2 = st.columns(2)
             with col1:
-                st.metric("Marj 2024", f"₺{row['marj_2024']:,.0f}")
-                st.metric("Marj Oranı 2024", f"%{row['marj_oran_2024']:.1f}")
+                st.metric(f"Marj {DONEM['once'].etiket}", f"₺{row['marj_once']:,.0f}")
+                st.metric(f"Marj Oranı {DONEM['once'].etiket}", f"%{row['marj_oran_once']:.1f}")
             with col2:
-                st.metric("Marj 2025", f"₺{row['marj_2025']:,.0f}", f"{marj_deg:+.1f}%")
-                st.metric("Marj Oranı 2025", f"%{row['marj_oran_2025']:.1f}", f"{row['marj_oran_fark']:+.2f}%")
+                st.metric(f"Marj {DONEM['sonra'].etiket}", f"₺{row['marj_sonra']:,.0f}", f"{marj_deg:+.1f}%")
+                st.metric(f"Marj Oranı {DONEM['sonra'].etiket}", f"%{row['marj_oran_sonra']:.1f}", f"{row['marj_oran_fark']:+.2f}%")
             
             # NEDEN TESPİTİ - sadece kayıp varsa göster
             if marj_fark < 0:
@@ -1581,11 +1321,11 @@ def marj_malzeme_goster(df: pd.DataFrame, baslik: str, limit: int = 10, ters: bo
             # Marj bilgileri
             col1, col2 = st.columns(2)
             with col1:
-                st.metric("Marj 2024", f"₺{row['marj_2024']:,.0f}")
-                st.metric("Adet 2024", f"{row['adet_2024']:,.0f}")
+                st.metric(f"Marj {DONEM['once'].etiket}", f"₺{row['marj_once']:,.0f}")
+                st.metric(f"Adet {DONEM['once'].etiket}", f"{row['adet_once']:,.0f}")
             with col2:
-                st.metric("Marj 2025", f"₺{row['marj_2025']:,.0f}", f"{marj_deg:+.1f}%")
-                st.metric("Adet 2025", f"{row['adet_2025']:,.0f}")
+                st.metric(f"Marj {DONEM['sonra'].etiket}", f"₺{row['marj_sonra']:,.0f}", f"{marj_deg:+.1f}%")
+                st.metric(f"Adet {DONEM['sonra'].etiket}", f"{row['adet_sonra']:,.0f}")
             
             # NEDEN TESPİTİ - sadece kayıp varsa göster
             if marj_fark < 0:
@@ -1603,97 +1343,213 @@ def marj_malzeme_goster(df: pd.DataFrame, baslik: str, limit: int = 10, ters: bo
                     """, unsafe_allow_html=True)
 
 
-def excel_rapor_marj(con, where: str, min_ciro: float, filtre_text: str) -> BytesIO:
+def excel_rapor_marj(con, where: Kosul, min_ciro: float, filtre_text: str, bicim: str = 'xlsx') -> BytesIO:
     """Marj Excel raporu"""
     
-    output = BytesIO()
-    
     df_mal = get_marj_mal_grubu(con, where, min_ciro)
     df_urun = get_marj_malzeme(con, where, min_ciro)
     
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        pd.DataFrame([{
+    # Kayıp nedenleri tüm satırlar için tek geçişte
+    if not df_mal.empty:
+        marj_neden_ekle(df_mal)
+    if not df_urun.empty:
+        marj_neden_ekle(df_urun)
+    
+    sayfalar = {
+        'Bilgi': pd.DataFrame([{
             'Filtre': filtre_text,
             'Min Ciro': f"₺{min_ciro:,.0f}",
             'Tarih': pd.Timestamp.now().strftime('%Y-%m-%d %H:%M'),
             'Rapor': 'Net Marj Analizi'
-        }]).to_excel(writer, sheet_name='Bilgi', index=False)
+        }]),
+    }
+    
+    if not df_mal.empty:
+        sayfalar['Mal Grubu - Kayıp'] = df_mal.nsmallest(20, 'marj_fark')
+        sayfalar['Mal Grubu - Kazanç'] = df_mal.nlargest(20, 'marj_fark')
+        sayfalar['Mal Grubu - Tümü'] = df_mal
+    
+    if not df_urun.empty:
+        sayfalar['Malzeme - Kayıp'] = df_urun.nsmallest(20, 'marj_fark')
+        sayfalar['Malzeme - Kazanç'] = df_urun.nlargest(20, 'marj_fark')
+    
+    return rapor_yaz(sayfalar, bicim, tum_sayfa='Mal Grubu - Tümü')
+
+
+# ============================================================================
+# EXCEL RAPOR İŞLERİ (İSTEK ÜZERİNE - ARKA PLANDA)
+# ============================================================================
+
+# Rapor tipi → (üretici, rapor adı, dosya öneki)
+RAPORLAR = {
+    'satis': (excel_rapor, "EXCEL RAPORU", "rapor"),
+    'ug': (excel_rapor_ug, "ÜRÜN GRUBU RAPORU", "urun_grubu"),
+    'urun': (excel_rapor_urun, "ÜRÜN RAPORU", "urun"),
+    'adet': (excel_rapor_adet, "EN ÇOK/AZ SATAN RAPORU", "en_cok_az"),
+    'ciro': (excel_rapor_ciro, "EN ÇOK/AZ CİRO RAPORU", "en_cok_az_ciro"),
+    'marj': (excel_rapor_marj, "MARJ RAPORU", "marj_rapor"),
+}
+
+RAPOR_ONBELLEK_BOYUTU = 32  # saklanan en fazla rapor
+
+
+@st.cache_resource
+def rapor_deposu() -> dict:
+    """Rapor iş havuzu ve sonuç önbelleği - tüm oturumlar paylaşır"""
+    return {
+        'havuz': ThreadPoolExecutor(max_workers=2, thread_name_prefix='rapor'),
+        'isler': OrderedDict(),
+        'kilit': threading.Lock(),
+    }
+
+
+def rapor_uret(con, tip: str, where: Kosul, min_ciro, filtre: str, bicim: str) -> bytes:
+    """Raporu kendi cursor'ı ile üret (arka plan iş parçacığında çalışır, cursor'ı kapatır)"""
+    
+    uretici = RAPORLAR[tip][0]
+    
+    try:
+        if min_ciro is None:
+            rapor = uretici(con, where, filtre, bicim)
+        else:
+            rapor = uretici(con, where, min_ciro, filtre, bicim)
+        return rapor.getvalue()
+    finally:
+        con.close()
+
+
+def rapor_isi(veri: dict, tip: str, where: Kosul, min_ciro, filtre: str, bicim: str, baslat: bool = False):
+    """(rapor tipi, filtre, min ciro, biçim, veri sürümü) için rapor işini bul - istenirse başlat"""
+    
+    anahtar = (tip, where, min_ciro, bicim, veri['surum'])
+    depo = rapor_deposu()
+    
+    with depo['kilit']:
+        is_ = depo['isler'].get(anahtar)
         
-        if not df_mal.empty:
-            df_mal.nsmallest(20, 'marj_fark').to_excel(writer, sheet_name='Mal Grubu - Kayıp', index=False)
-            df_mal.nlargest(20, 'marj_fark').to_excel(writer, sheet_name='Mal Grubu - Kazanç', index=False)
-            df_mal.to_excel(writer, sheet_name='Mal Grubu - Tümü', index=False)
+        # Hatalı biten iş yeniden başlatılabilir
+        if is_ is not None and not (baslat and is_.done() and is_.exception() is not None):
+            depo['isler'].move_to_end(anahtar)
+            return is_
         
-        if not df_urun.empty:
-            df_urun.nsmallest(20, 'marj_fark').to_excel(writer, sheet_name='Malzeme - Kayıp', index=False)
-            df_urun.nlargest(20, 'marj_fark').to_excel(writer, sheet_name='Malzeme - Kazanç', index=False)
+        if not baslat:
+            return None
+        
+        is_ = depo['havuz'].submit(rapor_uret, baglanti_ac(veri), tip, where, min_ciro, filtre, bicim)
+        depo['isler'][anahtar] = is_
+        
+        while len(depo['isler']) > RAPOR_ONBELLEK_BOYUTU:
+            depo['isler'].popitem(last=False)
     
-    output.seek(0)
-    return output
+    return is_
+
+
+@st.fragment(run_every=1)
+def rapor_bekle(veri: dict, tip: str, where: Kosul, min_ciro, filtre: str, bicim: str):
+    """Rapor hazırlanırken sayfayı kilitlemeden bekle, bitince sayfayı yenile"""
+    
+    is_ = rapor_isi(veri, tip, where, min_ciro, filtre, bicim)
+    
+    if is_ is None or is_.done():
+        st.rerun()
+    
+    st.caption(f"⏳ {RAPORLAR[tip][1]} hazırlanıyor...")
+
+
+def rapor_indir(veri: dict, tip: str, where: Kosul, min_ciro, filtre: str):
+    """Rapor butonu - tıklanınca üretilir, hazır olan rapor anında indirilir"""
+    
+    _, ad, onek = RAPORLAR[tip]
+    col1, col2 = st.columns([1, 2])
+    
+    with col2:
+        bicim = st.radio("Biçim", list(RAPOR_BICIMLERI), format_func=lambda b: RAPOR_BICIMLERI[b][0],
+                         horizontal=True, key=f"bicim_{tip}", label_visibility="collapsed")
+    
+    with col1:
+        is_ = rapor_isi(veri, tip, where, min_ciro, filtre, bicim)
+        
+        if is_ is None or (is_.done() and is_.exception() is not None):
+            if is_ is not None:
+                st.error(f"❌ Rapor hazırlanamadı: {is_.exception()}")
+            
+            if not st.button(f"📄 {ad} HAZIRLA", key=f"hazirla_{tip}"):
+                return
+            
+            is_ = rapor_isi(veri, tip, where, min_ciro, filtre, bicim, baslat=True)
+        
+        if not is_.done():
+            rapor_bekle(veri, tip, where, min_ciro, filtre, bicim)
+            return
+        
+        st.download_button(f"📥 {ad}", is_.result(), f"{onek}_{pd.Timestamp.now().strftime('%Y%m%d')}.{bicim}",
+                           mime=RAPOR_BICIMLERI[bicim][1], key=f"excel_{tip}")
 
 
 # ============================================================================
 # UI
 # ============================================================================
 
-def sidebar_filtreler(opts: dict) -> dict:
-    """Filtreler"""
+def kutu_secenekleri(secenekler: list, secili: list) -> list:
+    """Seçili değerler listede kalsın (başka bir filtre onları dışarıda bıraksa da)"""
     
-    st.sidebar.markdown("## 🎛️ FİLTRELER")
+    if not secili:
+        return secenekler
     
-    st.sidebar.markdown("### 📍 Organizasyon")
+    kume = set(secenekler)
+    eksik = [d for d in secili if d not in kume]
     
-    sm_list = ['Tümü'] + opts.get('sm', [])
-    secili_sm = st.sidebar.selectbox('SM', sm_list)
+    return sorted(secenekler + eksik) if eksik else secenekler
+
+
+def sidebar_filtreler(veri: dict) -> dict:
+    """
+    Filtreler - her kutu, diğer tüm seçimler altında hâlâ satırı olan değerleri gösterir
+    Kutular çoklu seçimlidir (boş = Tümü). Seçimler kutular çizilmeden önce okunur;
+    seçenekler boyut indeksinden gelir.
+    """
     
-    if secili_sm != 'Tümü':
-        bs_opts = opts.get('bs_map', {}).get(secili_sm, [])
-    else:
-        bs_opts = []
-        for v in opts.get('bs_map', {}).values():
-            bs_opts.extend(v)
-        bs_opts = sorted(set(bs_opts))
+    indeks = get_boyut_indeksi(veri['surum'])
+    adlar = veri['magaza_adlari']
     
-    secili_bs = st.sidebar.selectbox('BS', ['Tümü'] + bs_opts)
+    secim = {a: st.session_state.get(f"filtre_{a}", []) for a in FILTRE_KOLONLARI}
+    secim['magaza'] = [m.split(' - ')[0] for m in secim['magaza']]    # kutuda "kod - ad" durur
     
-    if secili_bs != 'Tümü':
-        mag_opts = opts.get('magaza_map', {}).get(secili_bs, [])
-        mag_list = ['Tümü'] + [f"{k} - {a}" for k, a in mag_opts]
-    else:
-        mag_list = ['Tümü']
+    # Veri değiştiyse artık bulunmayan seçimler çıkarılır
+    for a, degerler in secim.items():
+        kalan = [d for d in degerler if d in indeks.kod_sozlugu[a]]
+        if len(kalan) != len(degerler):
+            secim[a] = kalan
+            st.session_state[f"filtre_{a}"] = [f"{k} - {adlar.get(k, '')}" for k in kalan] if a == 'magaza' else kalan
     
-    secili_mag = st.sidebar.selectbox('Mağaza', mag_list)
-    secili_mag_kod = secili_mag.split(' - ')[0] if secili_mag != 'Tümü' else 'Tümü'
+    secenekler = indeks.secenekler(secim)
     
-    st.sidebar.markdown("---")
-    st.sidebar.markdown("### 📦 Ürün")
+    def kutu(etiket, anahtar):
+        liste = kutu_secenekleri(secenekler[anahtar], secim[anahtar])
+        return st.sidebar.multiselect(etiket, liste, key=f"filtre_{anahtar}", placeholder="Tümü")
     
-    secili_nitelik = st.sidebar.selectbox('Nitelik', ['Tümü'] + opts.get('nitelik', []))
-    secili_urun = st.sidebar.selectbox('Ürün Grubu', ['Tümü'] + opts.get('urun_grubu', []))
+    st.sidebar.markdown("## 🎛️ FİLTRELER")
     
-    if secili_urun != 'Tümü':
-        ust_opts = opts.get('ust_mal_map', {}).get(secili_urun, [])
-    else:
-        ust_opts = []
-        for v in opts.get('ust_mal_map', {}).values():
-            ust_opts.extend(v)
-        ust_opts = sorted(set(ust_opts))
+    st.sidebar.markdown("### 📍 Organizasyon")
     
-    secili_ust = st.sidebar.selectbox('Üst Mal Grubu', ['Tümü'] + ust_opts)
+    secili_sm = kutu('SM', 'sm')
+    secili_bs = kutu('BS', 'bs')
     
-    if secili_ust != 'Tümü':
-        mal_opts = opts.get('mal_grubu_map', {}).get(secili_ust, [])
-    else:
-        mal_opts = []
-        for v in opts.get('mal_grubu_map', {}).values():
-            mal_opts.extend(v)
-        mal_opts = sorted(set(mal_opts))
+    mag_list = [f"{k} - {adlar.get(k, '')}" for k in kutu_secenekleri(secenekler['magaza'], secim['magaza'])]
+    secili_mag = st.sidebar.multiselect('Mağaza', mag_list, key='filtre_magaza', placeholder="Tümü")
+    secili_mag_kod = [m.split(' - ')[0] for m in secili_mag]
     
-    secili_mal = st.sidebar.selectbox('Mal Grubu', ['Tümü'] + mal_opts)
+    st.sidebar.markdown("---")
+    st.sidebar.markdown("### 📦 Ürün")
+    
+    secili_nitelik = kutu('Nitelik', 'nitelik')
+    secili_urun = kutu('Ürün Grubu', 'urun_grubu')
+    secili_ust = kutu('Üst Mal Grubu', 'ust_mal')
+    secili_mal = kutu('Mal Grubu', 'mal_grubu')
     
     st.sidebar.markdown("---")
     st.sidebar.markdown("### 📊 Alt Limit")
-    min_ciro = st.sidebar.number_input('2025 Min. Ciro (₺)', min_value=0, value=10000, step=5000)
+    min_ciro = st.sidebar.number_input(f"{DONEM['sonra'].etiket} Min. Ciro (₺)", min_value=0, value=10000, step=5000)
     
     return {
         'sm': secili_sm, 'bs': secili_bs, 'magaza': secili_mag_kod,
@@ -1703,16 +1559,40 @@ def sidebar_filtreler(opts: dict) -> dict:
     }
 
 
+def yonetim_paneli():
+    """Sorgu önbelleği sayaçları (sidebar altında)"""
+    
+    with st.sidebar.expander("🛠️ Yönetim"):
+        ist = ONBELLEK.istatistik()
+        
+        col1, col2 = st.columns(2)
+        col1.metric("İsabet", f"{ist['isabet']:,}")
+        col2.metric("Iska", f"{ist['iska']:,}")
+        
+        st.caption(f"İsabet oranı: %{ist['oran']:.1f}")
+        st.caption(f"Kayıt: {ist['kayit']:,} | Boyut: {ist['boyut_mb']:.1f} / {ist['azami_mb']:.0f} MB")
+        st.caption(f"Veri sürümü: {ist['surum']}")
+        
+        if st.button("🧹 Önbelleği Temizle", key="onbellek_temizle"):
+            ONBELLEK.temizle()
+            st.rerun()
+
+
+FILTRE_ETIKETLERI = {
+    'sm': 'SM', 'bs': 'BS', 'magaza': 'Mağaza', 'nitelik': 'Nitelik',
+    'urun_grubu': 'Ürün Grubu', 'ust_mal': 'Üst Mal', 'mal_grubu': 'Mal Grubu',
+}
+
+
 def filtre_text(f: dict) -> str:
-    """Filtre açıklaması"""
+    """Filtre açıklaması (çok seçimde sayı)"""
     p = []
-    if f['sm'] != 'Tümü': p.append(f"SM: {f['sm']}")
-    if f['bs'] != 'Tümü': p.append(f"BS: {f['bs']}")
-    if f['magaza'] != 'Tümü': p.append(f"Mağaza: {f['magaza']}")
-    if f['nitelik'] != 'Tümü': p.append(f"Nitelik: {f['nitelik']}")
-    if f['urun_grubu'] != 'Tümü': p.append(f"Ürün Grubu: {f['urun_grubu']}")
-    if f['ust_mal'] != 'Tümü': p.append(f"Üst Mal: {f['ust_mal']}")
-    if f['mal_grubu'] != 'Tümü': p.append(f"Mal Grubu: {f['mal_grubu']}")
+    for anahtar, etiket in FILTRE_ETIKETLERI.items():
+        degerler = secim_listesi(f.get(anahtar))
+        if len(degerler) > 5:
+            p.append(f"{etiket}: {len(degerler)} seçili")
+        elif degerler:
+            p.append(f"{etiket}: {', '.join(degerler)}")
     return " | ".join(p) if p else "Tüm Veriler"
 
 
@@ -1729,7 +1609,7 @@ def kpi_goster(ozet: dict):
     
     for col, (label, key, fmt, ters) in zip(cols, metrikler):
         with col:
-            deger = ozet.get(f'{key}_2025', 0)
+            deger = ozet.get(f'{key}_sonra', 0)
             degisim = ozet.get(f'{key}_degisim', 0)
             delta_class = 'delta-down' if (degisim > 0) == ters else 'delta-up'
             isaret = '+' if degisim > 0 else ''
@@ -1743,6 +1623,16 @@ def kpi_goster(ozet: dict):
             """, unsafe_allow_html=True)
 
 
+def kart_gruplari(df: pd.DataFrame, limit: int = 10) -> tuple:
+    """En kötü + en iyi kartlardaki mal grupları (toplu detay sorgularının anahtarı)"""
+    
+    if df.empty:
+        return ()
+    
+    return secim_listesi(list(df.nsmallest(limit, 'adet_deg')['mal_grubu']) +
+                         list(df.nlargest(limit, 'adet_deg')['mal_grubu']))
+
+
 def karar_goster(df: pd.DataFrame, baslik: str, limit: int = 10, ters: bool = False):
     """Karar kartları"""
     
@@ -1767,11 +1657,11 @@ def karar_goster(df: pd.DataFrame, baslik: str, limit: int = 10, ters: bool = Fa
         with st.expander(f"**{mal}** → Adet: {adet_deg:+.1f}%"):
             col1, col2 = st.columns(2)
             with col1:
-                st.metric("Adet 2024", f"{row['adet_2024']:,.0f}")
-                st.metric("Ciro 2024", f"₺{row['ciro_2024']:,.0f}")
+                st.metric(f"Adet {DONEM['once'].etiket}", f"{row['adet_once']:,.0f}")
+                st.metric(f"Ciro {DONEM['once'].etiket}", f"₺{row['ciro_once']:,.0f}")
             with col2:
-                st.metric("Adet 2025", f"{row['adet_2025']:,.0f}", f"{adet_deg:+.1f}%")
-                st.metric("Ciro 2025", f"₺{row['ciro_2025']:,.0f}", f"{row.get('ciro_deg',0):+.1f}%")
+                st.metric(f"Adet {DONEM['sonra'].etiket}", f"{row['adet_sonra']:,.0f}", f"{adet_deg:+.1f}%")
+                st.metric(f"Ciro {DONEM['sonra'].etiket}", f"₺{row['ciro_sonra']:,.0f}", f"{row.get('ciro_deg',0):+.1f}%")
             
             st.markdown(f'<div class="neden-box"><strong>Neden:</strong> {neden}</div>', unsafe_allow_html=True)
             st.markdown(f'<div class="aksiyon-box">💡 <strong>Aksiyon:</strong> {aksiyon}</div>', unsafe_allow_html=True)
@@ -1791,490 +1681,503 @@ def karar_goster(df: pd.DataFrame, baslik: str, limit: int = 10, ters: bool = Fa
     return selected_urun, selected_mag_dusus, selected_mag_artis
 
 
+# ============================================================================
+# SEKMELER
+# ============================================================================
+
+def sekme_satis(veri: dict, con, where: Kosul, secili: dict, filtre: str):
+    """Satış Analizi sekmesi"""
+    
+    # Excel rapor
+    rapor_indir(veri, 'satis', where, secili['min_ciro'], filtre)
+    
+    st.markdown("---")
+    
+    # KPI'lar
+    ozet = get_ozet(con, where)
+    kpi_goster(ozet)
+    
+    st.markdown("---")
+    
+    # DETAY PLACEHOLDER - Üstte gösterilecek
+    detay_placeholder = st.container()
+    
+    st.markdown("---")
+    
+    # Analiz
+    df_analiz = get_mal_grubu_analiz(con, where, secili['min_ciro'])
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        selected_urun1, selected_mag_dusus1, selected_mag_artis1 = karar_goster(df_analiz, "🔴 EN KÖTÜ 10", limit=10, ters=False)
+    
+    with col2:
+        selected_urun2, selected_mag_dusus2, selected_mag_artis2 = karar_goster(df_analiz, "🟢 EN İYİ 10", limit=10, ters=True)
+    
+    # Bir karta tıklanınca tüm kartların detayı tek sorguda hesaplanır; diğer kartlar önbellekten açılır
+    kartlar = kart_gruplari(df_analiz, limit=10)
+    
+    # DETAYLARI ÜSTTE GÖSTER
+    with detay_placeholder:
+        # Ürün detay
+        selected_urun = selected_urun1 or selected_urun2
+        if selected_urun:
+            st.markdown(f'<div class="detay-baslik">📋 {selected_urun} - Ürün Detayları</div>', unsafe_allow_html=True)
+            df_urun = get_urun_detay(con, selected_urun, where, gruplar=kartlar)
+            if not df_urun.empty:
+                st.dataframe(df_urun, use_container_width=True, hide_index=True)
+        
+        # Düşen mağazalar
+        selected_mag_dusus = selected_mag_dusus1 or selected_mag_dusus2
+        if selected_mag_dusus:
+            st.markdown(f'<div class="detay-baslik">🔴 {selected_mag_dusus} - En Çok Düşen 5 Mağaza</div>', unsafe_allow_html=True)
+            df_mag = get_magaza_dusus(con, selected_mag_dusus, where, limit=5, gruplar=kartlar)
+            if not df_mag.empty:
+                for i, (idx, row) in enumerate(df_mag.iterrows()):
+                    mag_ad = row['magaza_ad']
+                    adet_fark = row['adet_fark']
+                    adet_deg = row['adet_deg']
+                    
+                    with st.expander(f"🔴 **{row['magaza_kod']}** - {mag_ad} → {adet_fark:+,.0f} adet ({adet_deg:+.1f}%)"):
+                        st.caption(f"BS: {row['bs']}")
+                        c1, c2 = st.columns(2)
+                        with c1:
+                            st.metric(f"Adet {DONEM['once'].etiket}", f"{row['adet_once']:,.0f}")
+                            st.metric(f"Ciro {DONEM['once'].etiket}", f"₺{row['ciro_once']:,.0f}")
+                        with c2:
+                            st.metric(f"Adet {DONEM['sonra'].etiket}", f"{row['adet_sonra']:,.0f}", f"{adet_deg:+.1f}%")
+                            st.metric(f"Ciro {DONEM['sonra'].etiket}", f"₺{row['ciro_sonra']:,.0f}", f"{row['ciro_deg']:+.1f}%")
+                        st.metric(f"Fire {DONEM['sonra'].etiket}", f"₺{row['fire_sonra']:,.0f}")
+            else:
+                st.info("Bu mal grubu için mağaza verisi bulunamadı")
+        
+        # Yükselen mağazalar
+        selected_mag_artis = selected_mag_artis1 or selected_mag_artis2
+        if selected_mag_artis:
+            st.markdown(f'<div class="detay-baslik">🟢 {selected_mag_artis} - En Çok Yükselen 5 Mağaza</div>', unsafe_allow_html=True)
+            df_mag_artis = get_magaza_artis(con, selected_mag_artis, where, limit=5, gruplar=kartlar)
+            if not df_mag_artis.empty:
+                for i, (idx, row) in enumerate(df_mag_artis.iterrows()):
+                    mag_ad = row['magaza_ad']
+                    adet_fark = row['adet_fark']
+                    adet_deg = row['adet_deg']
+                    
+                    with st.expander(f"🟢 **{row['magaza_kod']}** - {mag_ad} → {adet_fark:+,.0f} adet ({adet_deg:+.1f}%)"):
+                        st.caption(f"BS: {row['bs']}")
+                        c1, c2 = st.columns(2)
+                        with c1:
+                            st.metric(f"Adet {DONEM['once'].etiket}", f"{row['adet_once']:,.0f}")
+                            st.metric(f"Ciro {DONEM['once'].etiket}", f"₺{row['ciro_once']:,.0f}")
+                        with c2:
+                            st.metric(f"Adet {DONEM['sonra'].etiket}", f"{row['adet_sonra']:,.0f}", f"{adet_deg:+.1f}%")
+                            st.metric(f"Ciro {DONEM['sonra'].etiket}", f"₺{row['ciro_sonra']:,.0f}", f"{row['ciro_deg']:+.1f}%")
+            else:
+                st.info("Bu mal grubu için mağaza verisi bulunamadı")
+
+
+def sekme_urun_grubu(veri: dict, con, where: Kosul, secili: dict, filtre: str):
+    """Ürün Grubu Analizi sekmesi"""
+    
+    # Excel rapor
+    rapor_indir(veri, 'ug', where, secili['min_ciro'], filtre)
+    
+    st.markdown("---")
+    
+    # KPI'lar
+    ozet_ug = get_ozet(con, where)
+    kpi_goster(ozet_ug)
+    
+    st.markdown("---")
+    
+    # DETAY PLACEHOLDER
+    detay_ug_placeholder = st.container()
+    
+    st.markdown("---")
+    
+    # Ürün Grubu Analizi
+    df_ug_analiz = get_urun_grubu_analiz(con, where, secili['min_ciro'])
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        ug_mal1, ug_dusus1, ug_artis1 = karar_goster_ug(df_ug_analiz, "🔴 EN KÖTÜ 10 ÜRÜN GRUBU", limit=10, ters=False)
+    
+    with col2:
+        ug_mal2, ug_dusus2, ug_artis2 = karar_goster_ug(df_ug_analiz, "🟢 EN İYİ 10 ÜRÜN GRUBU", limit=10, ters=True)
+    
+    # DETAYLARI ÜSTTE GÖSTER
+    with detay_ug_placeholder:
+        selected_mal = ug_mal1 or ug_mal2
+        if selected_mal:
+            st.markdown(f'<div class="detay-baslik">📂 {selected_mal} - Mal Grupları</div>', unsafe_allow_html=True)
+            df_mal = get_mal_grubu_by_urun_grubu(con, selected_mal, where)
+            if not df_mal.empty:
+                st.dataframe(df_mal, use_container_width=True, hide_index=True)
+        
+        ug_mag_dusus = ug_dusus1 or ug_dusus2
+        if ug_mag_dusus:
+            st.markdown(f'<div class="detay-baslik">🔴 {ug_mag_dusus} - En Çok Düşen 5 Mağaza</div>', unsafe_allow_html=True)
+            df_mag = get_magaza_dusus_ug(con, ug_mag_dusus, where, limit=5)
+            if not df_mag.empty:
+                for i, (idx, row) in enumerate(df_mag.iterrows()):
+                    with st.expander(f"🔴 **{row['magaza_kod']}** - {row['magaza_ad']} → {row['adet_fark']:+,.0f} adet ({row['adet_deg']:+.1f}%)"):
+                        st.caption(f"BS: {row['bs']}")
+                        c1, c2 = st.columns(2)
+                        with c1:
+                            st.metric(f"Adet {DONEM['once'].etiket}", f"{row['adet_once']:,.0f}")
+                            st.metric(f"Ciro {DONEM['once'].etiket}", f"₺{row['ciro_once']:,.0f}")
+                        with c2:
+                            st.metric(f"Adet {DONEM['sonra'].etiket}", f"{row['adet_sonra']:,.0f}", f"{row['adet_deg']:+.1f}%")
+                            st.metric(f"Ciro {DONEM['sonra'].etiket}", f"₺{row['ciro_sonra']:,.0f}", f"{row['ciro_deg']:+.1f}%")
+                        st.metric(f"Fire {DONEM['sonra'].etiket}", f"₺{row['fire_sonra']:,.0f}")
+        
+        ug_mag_artis = ug_artis1 or ug_artis2
+        if ug_mag_artis:
+            st.markdown(f'<div class="detay-baslik">🟢 {ug_mag_artis} - En Çok Yükselen 5 Mağaza</div>', unsafe_allow_html=True)
+            df_mag_artis = get_magaza_artis_ug(con, ug_mag_artis, where, limit=5)
+            if not df_mag_artis.empty:
+                for i, (idx, row) in enumerate(df_mag_artis.iterrows()):
+                    with st.expander(f"🟢 **{row['magaza_kod']}** - {row['magaza_ad']} → {row['adet_fark']:+,.0f} adet ({row['adet_deg']:+.1f}%)"):
+                        st.caption(f"BS: {row['bs']}")
+                        c1, c2 = st.columns(2)
+                        with c1:
+                            st.metric(f"Adet {DONEM['once'].etiket}", f"{row['adet_once']:,.0f}")
+                            st.metric(f"Ciro {DONEM['once'].etiket}", f"₺{row['ciro_once']:,.0f}")
+                        with c2:
+                            st.metric(f"Adet {DONEM['sonra'].etiket}", f"{row['adet_sonra']:,.0f}", f"{row['adet_deg']:+.1f}%")
+                            st.metric(f"Ciro {DONEM['sonra'].etiket}", f"₺{row['ciro_sonra']:,.0f}", f"{row['ciro_deg']:+.1f}%")
+
+
+def sekme_urun(veri: dict, con, where: Kosul, secili: dict, filtre: str):
+    """Ürün Analizi sekmesi"""
+    
+    rapor_indir(veri, 'urun', where, secili['min_ciro'], filtre)
+    
+    st.markdown("---")
+    ozet_urun = get_ozet(con, where)
+    kpi_goster(ozet_urun)
+    st.markdown("---")
+    
+    # DETAY PLACEHOLDER
+    detay_urun_placeholder = st.container()
+    st.markdown("---")
+    
+    df_urun_analiz = get_urun_analiz(con, where, secili['min_ciro'])
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        urun_dusus1, urun_artis1 = karar_goster_urun(df_urun_analiz, "🔴 EN KÖTÜ 20 ÜRÜN", limit=20, ters=False)
+    with col2:
+        urun_dusus2, urun_artis2 = karar_goster_urun(df_urun_analiz, "🟢 EN İYİ 20 ÜRÜN", limit=20, ters=True)
+    
+    # DETAYLARI ÜSTTE GÖSTER
+    with detay_urun_placeholder:
+        urun_mag_dusus = urun_dusus1 or urun_dusus2
+        if urun_mag_dusus:
+            urun_row = df_urun_analiz[df_urun_analiz['urun_kod'] == urun_mag_dusus]
+            urun_ad = urun_row['urun_ad'].values[0] if not urun_row.empty else urun_mag_dusus
+            st.markdown(f'<div class="detay-baslik">🔴 {urun_ad[:30]}... - En Çok Düşen 5 Mağaza</div>', unsafe_allow_html=True)
+            df_mag = get_magaza_dusus_urun(con, urun_mag_dusus, where, limit=5)
+            if not df_mag.empty:
+                for i, (idx, row) in enumerate(df_mag.iterrows()):
+                    with st.expander(f"🔴 **{row['magaza_kod']}** - {row['magaza_ad']} → {row['adet_fark']:+,.0f} adet ({row['adet_deg']:+.1f}%)"):
+                        st.caption(f"BS: {row['bs']}")
+                        c1, c2 = st.columns(2)
+                        with c1:
+                            st.metric(f"Adet {DONEM['once'].etiket}", f"{row['adet_once']:,.0f}")
+                            st.metric(f"Ciro {DONEM['once'].etiket}", f"₺{row['ciro_once']:,.0f}")
+                        with c2:
+                            st.metric(f"Adet {DONEM['sonra'].etiket}", f"{row['adet_sonra']:,.0f}", f"{row['adet_deg']:+.1f}%")
+                            st.metric(f"Ciro {DONEM['sonra'].etiket}", f"₺{row['ciro_sonra']:,.0f}", f"{row['ciro_deg']:+.1f}%")
+                        st.metric(f"Fire {DONEM['sonra'].etiket}", f"₺{row['fire_sonra']:,.0f}")
+        
+        urun_mag_artis = urun_artis1 or urun_artis2
+        if urun_mag_artis:
+            urun_row = df_urun_analiz[df_urun_analiz['urun_kod'] == urun_mag_artis]
+            urun_ad = urun_row['urun_ad'].values[0] if not urun_row.empty else urun_mag_artis
+            st.markdown(f'<div class="detay-baslik">🟢 {urun_ad[:30]}... - En Çok Yükselen 5 Mağaza</div>', unsafe_allow_html=True)
+            df_mag_artis = get_magaza_artis_urun(con, urun_mag_artis, where, limit=5)
+            if not df_mag_artis.empty:
+                for i, (idx, row) in enumerate(df_mag_artis.iterrows()):
+                    with st.expander(f"🟢 **{row['magaza_kod']}** - {row['magaza_ad']} → {row['adet_fark']:+,.0f} adet ({row['adet_deg']:+.1f}%)"):
+                        st.caption(f"BS: {row['bs']}")
+                        c1, c2 = st.columns(2)
+                        with c1:
+                            st.metric(f"Adet {DONEM['once'].etiket}", f"{row['adet_once']:,.0f}")
+                            st.metric(f"Ciro {DONEM['once'].etiket}", f"₺{row['ciro_once']:,.0f}")
+                        with c2:
+                            st.metric(f"Adet {DONEM['sonra'].etiket}", f"{row['adet_sonra']:,.0f}", f"{row['adet_deg']:+.1f}%")
+                            st.metric(f"Ciro {DONEM['sonra'].etiket}", f"₺{row['ciro_sonra']:,.0f}", f"{row['ciro_deg']:+.1f}%")
+
+
+def sekme_adet(veri: dict, con, where: Kosul, secili: dict, filtre: str):
+    """En Çok/Az Satan sekmesi"""
+    
+    rapor_indir(veri, 'adet', where, None, filtre)
+    st.markdown("---")
+    ozet_adet = get_ozet(con, where)
+    kpi_goster(ozet_adet)
+    st.markdown("---")
+    
+    # DETAY PLACEHOLDER
+    detay_adet_placeholder = st.container()
+    st.markdown("---")
+    
+    df_adet_analiz = get_urun_adet_uclar(con, where, 20)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        adet_cok1, adet_az1 = karar_goster_adet(df_adet_analiz, f"🏆 EN ÇOK SATAN 20 ÜRÜN ({DONEM['sonra'].etiket})", limit=20, en_cok=True)
+    with col2:
+        adet_cok2, adet_az2 = karar_goster_adet(df_adet_analiz, f"📉 EN AZ SATAN 20 ÜRÜN ({DONEM['sonra'].etiket})", limit=20, en_cok=False)
+    
+    # DETAYLARI ÜSTTE GÖSTER
+    with detay_adet_placeholder:
+        adet_mag_cok = adet_cok1 or adet_cok2
+        if adet_mag_cok:
+            urun_row = df_adet_analiz[df_adet_analiz['urun_kod'] == adet_mag_cok]
+            urun_ad = urun_row['urun_ad'].values[0][:30] if not urun_row.empty else adet_mag_cok
+            st.markdown(f'<div class="detay-baslik">🏆 {urun_ad}... - En Çok Satan 10 Mağaza</div>', unsafe_allow_html=True)
+            df_mag = get_magaza_adet_sirali(con, adet_mag_cok, where, limit=10, en_cok=True)
+            if not df_mag.empty:
+                for i, (idx, row) in enumerate(df_mag.iterrows()):
+                    deg_renk = "🟢" if row['adet_deg'] > 0 else "🔴" if row['adet_deg'] < 0 else "⚪"
+                    with st.expander(f"🏆 **{row['magaza_kod']}** - {row['magaza_ad']} → {row['adet_sonra']:,.0f} adet ({deg_renk} {row['adet_deg']:+.1f}%)"):
+                        st.caption(f"BS: {row['bs']}")
+                        c1, c2 = st.columns(2)
+                        with c1:
+                            st.metric(f"Adet {DONEM['once'].etiket}", f"{row['adet_once']:,.0f}")
+                            st.metric(f"Ciro {DONEM['once'].etiket}", f"₺{row['ciro_once']:,.0f}")
+                        with c2:
+                            st.metric(f"Adet {DONEM['sonra'].etiket}", f"{row['adet_sonra']:,.0f}", f"{row['adet_deg']:+.1f}%")
+                            st.metric(f"Ciro {DONEM['sonra'].etiket}", f"₺{row['ciro_sonra']:,.0f}")
+        
+        adet_mag_az = adet_az1 or adet_az2
+        if adet_mag_az:
+            urun_row = df_adet_analiz[df_adet_analiz['urun_kod'] == adet_mag_az]
+            urun_ad = urun_row['urun_ad'].values[0][:30] if not urun_row.empty else adet_mag_az
+            st.markdown(f'<div class="detay-baslik">📉 {urun_ad}... - En Az Satan 10 Mağaza</div>', unsafe_allow_html=True)
+            df_mag = get_magaza_adet_sirali(con, adet_mag_az, where, limit=10, en_cok=False)
+            if not df_mag.empty:
+                for i, (idx, row) in enumerate(df_mag.iterrows()):
+                    deg_renk = "🟢" if row['adet_deg'] > 0 else "🔴" if row['adet_deg'] < 0 else "⚪"
+                    with st.expander(f"📉 **{row['magaza_kod']}** - {row['magaza_ad']} → {row['adet_sonra']:,.0f} adet ({deg_renk} {row['adet_deg']:+.1f}%)"):
+                        st.caption(f"BS: {row['bs']}")
+                        c1, c2 = st.columns(2)
+                        with c1:
+                            st.metric(f"Adet {DONEM['once'].etiket}", f"{row['adet_once']:,.0f}")
+                            st.metric(f"Ciro {DONEM['once'].etiket}", f"₺{row['ciro_once']:,.0f}")
+                        with c2:
+                            st.metric(f"Adet {DONEM['sonra'].etiket}", f"{row['adet_sonra']:,.0f}", f"{row['adet_deg']:+.1f}%")
+                            st.metric(f"Ciro {DONEM['sonra'].etiket}", f"₺{row['ciro_sonra']:,.0f}")
+
+
+def sekme_ciro(veri: dict, con, where: Kosul, secili: dict, filtre: str):
+    """En Çok/Az Ciro sekmesi"""
+    
+    rapor_indir(veri, 'ciro', where, None, filtre)
+    st.markdown("---")
+    ozet_ciro = get_ozet(con, where)
+    kpi_goster(ozet_ciro)
+    st.markdown("---")
+    
+    # DETAY PLACEHOLDER
+    detay_ciro_placeholder = st.container()
+    st.markdown("---")
+    
+    df_ciro_analiz = get_urun_ciro_uclar(con, where, 20)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        ciro_cok1, ciro_az1 = karar_goster_ciro(df_ciro_analiz, f"🏆 EN ÇOK CİRO 20 ÜRÜN ({DONEM['sonra'].etiket})", limit=20, en_cok=True)
+    with col2:
+        ciro_cok2, ciro_az2 = karar_goster_ciro(df_ciro_analiz, f"📉 EN AZ CİRO 20 ÜRÜN ({DONEM['sonra'].etiket})", limit=20, en_cok=False)
+    
+    # DETAYLARI ÜSTTE GÖSTER
+    with detay_ciro_placeholder:
+        ciro_mag_cok = ciro_cok1 or ciro_cok2
+        if ciro_mag_cok:
+            urun_row = df_ciro_analiz[df_ciro_analiz['urun_kod'] == ciro_mag_cok]
+            urun_ad = urun_row['urun_ad'].values[0][:30] if not urun_row.empty else ciro_mag_cok
+            st.markdown(f'<div class="detay-baslik">🏆 {urun_ad}... - En Çok Ciro Yapan 10 Mağaza</div>', unsafe_allow_html=True)
+            df_mag = get_magaza_ciro_sirali(con, ciro_mag_cok, where, limit=10, en_cok=True)
+            if not df_mag.empty:
+                for i, (idx, row) in enumerate(df_mag.iterrows()):
+                    deg_renk = "🟢" if row['ciro_deg'] > 0 else "🔴" if row['ciro_deg'] < 0 else "⚪"
+                    with st.expander(f"🏆 **{row['magaza_kod']}** - {row['magaza_ad']} → ₺{row['ciro_sonra']:,.0f} ({deg_renk} {row['ciro_deg']:+.1f}%)"):
+                        st.caption(f"BS: {row['bs']}")
+                        c1, c2 = st.columns(2)
+                        with c1:
+                            st.metric(f"Ciro {DONEM['once'].etiket}", f"₺{row['ciro_once']:,.0f}")
+                            st.metric(f"Adet {DONEM['once'].etiket}", f"{row['adet_once']:,.0f}")
+                        with c2:
+                            st.metric(f"Ciro {DONEM['sonra'].etiket}", f"₺{row['ciro_sonra']:,.0f}", f"{row['ciro_deg']:+.1f}%")
+                            st.metric(f"Adet {DONEM['sonra'].etiket}", f"{row['adet_sonra']:,.0f}", f"{row['adet_deg']:+.1f}%")
+        
+        ciro_mag_az = ciro_az1 or ciro_az2
+        if ciro_mag_az:
+            urun_row = df_ciro_analiz[df_ciro_analiz['urun_kod'] == ciro_mag_az]
+            urun_ad = urun_row['urun_ad'].values[0][:30] if not urun_row.empty else ciro_mag_az
+            st.markdown(f'<div class="detay-baslik">📉 {urun_ad}... - En Az Ciro Yapan 10 Mağaza</div>', unsafe_allow_html=True)
+            df_mag = get_magaza_ciro_sirali(con, ciro_mag_az, where, limit=10, en_cok=False)
+            if not df_mag.empty:
+                for i, (idx, row) in enumerate(df_mag.iterrows()):
+                    deg_renk = "🟢" if row['ciro_deg'] > 0 else "🔴" if row['ciro_deg'] < 0 else "⚪"
+                    with st.expander(f"📉 **{row['magaza_kod']}** - {row['magaza_ad']} → ₺{row['ciro_sonra']:,.0f} ({deg_renk} {row['ciro_deg']:+.1f}%)"):
+                        st.caption(f"BS: {row['bs']}")
+                        c1, c2 = st.columns(2)
+                        with c1:
+                            st.metric(f"Ciro {DONEM['once'].etiket}", f"₺{row['ciro_once']:,.0f}")
+                            st.metric(f"Adet {DONEM['once'].etiket}", f"{row['adet_once']:,.0f}")
+                        with c2:
+                            st.metric(f"Ciro {DONEM['sonra'].etiket}", f"₺{row['ciro_sonra']:,.0f}", f"{row['ciro_deg']:+.1f}%")
+                            st.metric(f"Adet {DONEM['sonra'].etiket}", f"{row['adet_sonra']:,.0f}", f"{row['adet_deg']:+.1f}%")
+
+
+def sekme_marj(veri: dict, con, where: Kosul, secili: dict, filtre: str):
+    """Net Marj Analizi sekmesi"""
+    
+    rapor_indir(veri, 'marj', where, secili['min_ciro'], filtre)
+    st.markdown("---")
+    marj_kpi_goster(get_ozet(con, where))
+    st.markdown("---")
+    
+    # DETAY PLACEHOLDER
+    detay_marj_placeholder = st.container()
+    st.markdown("---")
+    
+    # Mal Grubu bazında marj analizi
+    st.markdown('<div class="section-title">📊 MAL GRUBU BAZINDA MARJ ANALİZİ</div>', unsafe_allow_html=True)
+    
+    df_marj_mal = get_marj_mal_grubu(con, where, secili['min_ciro'])
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        marj_mag1, marj_urun1 = marj_liste_goster(df_marj_mal, "🔴 EN ÇOK MARJ KAYBI (Mal Grubu)", limit=10, ters=False, prefix="mal_kotu")
+    with col2:
+        marj_mag2, marj_urun2 = marj_liste_goster(df_marj_mal, "🟢 EN ÇOK MARJ ARTIŞI (Mal Grubu)", limit=10, ters=True, prefix="mal_iyi")
+    
+    st.markdown("---")
+    
+    # Malzeme bazında marj analizi
+    st.markdown('<div class="section-title">📦 MALZEME BAZINDA MARJ ANALİZİ</div>', unsafe_allow_html=True)
+    
+    df_marj_urun = get_marj_malzeme(con, where, secili['min_ciro'])
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        marj_malzeme_goster(df_marj_urun, "🔴 EN ÇOK MARJ KAYBI (Malzeme)", limit=10, ters=False, prefix="urun_kotu")
+    with col2:
+        marj_malzeme_goster(df_marj_urun, "🟢 EN ÇOK MARJ ARTIŞI (Malzeme)", limit=10, ters=True, prefix="urun_iyi")
+    
+    # DETAYLARI ÜSTTE GÖSTER
+    with detay_marj_placeholder:
+        # En çok satan mağazalar
+        selected_marj_mag = marj_mag1 or marj_mag2
+        if selected_marj_mag:
+            st.markdown(f'<div class="detay-baslik">🏆 {selected_marj_mag} - En Çok Marj Yapan 10 Mağaza</div>', unsafe_allow_html=True)
+            df_mag = get_marj_magaza_by_mal_grubu(con, selected_marj_mag, where, limit=10)
+            if not df_mag.empty:
+                for i, (idx, row) in enumerate(df_mag.iterrows()):
+                    deg_renk = "🟢" if row['marj_deg'] > 0 else "🔴" if row['marj_deg'] < 0 else "⚪"
+                    with st.expander(f"🏆 **{row['magaza_kod']}** - {row['magaza_ad']} → ₺{row['marj_sonra']:,.0f} ({deg_renk} {row['marj_deg']:+.1f}%)"):
+                        st.caption(f"BS: {row['bs']}")
+                        c1, c2 = st.columns(2)
+                        with c1:
+                            st.metric(f"Marj {DONEM['once'].etiket}", f"₺{row['marj_once']:,.0f}")
+                            st.metric(f"Ciro {DONEM['once'].etiket}", f"₺{row['ciro_once']:,.0f}")
+                        with c2:
+                            st.metric(f"Marj {DONEM['sonra'].etiket}", f"₺{row['marj_sonra']:,.0f}", f"{row['marj_deg']:+.1f}%")
+                            st.metric(f"Ciro {DONEM['sonra'].etiket}", f"₺{row['ciro_sonra']:,.0f}")
+        
+        # En çok satan ürünler
+        selected_marj_urun = marj_urun1 or marj_urun2
+        if selected_marj_urun:
+            st.markdown(f'<div class="detay-baslik">📦 {selected_marj_urun} - En Çok Marj Yapan 10 Ürün</div>', unsafe_allow_html=True)
+            df_urun = get_marj_urun_by_mal_grubu(con, selected_marj_urun, where, limit=10)
+            if not df_urun.empty:
+                for i, (idx, row) in enumerate(df_urun.iterrows()):
+                    urun_ad = row['urun_ad'][:35] + "..." if len(str(row['urun_ad'])) > 35 else row['urun_ad']
+                    deg_renk = "🟢" if row['marj_deg'] > 0 else "🔴" if row['marj_deg'] < 0 else "⚪"
+                    with st.expander(f"📦 **{urun_ad}** → ₺{row['marj_sonra']:,.0f} ({deg_renk} {row['marj_deg']:+.1f}%)"):
+                        st.caption(f"Kod: {row['urun_kod']}")
+                        c1, c2 = st.columns(2)
+                        with c1:
+                            st.metric(f"Marj {DONEM['once'].etiket}", f"₺{row['marj_once']:,.0f}")
+                            st.metric(f"Adet {DONEM['once'].etiket}", f"{row['adet_once']:,.0f}")
+                        with c2:
+                            st.metric(f"Marj {DONEM['sonra'].etiket}", f"₺{row['marj_sonra']:,.0f}", f"{row['marj_deg']:+.1f}%")
+                            st.metric(f"Adet {DONEM['sonra'].etiket}", f"{row['adet_sonra']:,.0f}")
+
+
+# Sekme adı → çizim fonksiyonu. Sadece seçili sekme çalıştırılır.
+SEKMELER = {
+    "📦 Satış Analizi": sekme_satis,
+    "📂 Ürün Grubu Analizi": sekme_urun_grubu,
+    "🏷️ Ürün Analizi": sekme_urun,
+    "🔢 En Çok/Az Satan": sekme_adet,
+    "💵 En Çok/Az Ciro": sekme_ciro,
+    "💰 Net Marj Analizi": sekme_marj,
+}
+
+
 # ============================================================================
 # MAIN
 # ============================================================================
 
 def main():
     st.markdown('<h1 class="main-title">🎯 Satış Karar Sistemi</h1>', unsafe_allow_html=True)
-    st.markdown('<p class="sub-title">Kasım 2024 → 2025 | 3 dakikada teşhis, neden, aksiyon</p>', unsafe_allow_html=True)
-    
-    # Veri yükle (Parquet'ten - çok hızlı)
-    veri = veri_yukle()
+    # Veri yükle (veri sürümü değişince önbellekler kendiliğinden yenilenir)
+    veri = veri_yukle(veri_surumu())
     
     if not veri.get('loaded'):
         st.error(f"❌ Veri yüklenemedi: {veri.get('error', 'Bilinmeyen hata')}")
         st.markdown("""
         ### 📁 Parquet Dosyaları Bulunamadı
         
-        Bu uygulama `veri_2024.parquet` ve `veri_2025.parquet` dosyalarını okur.
+        Bu uygulama `veri_*.parquet` dosyalarını okur (her dönem için bir dosya, ör. `veri_2024.parquet`).
         
         **Çözüm:**
-        1. `donusturucu.py` scriptini çalıştır
-        2. Oluşan `.parquet` dosyalarını bu repo'ya yükle
-        3. Sayfayı yenile
+        1. `python donusturucu.py satis.xlsx` (veya `.csv`) ile ham dökümü çevir
+        2. Oluşan `veri_<yıl>.parquet` dosyalarını bu repo'ya yükle
+        3. (Önerilen) `python veritabani.py` ile `veri.duckdb` oluştur - açılış anında olur
+        4. Sayfayı yenile
         """)
         return
     
-    st.markdown('<div class="success-box">✅ Veri yüklendi: {:,} satır (2024: {:,} | 2025: {:,})</div>'.format(
-        veri['sayilar']['2024'] + veri['sayilar']['2025'],
-        veri['sayilar']['2024'],
-        veri['sayilar']['2025']
+    # Dönem etiketleri (veritabanı hangi dönemlerle kurulduysa)
+    DONEM['once'], DONEM['sonra'] = (donem_coz(kod) for kod in veri['donemler'])
+    st.markdown(f"<p class=\"sub-title\">{DONEM['once'].etiket} → {DONEM['sonra'].etiket} | 3 dakikada teşhis, neden, aksiyon</p>", unsafe_allow_html=True)
+    
+    st.markdown('<div class="success-box">✅ Veri yüklendi: {:,} satır ({}: {:,} | {}: {:,})</div>'.format(
+        veri['sayilar']['once'] + veri['sayilar']['sonra'],
+        DONEM['once'].etiket, veri['sayilar']['once'],
+        DONEM['sonra'].etiket, veri['sayilar']['sonra']
     ), unsafe_allow_html=True)
     
+    # Sorgu sonuç önbelleği bu veri sürümüne ait
+    ONBELLEK.surum_ayarla(veri['surum'])
+    
     # Filtreler
-    secili = sidebar_filtreler(veri['filtreler'])
-    where = build_where(secili)
+    secili = sidebar_filtreler(veri)
+    yonetim_paneli()
+    where = filtre_kosulu(secili)
     filtre = filtre_text(secili)
     
-    # DuckDB
-    con = duckdb.connect()
-    con.register('veri', veri['df'])
+    # DuckDB - paylaşılan bağlantıdan oturuma ait cursor
+    con = oturum_baglantisi(veri)
     
     # Filtre bilgisi
     st.markdown(f'<div class="filter-badge">📍 {filtre} | Min: ₺{secili["min_ciro"]:,}</div>', unsafe_allow_html=True)
     
-    # SEKMELER
-    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["📦 Satış Analizi", "📂 Ürün Grubu Analizi", "🏷️ Ürün Analizi", "🔢 En Çok/Az Satan", "💵 En Çok/Az Ciro", "💰 Net Marj Analizi"])
-    
-    # =========================================================================
-    # TAB 1: SATIŞ ANALİZİ (mevcut)
-    # =========================================================================
-    with tab1:
-        # Excel rapor
-        excel = excel_rapor(con, where, secili['min_ciro'], filtre)
-        st.download_button("📥 EXCEL RAPORU", excel, f"rapor_{pd.Timestamp.now().strftime('%Y%m%d')}.xlsx", key="excel_satis")
-        
-        st.markdown("---")
-        
-        # KPI'lar
-        ozet = get_ozet(con, where)
-        kpi_goster(ozet)
-        
-        st.markdown("---")
-        
-        # DETAY PLACEHOLDER - Üstte gösterilecek
-        detay_placeholder = st.container()
-        
-        st.markdown("---")
-        
-        # Analiz
-        df_analiz = get_mal_grubu_analiz(con, where, secili['min_ciro'])
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            selected_urun1, selected_mag_dusus1, selected_mag_artis1 = karar_goster(df_analiz, "🔴 EN KÖTÜ 10", limit=10, ters=False)
-        
-        with col2:
-            selected_urun2, selected_mag_dusus2, selected_mag_artis2 = karar_goster(df_analiz, "🟢 EN İYİ 10", limit=10, ters=True)
-        
-        # DETAYLARI ÜSTTE GÖSTER
-        with detay_placeholder:
-            # Ürün detay
-            selected_urun = selected_urun1 or selected_urun2
-            if selected_urun:
-                st.markdown(f'<div class="detay-baslik">📋 {selected_urun} - Ürün Detayları</div>', unsafe_allow_html=True)
-                df_urun = get_urun_detay(con, selected_urun, where)
-                if not df_urun.empty:
-                    st.dataframe(df_urun, use_container_width=True, hide_index=True)
-            
-            # Düşen mağazalar
-            selected_mag_dusus = selected_mag_dusus1 or selected_mag_dusus2
-            if selected_mag_dusus:
-                st.markdown(f'<div class="detay-baslik">🔴 {selected_mag_dusus} - En Çok Düşen 5 Mağaza</div>', unsafe_allow_html=True)
-                df_mag = get_magaza_dusus(con, selected_mag_dusus, where, limit=5)
-                if not df_mag.empty:
-                    for i, (idx, row) in enumerate(df_mag.iterrows()):
-                        mag_ad = row['magaza_ad']
-                        adet_fark = row['adet_fark']
-                        adet_deg = row['adet_deg']
-                        
-                        with st.expander(f"🔴 **{row['magaza_kod']}** - {mag_ad} → {adet_fark:+,.0f} adet ({adet_deg:+.1f}%)"):
-                            st.caption(f"BS: {row['bs']}")
-                            c1, c2 = st.columns(2)
-                            with c1:
-                                st.metric("Adet 2024", f"{row['adet_2024']:,.0f}")
-                                st.metric("Ciro 2024", f"₺{row['ciro_2024']:,.0f}")
-                            with c2:
-                                st.metric("Adet 2025", f"{row['adet_2025']:,.0f}", f"{adet_deg:+.1f}%")
-                                st.metric("Ciro 2025", f"₺{row['ciro_2025']:,.0f}", f"{row['ciro_deg']:+.1f}%")
-                            st.metric("Fire 2025", f"₺{row['fire_2025']:,.0f}")
-                else:
-                    st.info("Bu mal grubu için mağaza verisi bulunamadı")
-            
-            # Yükselen mağazalar
-            selected_mag_artis = selected_mag_artis1 or selected_mag_artis2
-            if selected_mag_artis:
-                st.markdown(f'<div class="detay-baslik">🟢 {selected_mag_artis} - En Çok Yükselen 5 Mağaza</div>', unsafe_allow_html=True)
-                df_mag_artis = get_magaza_artis(con, selected_mag_artis, where, limit=5)
-                if not df_mag_artis.empty:
-                    for i, (idx, row) in enumerate(df_mag_artis.iterrows()):
-                        mag_ad = row['magaza_ad']
-                        adet_fark = row['adet_fark']
-                        adet_deg = row['adet_deg']
-                        
-                        with st.expander(f"🟢 **{row['magaza_kod']}** - {mag_ad} → {adet_fark:+,.0f} adet ({adet_deg:+.1f}%)"):
-                            st.caption(f"BS: {row['bs']}")
-                            c1, c2 = st.columns(2)
-                            with c1:
-                                st.metric("Adet 2024", f"{row['adet_2024']:,.0f}")
-                                st.metric("Ciro 2024", f"₺{row['ciro_2024']:,.0f}")
-                            with c2:
-                                st.metric("Adet 2025", f"{row['adet_2025']:,.0f}", f"{adet_deg:+.1f}%")
-                                st.metric("Ciro 2025", f"₺{row['ciro_2025']:,.0f}", f"{row['ciro_deg']:+.1f}%")
-                else:
-                    st.info("Bu mal grubu için mağaza verisi bulunamadı")
-    
-    # =========================================================================
-    # TAB 2: ÜRÜN GRUBU ANALİZİ (yeni)
-    # =========================================================================
-    with tab2:
-        # Excel rapor
-        excel_ug = excel_rapor_ug(con, where, secili['min_ciro'], filtre)
-        st.download_button("📥 ÜRÜN GRUBU RAPORU", excel_ug, f"urun_grubu_{pd.Timestamp.now().strftime('%Y%m%d')}.xlsx", key="excel_ug")
-        
-        st.markdown("---")
-        
-        # KPI'lar
-        ozet_ug = get_ozet(con, where)
-        kpi_goster(ozet_ug)
-        
-        st.markdown("---")
-        
-        # DETAY PLACEHOLDER
-        detay_ug_placeholder = st.container()
-        
-        st.markdown("---")
-        
-        # Ürün Grubu Analizi
-        df_ug_analiz = get_urun_grubu_analiz(con, where, secili['min_ciro'])
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            ug_mal1, ug_dusus1, ug_artis1 = karar_goster_ug(df_ug_analiz, "🔴 EN KÖTÜ 10 ÜRÜN GRUBU", limit=10, ters=False)
-        
-        with col2:
-            ug_mal2, ug_dusus2, ug_artis2 = karar_goster_ug(df_ug_analiz, "🟢 EN İYİ 10 ÜRÜN GRUBU", limit=10, ters=True)
-        
-        # DETAYLARI ÜSTTE GÖSTER
-        with detay_ug_placeholder:
-            selected_mal = ug_mal1 or ug_mal2
-            if selected_mal:
-                st.markdown(f'<div class="detay-baslik">📂 {selected_mal} - Mal Grupları</div>', unsafe_allow_html=True)
-                df_mal = get_mal_grubu_by_urun_grubu(con, selected_mal, where)
-                if not df_mal.empty:
-                    st.dataframe(df_mal, use_container_width=True, hide_index=True)
-            
-            ug_mag_dusus = ug_dusus1 or ug_dusus2
-            if ug_mag_dusus:
-                st.markdown(f'<div class="detay-baslik">🔴 {ug_mag_dusus} - En Çok Düşen 5 Mağaza</div>', unsafe_allow_html=True)
-                df_mag = get_magaza_dusus_ug(con, ug_mag_dusus, where, limit=5)
-                if not df_mag.empty:
-                    for i, (idx, row) in enumerate(df_mag.iterrows()):
-                        with st.expander(f"🔴 **{row['magaza_kod']}** - {row['magaza_ad']} → {row['adet_fark']:+,.0f} adet ({row['adet_deg']:+.1f}%)"):
-                            st.caption(f"BS: {row['bs']}")
-                            c1, c2 = st.columns(2)
-                            with c1:
-                                st.metric("Adet 2024", f"{row['adet_2024']:,.0f}")
-                                st.metric("Ciro 2024", f"₺{row['ciro_2024']:,.0f}")
-                            with c2:
-                                st.metric("Adet 2025", f"{row['adet_2025']:,.0f}", f"{row['adet_deg']:+.1f}%")
-                                st.metric("Ciro 2025", f"₺{row['ciro_2025']:,.0f}", f"{row['ciro_deg']:+.1f}%")
-                            st.metric("Fire 2025", f"₺{row['fire_2025']:,.0f}")
-            
-            ug_mag_artis = ug_artis1 or ug_artis2
-            if ug_mag_artis:
-                st.markdown(f'<div class="detay-baslik">🟢 {ug_mag_artis} - En Çok Yükselen 5 Mağaza</div>', unsafe_allow_html=True)
-                df_mag_artis = get_magaza_artis_ug(con, ug_mag_artis, where, limit=5)
-                if not df_mag_artis.empty:
-                    for i, (idx, row) in enumerate(df_mag_artis.iterrows()):
-                        with st.expander(f"🟢 **{row['magaza_kod']}** - {row['magaza_ad']} → {row['adet_fark']:+,.0f} adet ({row['adet_deg']:+.1f}%)"):
-                            st.caption(f"BS: {row['bs']}")
-                            c1, c2 = st.columns(2)
-                            with c1:
-                                st.metric("Adet 2024", f"{row['adet_2024']:,.0f}")
-                                st.metric("Ciro 2024", f"₺{row['ciro_2024']:,.0f}")
-                            with c2:
-                                st.metric("Adet 2025", f"{row['adet_2025']:,.0f}", f"{row['adet_deg']:+.1f}%")
-                                st.metric("Ciro 2025", f"₺{row['ciro_2025']:,.0f}", f"{row['ciro_deg']:+.1f}%")
-    
-    # =========================================================================
-    # TAB 3: ÜRÜN ANALİZİ
-    # =========================================================================
-    with tab3:
-        excel_urun = excel_rapor_urun(con, where, secili['min_ciro'], filtre)
-        st.download_button("📥 ÜRÜN RAPORU", excel_urun, f"urun_{pd.Timestamp.now().strftime('%Y%m%d')}.xlsx", key="excel_urun")
-        
-        st.markdown("---")
-        ozet_urun = get_ozet(con, where)
-        kpi_goster(ozet_urun)
-        st.markdown("---")
-        
-        # DETAY PLACEHOLDER
-        detay_urun_placeholder = st.container()
-        st.markdown("---")
-        
-        df_urun_analiz = get_urun_analiz(con, where, secili['min_ciro'])
-        
-        col1, col2 = st.columns(2)
-        with col1:
-            urun_dusus1, urun_artis1 = karar_goster_urun(df_urun_analiz, "🔴 EN KÖTÜ 20 ÜRÜN", limit=20, ters=False)
-        with col2:
-            urun_dusus2, urun_artis2 = karar_goster_urun(df_urun_analiz, "🟢 EN İYİ 20 ÜRÜN", limit=20, ters=True)
-        
-        # DETAYLARI ÜSTTE GÖSTER
-        with detay_urun_placeholder:
-            urun_mag_dusus = urun_dusus1 or urun_dusus2
-            if urun_mag_dusus:
-                urun_row = df_urun_analiz[df_urun_analiz['urun_kod'] == urun_mag_dusus]
-                urun_ad = urun_row['urun_ad'].values[0] if not urun_row.empty else urun_mag_dusus
-                st.markdown(f'<div class="detay-baslik">🔴 {urun_ad[:30]}... - En Çok Düşen 5 Mağaza</div>', unsafe_allow_html=True)
-                df_mag = get_magaza_dusus_urun(con, urun_mag_dusus, where, limit=5)
-                if not df_mag.empty:
-                    for i, (idx, row) in enumerate(df_mag.iterrows()):
-                        with st.expander(f"🔴 **{row['magaza_kod']}** - {row['magaza_ad']} → {row['adet_fark']:+,.0f} adet ({row['adet_deg']:+.1f}%)"):
-                            st.caption(f"BS: {row['bs']}")
-                            c1, c2 = st.columns(2)
-                            with c1:
-                                st.metric("Adet 2024", f"{row['adet_2024']:,.0f}")
-                                st.metric("Ciro 2024", f"₺{row['ciro_2024']:,.0f}")
-                            with c2:
-                                st.metric("Adet 2025", f"{row['adet_2025']:,.0f}", f"{row['adet_deg']:+.1f}%")
-                                st.metric("Ciro 2025", f"₺{row['ciro_2025']:,.0f}", f"{row['ciro_deg']:+.1f}%")
-                            st.metric("Fire 2025", f"₺{row['fire_2025']:,.0f}")
-            
-            urun_mag_artis = urun_artis1 or urun_artis2
-            if urun_mag_artis:
-                urun_row = df_urun_analiz[df_urun_analiz['urun_kod'] == urun_mag_artis]
-                urun_ad = urun_row['urun_ad'].values[0] if not urun_row.empty else urun_mag_artis
-                st.markdown(f'<div class="detay-baslik">🟢 {urun_ad[:30]}... - En Çok Yükselen 5 Mağaza</div>', unsafe_allow_html=True)
-                df_mag_artis = get_magaza_artis_urun(con, urun_mag_artis, where, limit=5)
-                if not df_mag_artis.empty:
-                    for i, (idx, row) in enumerate(df_mag_artis.iterrows()):
-                        with st.expander(f"🟢 **{row['magaza_kod']}** - {row['magaza_ad']} → {row['adet_fark']:+,.0f} adet ({row['adet_deg']:+.1f}%)"):
-                            st.caption(f"BS: {row['bs']}")
-                            c1, c2 = st.columns(2)
-                            with c1:
-                                st.metric("Adet 2024", f"{row['adet_2024']:,.0f}")
-                                st.metric("Ciro 2024", f"₺{row['ciro_2024']:,.0f}")
-                            with c2:
-                                st.metric("Adet 2025", f"{row['adet_2025']:,.0f}", f"{row['adet_deg']:+.1f}%")
-                                st.metric("Ciro 2025", f"₺{row['ciro_2025']:,.0f}", f"{row['ciro_deg']:+.1f}%")
-    
-    # =========================================================================
-    # TAB 4: EN ÇOK / EN AZ SATAN
-    # =========================================================================
-    with tab4:
-        excel_adet = excel_rapor_adet(con, where, filtre)
-        st.download_button("📥 EN ÇOK/AZ SATAN RAPORU", excel_adet, f"en_cok_az_{pd.Timestamp.now().strftime('%Y%m%d')}.xlsx", key="excel_adet")
-        st.markdown("---")
-        ozet_adet = get_ozet(con, where)
-        kpi_goster(ozet_adet)
-        st.markdown("---")
-        
-        # DETAY PLACEHOLDER
-        detay_adet_placeholder = st.container()
-        st.markdown("---")
-        
-        df_adet_analiz = get_urun_adet_sirali(con, where, 0)
-        
-        col1, col2 = st.columns(2)
-        with col1:
-            adet_cok1, adet_az1 = karar_goster_adet(df_adet_analiz, "🏆 EN ÇOK SATAN 20 ÜRÜN (2025)", limit=20, en_cok=True)
-        with col2:
-            adet_cok2, adet_az2 = karar_goster_adet(df_adet_analiz, "📉 EN AZ SATAN 20 ÜRÜN (2025)", limit=20, en_cok=False)
-        
-        # DETAYLARI ÜSTTE GÖSTER
-        with detay_adet_placeholder:
-            adet_mag_cok = adet_cok1 or adet_cok2
-            if adet_mag_cok:
-                urun_row = df_adet_analiz[df_adet_analiz['urun_kod'] == adet_mag_cok]
-                urun_ad = urun_row['urun_ad'].values[0][:30] if not urun_row.empty else adet_mag_cok
-                st.markdown(f'<div class="detay-baslik">🏆 {urun_ad}... - En Çok Satan 10 Mağaza</div>', unsafe_allow_html=True)
-                df_mag = get_magaza_adet_sirali(con, adet_mag_cok, where)
-                if not df_mag.empty:
-                    df_mag_top = df_mag.nlargest(10, 'adet_2025')
-                    for i, (idx, row) in enumerate(df_mag_top.iterrows()):
-                        deg_renk = "🟢" if row['adet_deg'] > 0 else "🔴" if row['adet_deg'] < 0 else "⚪"
-                        with st.expander(f"🏆 **{row['magaza_kod']}** - {row['magaza_ad']} → {row['adet_2025']:,.0f} adet ({deg_renk} {row['adet_deg']:+.1f}%)"):
-                            st.caption(f"BS: {row['bs']}")
-                            c1, c2 = st.columns(2)
-                            with c1:
-                                st.metric("Adet 2024", f"{row['adet_2024']:,.0f}")
-                                st.metric("Ciro 2024", f"₺{row['ciro_2024']:,.0f}")
-                            with c2:
-                                st.metric("Adet 2025", f"{row['adet_2025']:,.0f}", f"{row['adet_deg']:+.1f}%")
-                                st.metric("Ciro 2025", f"₺{row['ciro_2025']:,.0f}")
-            
-            adet_mag_az = adet_az1 or adet_az2
-            if adet_mag_az:
-                urun_row = df_adet_analiz[df_adet_analiz['urun_kod'] == adet_mag_az]
-                urun_ad = urun_row['urun_ad'].values[0][:30] if not urun_row.empty else adet_mag_az
-                st.markdown(f'<div class="detay-baslik">📉 {urun_ad}... - En Az Satan 10 Mağaza</div>', unsafe_allow_html=True)
-                df_mag = get_magaza_adet_sirali(con, adet_mag_az, where)
-                if not df_mag.empty:
-                    df_mag_bottom = df_mag[df_mag['adet_2025'] > 0].nsmallest(10, 'adet_2025')
-                    for i, (idx, row) in enumerate(df_mag_bottom.iterrows()):
-                        deg_renk = "🟢" if row['adet_deg'] > 0 else "🔴" if row['adet_deg'] < 0 else "⚪"
-                        with st.expander(f"📉 **{row['magaza_kod']}** - {row['magaza_ad']} → {row['adet_2025']:,.0f} adet ({deg_renk} {row['adet_deg']:+.1f}%)"):
-                            st.caption(f"BS: {row['bs']}")
-                            c1, c2 = st.columns(2)
-                            with c1:
-                                st.metric("Adet 2024", f"{row['adet_2024']:,.0f}")
-                                st.metric("Ciro 2024", f"₺{row['ciro_2024']:,.0f}")
-                            with c2:
-                                st.metric("Adet 2025", f"{row['adet_2025']:,.0f}", f"{row['adet_deg']:+.1f}%")
-                                st.metric("Ciro 2025", f"₺{row['ciro_2025']:,.0f}")
-    
-    # =========================================================================
-    # TAB 5: EN ÇOK / EN AZ CİRO
-    # =========================================================================
-    with tab5:
-        excel_ciro = excel_rapor_ciro(con, where, filtre)
-        st.download_button("📥 EN ÇOK/AZ CİRO RAPORU", excel_ciro, f"en_cok_az_ciro_{pd.Timestamp.now().strftime('%Y%m%d')}.xlsx", key="excel_ciro")
-        st.markdown("---")
-        ozet_ciro = get_ozet(con, where)
-        kpi_goster(ozet_ciro)
-        st.markdown("---")
-        
-        # DETAY PLACEHOLDER
-        detay_ciro_placeholder = st.container()
-        st.markdown("---")
-        
-        df_ciro_analiz = get_urun_ciro_sirali(con, where)
-        
-        col1, col2 = st.columns(2)
-        with col1:
-            ciro_cok1, ciro_az1 = karar_goster_ciro(df_ciro_analiz, "🏆 EN ÇOK CİRO 20 ÜRÜN (2025)", limit=20, en_cok=True)
-        with col2:
-            ciro_cok2, ciro_az2 = karar_goster_ciro(df_ciro_analiz, "📉 EN AZ CİRO 20 ÜRÜN (2025)", limit=20, en_cok=False)
-        
-        # DETAYLARI ÜSTTE GÖSTER
-        with detay_ciro_placeholder:
-            ciro_mag_cok = ciro_cok1 or ciro_cok2
-            if ciro_mag_cok:
-                urun_row = df_ciro_analiz[df_ciro_analiz['urun_kod'] == ciro_mag_cok]
-                urun_ad = urun_row['urun_ad'].values[0][:30] if not urun_row.empty else ciro_mag_cok
-                st.markdown(f'<div class="detay-baslik">🏆 {urun_ad}... - En Çok Ciro Yapan 10 Mağaza</div>', unsafe_allow_html=True)
-                df_mag = get_magaza_ciro_sirali(con, ciro_mag_cok, where)
-                if not df_mag.empty:
-                    df_mag_top = df_mag.nlargest(10, 'ciro_2025')
-                    for i, (idx, row) in enumerate(df_mag_top.iterrows()):
-                        deg_renk = "🟢" if row['ciro_deg'] > 0 else "🔴" if row['ciro_deg'] < 0 else "⚪"
-                        with st.expander(f"🏆 **{row['magaza_kod']}** - {row['magaza_ad']} → ₺{row['ciro_2025']:,.0f} ({deg_renk} {row['ciro_deg']:+.1f}%)"):
-                            st.caption(f"BS: {row['bs']}")
-                            c1, c2 = st.columns(2)
-                            with c1:
-                                st.metric("Ciro 2024", f"₺{row['ciro_2024']:,.0f}")
-                                st.metric("Adet 2024", f"{row['adet_2024']:,.0f}")
-                            with c2:
-                                st.metric("Ciro 2025", f"₺{row['ciro_2025']:,.0f}", f"{row['ciro_deg']:+.1f}%")
-                                st.metric("Adet 2025", f"{row['adet_2025']:,.0f}", f"{row['adet_deg']:+.1f}%")
-            
-            ciro_mag_az = ciro_az1 or ciro_az2
-            if ciro_mag_az:
-                urun_row = df_ciro_analiz[df_ciro_analiz['urun_kod'] == ciro_mag_az]
-                urun_ad = urun_row['urun_ad'].values[0][:30] if not urun_row.empty else ciro_mag_az
-                st.markdown(f'<div class="detay-baslik">📉 {urun_ad}... - En Az Ciro Yapan 10 Mağaza</div>', unsafe_allow_html=True)
-                df_mag = get_magaza_ciro_sirali(con, ciro_mag_az, where)
-                if not df_mag.empty:
-                    df_mag_bottom = df_mag[df_mag['ciro_2025'] > 0].nsmallest(10, 'ciro_2025')
-                    for i, (idx, row) in enumerate(df_mag_bottom.iterrows()):
-                        deg_renk = "🟢" if row['ciro_deg'] > 0 else "🔴" if row['ciro_deg'] < 0 else "⚪"
-                        with st.expander(f"📉 **{row['magaza_kod']}** - {row['magaza_ad']} → ₺{row['ciro_2025']:,.0f} ({deg_renk} {row['ciro_deg']:+.1f}%)"):
-                            st.caption(f"BS: {row['bs']}")
-                            c1, c2 = st.columns(2)
-                            with c1:
-                                st.metric("Ciro 2024", f"₺{row['ciro_2024']:,.0f}")
-                                st.metric("Adet 2024", f"{row['adet_2024']:,.0f}")
-                            with c2:
-                                st.metric("Ciro 2025", f"₺{row['ciro_2025']:,.0f}", f"{row['ciro_deg']:+.1f}%")
-                                st.metric("Adet 2025", f"{row['adet_2025']:,.0f}", f"{row['adet_deg']:+.1f}%")
-    
-    # =========================================================================
-    # TAB 6: NET MARJ ANALİZİ
-    # =========================================================================
-    with tab6:
-        excel_marj = excel_rapor_marj(con, where, secili['min_ciro'], filtre)
-        st.download_button("📥 MARJ RAPORU", excel_marj, f"marj_rapor_{pd.Timestamp.now().strftime('%Y%m%d')}.xlsx", key="excel_marj")
-        st.markdown("---")
-        marj_kpi_goster(con, where)
-        st.markdown("---")
-        
-        # DETAY PLACEHOLDER
-        detay_marj_placeholder = st.container()
-        st.markdown("---")
-        
-        # Mal Grubu bazında marj analizi
-        st.markdown('<div class="section-title">📊 MAL GRUBU BAZINDA MARJ ANALİZİ</div>', unsafe_allow_html=True)
-        
-        df_marj_mal = get_marj_mal_grubu(con, where, secili['min_ciro'])
-        
-        col1, col2 = st.columns(2)
-        with col1:
-            marj_mag1, marj_urun1 = marj_liste_goster(df_marj_mal, "🔴 EN ÇOK MARJ KAYBI (Mal Grubu)", limit=10, ters=False, prefix="mal_kotu")
-        with col2:
-            marj_mag2, marj_urun2 = marj_liste_goster(df_marj_mal, "🟢 EN ÇOK MARJ ARTIŞI (Mal Grubu)", limit=10, ters=True, prefix="mal_iyi")
-        
-        st.markdown("---")
-        
-        # Malzeme bazında marj analizi
-        st.markdown('<div class="section-title">📦 MALZEME BAZINDA MARJ ANALİZİ</div>', unsafe_allow_html=True)
-        
-        df_marj_urun = get_marj_malzeme(con, where, secili['min_ciro'])
-        
-        col1, col2 = st.columns(2)
-        with col1:
-            marj_malzeme_goster(df_marj_urun, "🔴 EN ÇOK MARJ KAYBI (Malzeme)", limit=10, ters=False, prefix="urun_kotu")
-        with col2:
-            marj_malzeme_goster(df_marj_urun, "🟢 EN ÇOK MARJ ARTIŞI (Malzeme)", limit=10, ters=True, prefix="urun_iyi")
-        
-        # DETAYLARI ÜSTTE GÖSTER
-        with detay_marj_placeholder:
-            # En çok satan mağazalar
-            selected_marj_mag = marj_mag1 or marj_mag2
-            if selected_marj_mag:
-                st.markdown(f'<div class="detay-baslik">🏆 {selected_marj_mag} - En Çok Marj Yapan 10 Mağaza</div>', unsafe_allow_html=True)
-                df_mag = get_marj_magaza_by_mal_grubu(con, selected_marj_mag, where, limit=10)
-                if not df_mag.empty:
-                    for i, (idx, row) in enumerate(df_mag.iterrows()):
-                        deg_renk = "🟢" if row['marj_deg'] > 0 else "🔴" if row['marj_deg'] < 0 else "⚪"
-                        with st.expander(f"🏆 **{row['magaza_kod']}** - {row['magaza_ad']} → ₺{row['marj_2025']:,.0f} ({deg_renk} {row['marj_deg']:+.1f}%)"):
-                            st.caption(f"BS: {row['bs']}")
-                            c1, c2 = st.columns(2)
-                            with c1:
-                                st.metric("Marj 2024", f"₺{row['marj_2024']:,.0f}")
-                                st.metric("Ciro 2024", f"₺{row['ciro_2024']:,.0f}")
-                            with c2:
-                                st.metric("Marj 2025", f"₺{row['marj_2025']:,.0f}", f"{row['marj_deg']:+.1f}%")
-                                st.metric("Ciro 2025", f"₺{row['ciro_2025']:,.0f}")
-            
-            # En çok satan ürünler
-            selected_marj_urun = marj_urun1 or marj_urun2
-            if selected_marj_urun:
-                st.markdown(f'<div class="detay-baslik">📦 {selected_marj_urun} - En Çok Marj Yapan 10 Ürün</div>', unsafe_allow_html=True)
-                df_urun = get_marj_urun_by_mal_grubu(con, selected_marj_urun, where, limit=10)
-                if not df_urun.empty:
-                    for i, (idx, row) in enumerate(df_urun.iterrows()):
-                        urun_ad = row['urun_ad'][:35] + "..." if len(str(row['urun_ad'])) > 35 else row['urun_ad']
-                        deg_renk = "🟢" if row['marj_deg'] > 0 else "🔴" if row['marj_deg'] < 0 else "⚪"
-                        with st.expander(f"📦 **{urun_ad}** → ₺{row['marj_2025']:,.0f} ({deg_renk} {row['marj_deg']:+.1f}%)"):
-                            st.caption(f"Kod: {row['urun_kod']}")
-                            c1, c2 = st.columns(2)
-                            with c1:
-                                st.metric("Marj 2024", f"₺{row['marj_2024']:,.0f}")
-                                st.metric("Adet 2024", f"{row['adet_2024']:,.0f}")
-                            with c2:
-                                st.metric("Marj 2025", f"₺{row['marj_2025']:,.0f}", f"{row['marj_deg']:+.1f}%")
-                                st.metric("Adet 2025", f"{row['adet_2025']:,.0f}")
+    # SEKMELER - sadece aktif sekme hesaplanır, diğerleri açılana kadar beklemede
+    aktif_sekme = st.radio("Sekme", list(SEKMELER), horizontal=True, key="aktif_sekme", label_visibility="collapsed")
+    SEKMELER[aktif_sekme](veri, con, where, secili, filtre)
     
     # Footer
     st.markdown("---")
-    st.caption(f"📊 2024: {veri['sayilar']['2024']:,} | 2025: {veri['sayilar']['2025']:,} | ⚡ Parquet ile süper hızlı")
-    
-    con.close()
+    st.caption(f"📊 {DONEM['once'].etiket}: {veri['sayilar']['once']:,} | {DONEM['sonra'].etiket}: {veri['sayilar']['sonra']:,} | ⚡ Parquet ile süper hızlı")
 
 
 if __name__ == "__main__":
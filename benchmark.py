@@ -0,0 +1,558 @@
+"""
+⏱️ PERFORMANS ÖLÇÜMÜ
+━━━━━━━━━━━━━━━━━━━━
+Sentetik veri üzerinde uygulamanın tüm sorgularını ve raporlarını ölçer.
+
+Gerçek şemada (SM → BS → Mağaza, Ürün Grubu → Üst Mal → Mal Grubu → Ürün)
+istenen boyutta iki yıllık veri üretilir, veritabani.py ile veri.duckdb kurulur.
+Sonra her filtre senaryosu için veri_yukle, sidebar indeksi, her get_* sorgusu
+ve her excel_rapor* ölçülür: gecikme yüzdelikleri (ms) ve tepe bellek JSON'a
+yazılır. Önceki bir JSON ile karşılaştırılırsa yavaşlayan ölçümler listelenir.
+
+Her ölçümden önce sonuç önbelleği temizlenir; süreler önbelleksiz (soğuk sorgu)
+ama sıcak tampon havuzu (açık bağlantı) süreleridir.
+
+Kullanım:
+    python benchmark.py                                  # 1M satır → benchmark_veri/benchmark_1M_1000m_30000u.json
+    python benchmark.py --satir 10M --magaza 3000 --urun 60000
+    python benchmark.py --satir 50M --tekrar 3 --rapor-tekrar 1
+    python benchmark.py --satir 1M --karsilastir eski.json   # yavaşlama varsa çıkış kodu 1
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+from veritabani import VERITABANI, veritabani_olustur
+
+# ============================================================================
+# SABİTLER
+# ============================================================================
+
+VERI_KLASORU = "benchmark_veri"
+YILLAR = (2024, 2025)
+
+NITELIKLER = ['Spot', 'Grup Spot', 'Regule', 'Kasa Aktivitesi', 'Bölgesel']
+
+# Kardinalite oranları: mağaza / ürün sayısından hiyerarşi boyutları
+MAGAZA_BASINA_BS = 10      # BS başına mağaza
+BS_BASINA_SM = 10          # SM başına BS
+URUN_BASINA_MAL_GRUBU = 60 # Mal Grubu başına ürün
+MAL_GRUBU_BASINA_UST = 6   # Üst Mal başına Mal Grubu
+EN_FAZLA_URUN_GRUBU = 12
+
+MIN_CIRO = 10000           # sidebar varsayılanı
+KART_LIMITI = 10
+COKLU_MAGAZA = 40          # IN listesi sınırının üstü - liste parametresi (semi-join) yolu
+YAVASLAMA_ESIGI = 1.2      # karşılaştırmada p50 oranı bu sınırı aşarsa yavaşlama
+EN_AZ_FARK_MS = 5.0        # ... ve fark bundan büyükse (ms altı sorgularda gürültü sayılmaz)
+
+BIRIMLER = {'K': 1_000, 'M': 1_000_000, 'B': 1_000_000_000}
+
+# 64 bit hash → [0, 1)
+HASH_BOLEN = "18446744073709551616.0"
+
+
+# ============================================================================
+# SENTETİK VERİ
+# ============================================================================
+
+def sayi_coz(metin: str) -> int:
+    """'1M' / '500K' / '2000000' → satır sayısı"""
+    
+    metin = str(metin).strip().upper().replace('_', '')
+    carpan = BIRIMLER.get(metin[-1:], 1)
+    if carpan > 1:
+        metin = metin[:-1]
+    
+    try:
+        return int(float(metin) * carpan)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Geçersiz sayı: {metin}")
+
+
+def sayi_etiketi(sayi: int) -> str:
+    """2000000 → '2M'"""
+    
+    for harf, carpan in sorted(BIRIMLER.items(), key=lambda b: -b[1]):
+        if sayi >= carpan and sayi % carpan == 0:
+            return f"{sayi // carpan}{harf}"
+    
+    return str(sayi)
+
+
+def kardinaliteler(magaza: int, urun: int) -> dict:
+    """Mağaza / ürün sayısından hiyerarşi boyut sayıları"""
+    
+    bs = max(1, magaza // MAGAZA_BASINA_BS)
+    mal_grubu = max(1, urun // URUN_BASINA_MAL_GRUBU)
+    ust_mal = max(1, mal_grubu // MAL_GRUBU_BASINA_UST)
+    
+    return {
+        'magaza': magaza,
+        'bs': bs,
+        'sm': max(1, bs // BS_BASINA_SM),
+        'urun': urun,
+        'mal_grubu': mal_grubu,
+        'ust_mal': ust_mal,
+        'urun_grubu': min(EN_FAZLA_URUN_GRUBU, ust_mal),
+    }
+
+
+def rastgele(ifade: str, anahtar: str, tohum: int) -> str:
+    """ifade + anahtar'a bağlı deterministik [0, 1) sayı (SQL)"""
+    return f"(hash({ifade}, {tohum}, '{anahtar}') / {HASH_BOLEN})"
+
+
+def kod(onek: str, ifade: str, genislik: int) -> str:
+    """Sıralı kod metni: 'MG ' || 0042"""
+    return f"'{onek}' || lpad(({ifade})::VARCHAR, {genislik}, '0')"
+
+
+def uretim_sql(satir: int, k: dict, yil: int, sira: int, tohum: int) -> str:
+    """
+    Bir yılın satırları
+    Ürün popülerliği çarpıktır (az sayıda ürün satırların çoğunu alır); ikinci yılda
+    her ürünün satışı kendi eğilimiyle artar/azalır, böylece düşüş/artış listeleri dolar.
+    """
+    
+    nitelikler = ', '.join(f"'{n}'" for n in NITELIKLER)
+    egilim = f"(0.6 + 0.8 * {rastgele('u', 'egilim', tohum)})" if sira else "1.0"
+    
+    return f"""
+        WITH satirlar AS (
+            SELECT
+                i,
+                (hash(i, {tohum}, {yil}, 'm') % {k['magaza']})::BIGINT AS m,
+                LEAST({k['urun'] - 1}, floor({k['urun']} * pow({rastgele('i', f'u{yil}', tohum)}, 2)))::BIGINT AS u
+            FROM range({satir}) t(i)
+        ),
+        kodlu AS (
+            SELECT
+                i, m, u,
+                m % {k['bs']} AS b,
+                u % {k['mal_grubu']} AS mg,
+                {rastgele('u', 'fiyat', tohum)} AS r_fiyat,
+                {rastgele('u', 'marj', tohum)} AS r_marj,
+                greatest(0, round((1 + 40 * pow({rastgele('i', f'a{yil}', tohum)}, 3)) * {egilim})) AS adet
+            FROM satirlar
+        )
+        SELECT
+            {kod('SM ', f"b % {k['sm']}", 2)} AS SM,
+            {kod('BS ', 'b', 3)} AS BS,
+            {kod('M', 'm', 5)} AS Magaza_Kod,
+            'Mağaza ' || m AS Magaza_Ad,
+            [{nitelikler}][(u % {len(NITELIKLER)}) + 1] AS Nitelik,
+            {kod('UG ', f"(mg % {k['ust_mal']}) % {k['urun_grubu']}", 2)} AS Urun_Grubu,
+            {kod('UST ', f"mg % {k['ust_mal']}", 3)} AS Ust_Mal,
+            {kod('MG ', 'mg', 4)} AS Mal_Grubu,
+            {kod('U', 'u', 6)} AS Urun_Kod,
+            'Ürün ' || u AS Urun_Ad,
+            {yil} AS Yil,
+            adet::DOUBLE AS Adet,
+            adet * (5 + 200 * r_fiyat) AS Ciro,
+            adet * (5 + 200 * r_fiyat) * (-0.05 + 0.35 * r_marj) AS Marj,
+            -adet * (5 + 200 * r_fiyat) * 0.03 * {rastgele('i', f'f{yil}', tohum)} AS Fire,
+            adet * (5 + 200 * r_fiyat) * 4 * {rastgele('i', f'e{yil}', tohum)} AS Envanter,
+            CASE WHEN {rastgele('i', f'k{yil}', tohum)} < 0.1
+                 THEN -adet * (5 + 200 * r_fiyat) * 0.15 ELSE 0 END AS Kampanya_Zarar
+        FROM kodlu
+    """
+
+
+def veri_uret(klasor: str, satir: int, magaza: int, urun: int, tohum: int = 0) -> list:
+    """Yıl başına bir veri_<yıl>.parquet (toplam satir satır) - DuckDB'de akarak üretilir"""
+    
+    os.makedirs(klasor, exist_ok=True)
+    k = kardinaliteler(magaza, urun)
+    con = duckdb.connect()
+    dosyalar = []
+    
+    try:
+        for sira, yil in enumerate(YILLAR):
+            yol = os.path.join(klasor, f"veri_{yil}.parquet")
+            adet = satir // len(YILLAR) + (satir % len(YILLAR) if sira == len(YILLAR) - 1 else 0)
+            con.execute(f"""
+                COPY ({uretim_sql(adet, k, yil, sira, tohum)})
+                TO '{yol}' (FORMAT PARQUET, COMPRESSION ZSTD, ROW_GROUP_SIZE 122880)
+            """)
+            dosyalar.append(yol)
+    finally:
+        con.close()
+    
+    return dosyalar
+
+
+# ============================================================================
+# ÖLÇÜM
+# ============================================================================
+
+def tepe_rss_mb() -> float:
+    """Süreç ömrü boyunca tepe RSS (DuckDB dahil)"""
+    
+    tepe = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(tepe / 1024 / (1024 if sys.platform == 'darwin' else 1), 1)
+
+
+def olc(fonk, tekrar: int, isinma: int = 1, once=None) -> list:
+    """fonk süreleri (ms); her çalıştırmadan önce once() (önbellek temizliği)"""
+    
+    sureler = []
+    
+    for i in range(isinma + tekrar):
+        if once:
+            once()
+        baslangic = time.perf_counter()
+        fonk()
+        sure = (time.perf_counter() - baslangic) * 1000
+        if i >= isinma:
+            sureler.append(sure)
+    
+    return sureler
+
+
+def bellek_olc(fonk, once=None) -> float:
+    """
+    Tek çalıştırmada Python tarafı tepe bellek (MB)
+    pandas/numpy/openpyxl dahil; DuckDB'nin kendi ayırdığı bellek tracemalloc'a görünmez
+    """
+    
+    if once:
+        once()
+    gc.collect()
+    
+    tracemalloc.start()
+    try:
+        fonk()
+        _, tepe = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    
+    return round(tepe / 1024 / 1024, 2)
+
+
+def ozetle(sureler: list, bellek: float = None) -> dict:
+    """Süreler → yüzdelikler"""
+    
+    p50, p90, p99 = np.percentile(sureler, [50, 90, 99])
+    
+    sonuc = {
+        'n': len(sureler),
+        'min_ms': round(min(sureler), 2),
+        'p50_ms': round(float(p50), 2),
+        'p90_ms': round(float(p90), 2),
+        'p99_ms': round(float(p99), 2),
+        'max_ms': round(max(sureler), 2),
+        'ort_ms': round(float(np.mean(sureler)), 2),
+    }
+    if bellek is not None:
+        sonuc['py_tepe_mb'] = bellek
+    
+    return sonuc
+
+
+def uygulama():
+    """app modülü - streamlit oturumsuz (bare) çalışır, uyarıları susturulur"""
+    
+    import streamlit.logger
+    streamlit.logger.set_log_level('error')
+    
+    import app
+    streamlit.logger.set_log_level('error')   # içe aktarırken oluşan kayıtçılar
+    return app
+
+
+# ============================================================================
+# SENARYOLAR
+# ============================================================================
+
+def senaryolar(filtreler: dict) -> dict:
+    """Temsilî filtre birleşimleri (sidebar seçimi biçiminde)"""
+    
+    sm = filtreler['sm'][0]
+    bs = filtreler['bs_map'][sm][0]
+    magazalar = [kod for liste in filtreler['magaza_map'].values() for kod, _ in liste]
+    magaza = filtreler['magaza_map'][bs][0][0]
+    urun_grubu = filtreler['urun_grubu'][0]
+    ust_mal = filtreler['ust_mal_map'][urun_grubu][0]
+    mal_grubu = filtreler['mal_grubu_map'][ust_mal][0]
+    
+    return {
+        'tumu': {},
+        'sm': {'sm': [sm]},
+        'bs': {'sm': [sm], 'bs': [bs]},
+        'magaza': {'magaza': [magaza]},
+        'coklu_magaza': {'magaza': magazalar[:COKLU_MAGAZA]},
+        'urun_grubu': {'urun_grubu': [urun_grubu]},
+        'mal_grubu': {'mal_grubu': [mal_grubu]},
+        'karma': {'sm': filtreler['sm'][:2], 'nitelik': filtreler['nitelik'][:2],
+                  'urun_grubu': filtreler['urun_grubu'][:3]},
+    }
+
+
+def ornekler(app, con, where) -> dict:
+    """Detay sorgularının argümanları - uygulamanın kartlardan seçeceği değerler"""
+    
+    mg = app.get_mal_grubu_analiz(con, where, MIN_CIRO)
+    ug = app.get_urun_grubu_analiz(con, where, MIN_CIRO)
+    uclar = app.get_urun_adet_uclar(con, where, 1)
+    kartlar = app.kart_gruplari(mg, limit=KART_LIMITI)
+    
+    return {
+        'kartlar': kartlar,
+        'mal_grubu': kartlar[0] if kartlar else '',
+        'urun_grubu': ug['urun_grubu'].iloc[0] if not ug.empty else '',
+        'urun_kod': uclar['urun_kod'].iloc[0] if not uclar.empty else '',
+    }
+
+
+def cagrilar(app, con, where, o: dict) -> dict:
+    """get_* adı → çağrı (sekmelerdeki argümanlarla)"""
+    
+    mg, ug, urun, kartlar = o['mal_grubu'], o['urun_grubu'], o['urun_kod'], o['kartlar']
+    
+    return {
+        'get_ozet': lambda: app.get_ozet(con, where),
+        'get_mal_grubu_analiz': lambda: app.get_mal_grubu_analiz(con, where, MIN_CIRO),
+        'get_urun_detay_toplu': lambda: app.get_urun_detay_toplu(con, kartlar or (mg,), where),
+        'get_urun_detay': lambda: app.get_urun_detay(con, mg, where),
+        'get_magaza_degisim_toplu': lambda: app.get_magaza_degisim_toplu(con, kartlar or (mg,), where, 5),
+        'get_magaza_dusus': lambda: app.get_magaza_dusus(con, mg, where, limit=5, gruplar=kartlar),
+        'get_magaza_artis': lambda: app.get_magaza_artis(con, mg, where, limit=5, gruplar=kartlar),
+        'get_urun_grubu_analiz': lambda: app.get_urun_grubu_analiz(con, where, MIN_CIRO),
+        'get_mal_grubu_by_urun_grubu': lambda: app.get_mal_grubu_by_urun_grubu(con, ug, where),
+        'get_magaza_dusus_ug': lambda: app.get_magaza_dusus_ug(con, ug, where, limit=5),
+        'get_magaza_artis_ug': lambda: app.get_magaza_artis_ug(con, ug, where, limit=5),
+        'get_urun_analiz': lambda: app.get_urun_analiz(con, where, MIN_CIRO),
+        'get_magaza_dusus_urun': lambda: app.get_magaza_dusus_urun(con, urun, where, limit=5),
+        'get_magaza_artis_urun': lambda: app.get_magaza_artis_urun(con, urun, where, limit=5),
+        'get_urun_adet_uclar': lambda: app.get_urun_adet_uclar(con, where, 20),
+        'get_magaza_adet_sirali': lambda: app.get_magaza_adet_sirali(con, urun, where, 10, True),
+        'get_urun_ciro_uclar': lambda: app.get_urun_ciro_uclar(con, where, 20),
+        'get_magaza_ciro_sirali': lambda: app.get_magaza_ciro_sirali(con, urun, where, 10, True),
+        'get_marj_mal_grubu': lambda: app.get_marj_mal_grubu(con, where, MIN_CIRO),
+        'get_marj_malzeme': lambda: app.get_marj_malzeme(con, where, MIN_CIRO),
+        'get_marj_magaza_by_mal_grubu': lambda: app.get_marj_magaza_by_mal_grubu(con, mg, where, 10),
+        'get_marj_urun_by_mal_grubu': lambda: app.get_marj_urun_by_mal_grubu(con, mg, where, 10),
+    }
+
+
+def raporlar(app, con, where, filtre: str, bicim: str) -> dict:
+    """excel_rapor* adı → çağrı (rapor_uret ile aynı imza ayrımı)"""
+    
+    sonuc = {}
+    
+    for uretici, _, _ in app.RAPORLAR.values():
+        if 'min_ciro' in uretici.__code__.co_varnames[:uretici.__code__.co_argcount]:
+            sonuc[uretici.__name__] = lambda u=uretici: u(con, where, MIN_CIRO, filtre, bicim)
+        else:
+            sonuc[uretici.__name__] = lambda u=uretici: u(con, where, filtre, bicim)
+    
+    return sonuc
+
+
+# ============================================================================
+# ÇALIŞTIRMA
+# ============================================================================
+
+def calistir(klasor: str, tekrar: int, rapor_tekrar: int, isinma: int, bicim: str,
+             secilen: list = None, rapor: bool = True) -> dict:
+    """Tüm ölçümler: {fonksiyon: {senaryo: özet}} (klasor: veri.duckdb'nin bulunduğu yer)"""
+    
+    app = uygulama()
+    onceki = os.getcwd()
+    os.chdir(klasor)
+    olcumler = {}
+    
+    def kaydet(ad, senaryo, fonk, n, once):
+        sureler = olc(fonk, n, isinma, once)
+        olcumler.setdefault(ad, {})[senaryo] = ozetle(sureler, bellek_olc(fonk, once))
+    
+    try:
+        surum = app.veri_surumu()
+        
+        # Açılış: bağlantı + veri özeti (soğuk) ve sidebar ters indeksi
+        def acilis_temizle():
+            app.veri_yukle.clear()
+            app.get_db_connection.clear()
+        
+        kaydet('veri_yukle', 'acilis', lambda: app.veri_yukle(surum), tekrar, acilis_temizle)
+        
+        veri = app.veri_yukle(surum)
+        if not veri.get('loaded'):
+            raise RuntimeError(f"Veri yüklenemedi: {veri.get('error')}")
+        
+        app.DONEM['once'], app.DONEM['sonra'] = (app.donem_coz(k) for k in veri['donemler'])
+        app.ONBELLEK.surum_ayarla(veri['surum'])
+        
+        kaydet('get_boyut_indeksi', 'acilis', lambda: app.get_boyut_indeksi(surum), tekrar,
+               app.get_boyut_indeksi.clear)
+        indeks = app.get_boyut_indeksi(surum)
+        con = app.baglanti_ac(veri)
+        
+        for senaryo, secim in senaryolar(veri['filtreler']).items():
+            if secilen and senaryo not in secilen:
+                continue
+            
+            print(f"  • {senaryo}", flush=True)
+            kaydet('sidebar_secenekler', senaryo, lambda: indeks.secenekler(secim), tekrar,
+                   indeks._secenekler.cache_clear)
+            
+            where = app.filtre_kosulu(secim)
+            app.ONBELLEK.temizle()
+            ornek = ornekler(app, con, where)
+            
+            for ad, cagri in cagrilar(app, con, where, ornek).items():
+                kaydet(ad, senaryo, cagri, tekrar, app.ONBELLEK.temizle)
+            
+            if rapor:
+                for ad, cagri in raporlar(app, con, where, app.filtre_text(secim), bicim).items():
+                    kaydet(ad, senaryo, cagri, rapor_tekrar, app.ONBELLEK.temizle)
+        
+        con.close()
+    finally:
+        os.chdir(onceki)
+    
+    return olcumler
+
+
+def ortam_bilgisi() -> dict:
+    """Sonuçların karşılaştırılabilirliği için makine/kütüphane bilgisi"""
+    return {
+        'python': platform.python_version(),
+        'duckdb': duckdb.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'cpu': os.cpu_count(),
+    }
+
+
+def karsilastir(eski: dict, yeni: dict, esik: float = YAVASLAMA_ESIGI, fark: float = EN_AZ_FARK_MS) -> list:
+    """Her iki sonuçta da olan ölçümlerin p50 oranı → [(oran, fonksiyon, senaryo, eski, yeni)], büyükten küçüğe"""
+    
+    satirlar = []
+    
+    for ad, senaryolar_ in yeni['olcumler'].items():
+        for senaryo, olcum in senaryolar_.items():
+            onceki = eski.get('olcumler', {}).get(ad, {}).get(senaryo)
+            if not onceki or not onceki['p50_ms']:
+                continue
+            satirlar.append((olcum['p50_ms'] / onceki['p50_ms'], ad, senaryo, onceki['p50_ms'], olcum['p50_ms']))
+    
+    satirlar.sort(reverse=True)
+    
+    print(f"\n{'Ölçüm':<48} {'Eski p50':>10} {'Yeni p50':>10} {'Oran':>7}")
+    for oran, ad, senaryo, once, sonra in satirlar:
+        isaret = " ⚠️" if oran > esik and sonra - once > fark else ""
+        print(f"{ad + ' / ' + senaryo:<48} {once:>10.1f} {sonra:>10.1f} {oran:>6.2f}x{isaret}")
+    
+    return [s for s in satirlar if s[0] > esik and s[4] - s[3] > fark]
+
+
+def ozet_yaz(sonuc: dict):
+    """Fonksiyon başına senaryoların en yavaş p50'si"""
+    
+    print(f"\n{'Fonksiyon':<32} {'En yavaş senaryo':<16} {'p50 ms':>9} {'p99 ms':>9} {'Py MB':>8}")
+    for ad, senaryolar_ in sonuc['olcumler'].items():
+        senaryo, olcum = max(senaryolar_.items(), key=lambda s: s[1]['p50_ms'])
+        print(f"{ad:<32} {senaryo:<16} {olcum['p50_ms']:>9.1f} {olcum['p99_ms']:>9.1f} {olcum.get('py_tepe_mb', 0):>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sentetik veri üzerinde sorgu/rapor performans ölçümü")
+    parser.add_argument('--satir', type=sayi_coz, default=sayi_coz('1M'), help="Toplam satır (1M, 10M, 50M ...)")
+    parser.add_argument('--magaza', type=sayi_coz, default=1000, help="Mağaza sayısı")
+    parser.add_argument('--urun', type=sayi_coz, default=30000, help="Ürün sayısı")
+    parser.add_argument('--tohum', type=int, default=0, help="Üretim tohumu (aynı tohum = aynı veri)")
+    parser.add_argument('--klasor', help=f"Veri klasörü (varsayılan: {VERI_KLASORU}/<boyut>)")
+    parser.add_argument('--yeniden', action='store_true', help="Veri klasörde olsa da yeniden üret/kur")
+    parser.add_argument('--tekrar', type=int, default=5, help="Sorgu başına ölçüm sayısı")
+    parser.add_argument('--rapor-tekrar', type=int, default=2, help="Rapor başına ölçüm sayısı")
+    parser.add_argument('--isinma', type=int, default=1, help="Ölçülmeyen ilk çalıştırma sayısı")
+    parser.add_argument('--bicim', default='xlsx', choices=['xlsx', 'csv', 'parquet'], help="Rapor biçimi")
+    parser.add_argument('--senaryo', nargs='*', help="Sadece bu senaryolar (tumu, sm, bs, magaza, ...)")
+    parser.add_argument('--rapor-yok', action='store_true', help="Excel raporlarını ölçme")
+    parser.add_argument('-o', '--cikti', help=f"Sonuç JSON (varsayılan: {VERI_KLASORU}/benchmark_<boyut>.json)")
+    parser.add_argument('--karsilastir', help="Önceki sonuç JSON - p50 oranı eşiği aşan ölçümler listelenir")
+    parser.add_argument('--esik', type=float, default=YAVASLAMA_ESIGI, help="Yavaşlama eşiği (p50 oranı)")
+    parser.add_argument('--fark-ms', type=float, default=EN_AZ_FARK_MS, help="Yavaşlama sayılacak en az p50 farkı (ms)")
+    args = parser.parse_args()
+    
+    if min(args.tekrar, args.rapor_tekrar) < 1 or args.isinma < 0:
+        parser.error("--tekrar / --rapor-tekrar en az 1, --isinma en az 0 olmalı")
+    
+    eski = None
+    if args.karsilastir:
+        if not os.path.exists(args.karsilastir):
+            parser.error(f"{args.karsilastir} bulunamadı")
+        with open(args.karsilastir, encoding='utf-8') as f:
+            eski = json.load(f)
+    
+    etiket = f"{sayi_etiketi(args.satir)}_{args.magaza}m_{args.urun}u"
+    klasor = args.klasor or os.path.join(VERI_KLASORU, etiket)
+    cikti = args.cikti or os.path.join(VERI_KLASORU, f"benchmark_{etiket}.json")
+    veritabani = os.path.join(klasor, VERITABANI)
+    
+    kurulum = {}
+    
+    if args.yeniden or not os.path.exists(veritabani):
+        print(f"⏳ {args.satir:,} satır üretiliyor ({klasor})", flush=True)
+        baslangic = time.perf_counter()
+        dosyalar = veri_uret(klasor, args.satir, args.magaza, args.urun, args.tohum)
+        kurulum['uretim_sn'] = round(time.perf_counter() - baslangic, 2)
+        
+        print(f"⏳ {VERITABANI} kuruluyor", flush=True)
+        baslangic = time.perf_counter()
+        veritabani_olustur(dosyalar, veritabani)
+        kurulum['veritabani_sn'] = round(time.perf_counter() - baslangic, 2)
+        kurulum['rss_tepe_mb'] = tepe_rss_mb()
+    
+    print("⏳ Ölçülüyor", flush=True)
+    baslangic = time.perf_counter()
+    olcumler = calistir(klasor, args.tekrar, args.rapor_tekrar, args.isinma, args.bicim,
+                        args.senaryo, not args.rapor_yok)
+    
+    sonuc = {
+        'tarih': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'ortam': ortam_bilgisi(),
+        'veri': {
+            'satir': args.satir,
+            'tohum': args.tohum,
+            'kardinalite': kardinaliteler(args.magaza, args.urun),
+            'veritabani_mb': round(os.path.getsize(veritabani) / 1024 / 1024, 1),
+        },
+        'ayarlar': {'tekrar': args.tekrar, 'rapor_tekrar': args.rapor_tekrar,
+                    'isinma': args.isinma, 'bicim': args.bicim, 'min_ciro': MIN_CIRO},
+        'kurulum': kurulum,
+        'sure_sn': round(time.perf_counter() - baslangic, 2),
+        'rss_tepe_mb': tepe_rss_mb(),
+        'olcumler': olcumler,
+    }
+    
+    os.makedirs(os.path.dirname(cikti) or '.', exist_ok=True)
+    with open(cikti, 'w', encoding='utf-8') as f:
+        json.dump(sonuc, f, ensure_ascii=False, indent=2)
+    
+    ozet_yaz(sonuc)
+    print(f"\n✅ {cikti} yazıldı ({sonuc['sure_sn']:.1f} sn, tepe RSS {sonuc['rss_tepe_mb']:,.0f} MB)")
+    
+    if eski is not None:
+        yavaslayan = karsilastir(eski, sonuc, args.esik, args.fark_ms)
+        if yavaslayan:
+            print(f"\n⚠️ {len(yavaslayan)} ölçüm {args.esik:.2f}x üstünde yavaşladı")
+            sys.exit(1)
+        print(f"\n✅ Yavaşlama yok (eşik {args.esik:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
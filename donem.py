@@ -0,0 +1,109 @@
+"""
+📅 KARŞILAŞTIRMA DÖNEMLERİ
+━━━━━━━━━━━━━━━━━━━━━━━━━━
+Baz (önce) ve karşılaştırma (sonra) dönemi kod olarak verilir:
+
+    2024                      → Yil = 2024
+    2024-11                   → Yil = 2024 AND Ay = 11        (Ay kolonu gerekir)
+    2024-11-01:2024-11-30     → Tarih BETWEEN ... AND ...     (Tarih kolonu gerekir)
+
+Veri tablosundaki her satır Donem kolonunda 'once' / 'sonra' olarak işaretlenir,
+küpte her ölçü iki kolona açılır: <Ölçü>_Once ve <Ölçü>_Sonra.
+Sorgular dönemden bağımsızdır; dönem değişince sadece veritabanı yeniden kurulur.
+"""
+
+from datetime import date
+from typing import NamedTuple
+
+AYLAR = ['Ocak', 'Şubat', 'Mart', 'Nisan', 'Mayıs', 'Haziran',
+         'Temmuz', 'Ağustos', 'Eylül', 'Ekim', 'Kasım', 'Aralık']
+
+# Ölçü kolonu → küp kolon öneki, tutar olarak (ABS) toplanır mı
+OLCULER = [
+    ('Adet', 'Adet', False),
+    ('Ciro', 'Ciro', False),
+    ('Marj', 'Marj', False),
+    ('Fire', 'Fire', True),
+    ('Envanter', 'Envanter', True),
+    ('Kampanya_Zarar', 'Kampanya', True),
+]
+
+# Küpün anahtar kolonları (mağaza x ürün) ve ölçü kolonları
+KUP_BOYUTLARI = ['SM', 'BS', 'Magaza_Kod', 'Magaza_Ad',
+                 'Nitelik', 'Urun_Grubu', 'Ust_Mal', 'Mal_Grubu', 'Urun_Kod', 'Urun_Ad']
+KUP_OLCULERI = [f"{onek}_{ek}" for _, onek, _ in OLCULER for ek in ('Once', 'Sonra')]
+
+
+class Donem(NamedTuple):
+    """Tek karşılaştırma dönemi"""
+    
+    kod: str        # '2024', '2024-11', '2024-11-01:2024-11-30'
+    etiket: str     # ekranda görünen: '2024', 'Kasım 2024', '01.11.2024 - 30.11.2024'
+    kosul: str      # kaynak satırları seçen SQL ifadesi (sadece doğrulanmış sabitler)
+
+
+def donem_coz(kod: str) -> Donem:
+    """Dönem kodunu çöz - geçersizse ValueError"""
+    
+    kod = str(kod).strip()
+    
+    if ':' in kod:
+        bas, bit = (date.fromisoformat(p.strip()) for p in kod.split(':', 1))
+        if bit < bas:
+            raise ValueError(f"Dönem bitişi başlangıçtan önce: {kod}")
+        return Donem(
+            kod,
+            f"{bas:%d.%m.%Y} - {bit:%d.%m.%Y}",
+            f"Tarih BETWEEN DATE '{bas.isoformat()}' AND DATE '{bit.isoformat()}'",
+        )
+    
+    if '-' in kod:
+        yil, ay = (int(p) for p in kod.split('-', 1))
+        if not 1 <= ay <= 12:
+            raise ValueError(f"Geçersiz ay: {kod}")
+        return Donem(f"{yil}-{ay:02d}", f"{AYLAR[ay - 1]} {yil}", f"(Yil = {yil} AND Ay = {ay})")
+    
+    yil = int(kod)
+    return Donem(str(yil), str(yil), f"Yil = {yil}")
+
+
+def son_iki_yil(con, kaynak: str = 'kaynak') -> tuple:
+    """Dönem verilmezse kaynaktaki en son iki yıl karşılaştırılır"""
+    
+    yillar = [y for (y,) in con.execute(
+        f"SELECT DISTINCT Yil FROM {kaynak} WHERE Yil IS NOT NULL ORDER BY Yil DESC LIMIT 2"
+    ).fetchall()]
+    
+    if len(yillar) < 2:
+        raise ValueError(f"Karşılaştırma için en az iki yıl gerekli, bulunan: {yillar}")
+    
+    return donem_coz(yillar[1]), donem_coz(yillar[0])
+
+
+def donem_sql(once: Donem, sonra: Donem) -> str:
+    """Satırın düştüğü dönem rolü: 'once' / 'sonra' / NULL (dönem dışı)"""
+    return f"CASE WHEN {once.kosul} THEN 'once' WHEN {sonra.kosul} THEN 'sonra' END"
+
+
+def kup_sql(kaynak: str = 'veri') -> str:
+    """
+    Mağaza x Ürün küpü: her ölçü Donem kolonuna göre iki kolona açılır
+    (<Ölçü>_Once / <Ölçü>_Sonra). Sorgular satır bazlı veri yerine
+    bu çok daha küçük tabloyu tarar.
+    """
+    
+    kolonlar = []
+    for olcu, onek, mutlak in OLCULER:
+        ifade = f"ABS({olcu})" if mutlak else olcu
+        kolonlar.append(f"SUM(CASE WHEN Donem = 'once' THEN {ifade} ELSE 0 END) as {onek}_Once")
+        kolonlar.append(f"SUM(CASE WHEN Donem = 'sonra' THEN {ifade} ELSE 0 END) as {onek}_Sonra")
+    
+    satirlar = ',\n            '.join(kolonlar)
+    
+    return f"""
+        SELECT
+            {', '.join(KUP_BOYUTLARI)},
+            {satirlar}
+        FROM {kaynak}
+        GROUP BY ALL
+    """
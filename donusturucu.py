@@ -0,0 +1,331 @@
+"""
+🔄 DÖNÜŞTÜRÜCÜ
+━━━━━━━━━━━━━━
+Ham Excel/CSV satış dökümlerini uygulamanın okuduğu parquet dosyalarına çevirir.
+Dosyalar parça parça okunur - çok GB'lık döküm belleğe tamamen yüklenmez.
+
+Başlıklar uygulama şemasına eşlenir (Satış Müdürü → SM, Satış Miktarı → Adet ...),
+kolonlar tiplenir, satırlar sık filtrelenen kolonlara göre sıralanıp her yıl için
+bir dosyaya yazılır (veri_2024.parquet, veri_2025.parquet, ...). Satır grubu
+istatistikleri (min/max) sayesinde DuckDB filtreye uymayan grupları hiç okumaz.
+
+Kullanım:
+    python donusturucu.py satis_2025.xlsx
+    python donusturucu.py dokum_*.csv --ayrac ";" --ondalik ","
+    python donusturucu.py satis.csv --yil 2025 --esleme basliklar.json
+    python donusturucu.py satis.xlsx --bellek 2GB -o veri/
+"""
+
+import argparse
+import json
+import os
+import re
+import tempfile
+import time
+from datetime import date, datetime
+
+import duckdb
+import pyarrow as pa
+import pyarrow.parquet as pq
+from openpyxl import load_workbook
+
+from veritabani import BOYUTLAR, KUP_SIRASI, NUMERIK_KOLONLAR, sql_metin
+
+# ============================================================================
+# SABİTLER
+# ============================================================================
+
+EXCEL_PARCA = 100_000           # Excel'den bir seferde okunan satır
+SATIR_GRUBU = 122_880           # parquet satır grubu (DuckDB vektör boyutunun katı)
+
+# Dosya içi sıralama: veritabanıyla aynı kümeleme (mal grubu → SM → BS → mağaza), satır grubu atlama
+DOSYA_SIRASI = KUP_SIRASI
+
+# Şema kolonu → ham başlık karşılıkları (kolon_anahtari ile sadeleştirilmiş)
+ESLEME = {
+    'SM': ['sm', 'satis_muduru', 'bolge_muduru'],
+    'BS': ['bs', 'bolge_sorumlusu'],
+    'Magaza_Kod': ['magaza_kod', 'magaza_kodu', 'magaza_no', 'magaza'],
+    'Magaza_Ad': ['magaza_ad', 'magaza_adi'],
+    'Nitelik': ['nitelik', 'urun_niteligi'],
+    'Urun_Grubu': ['urun_grubu'],
+    'Ust_Mal': ['ust_mal', 'ust_mal_grubu'],
+    'Mal_Grubu': ['mal_grubu'],
+    'Urun_Kod': ['urun_kod', 'urun_kodu', 'malzeme', 'malzeme_kodu'],
+    'Urun_Ad': ['urun_ad', 'urun_adi', 'malzeme_adi', 'malzeme_tanimi'],
+    'Yil': ['yil'],
+    'Ay': ['ay'],
+    'Tarih': ['tarih'],
+    'Adet': ['adet', 'satis_miktari', 'miktar'],
+    'Ciro': ['ciro', 'satis_tutari', 'net_satis'],
+    'Marj': ['marj', 'brut_marj'],
+    'Fire': ['fire', 'fire_tutari'],
+    'Envanter': ['envanter', 'envanter_farki'],
+    'Kampanya_Zarar': ['kampanya_zarar', 'kampanya_zarari'],
+}
+
+TURKCE = str.maketrans('çğıöşüÇĞİÖŞÜ', 'cgiosuCGIOSU')
+
+
+# ============================================================================
+# BAŞLIK EŞLEME
+# ============================================================================
+
+def kolon_anahtari(ad) -> str:
+    """'Satış Müdürü' → 'satis_muduru'"""
+    return re.sub(r'[^a-z0-9]+', '_', str(ad).translate(TURKCE).lower()).strip('_')
+
+
+def basliklari_esle(basliklar: list, ek_esleme: dict = None) -> dict:
+    """
+    Ham başlık → şema kolonu
+    ek_esleme: {'Ham Başlık': 'SM'} - varsayılan karşılıklardan önce bakılır
+    """
+    
+    karsilik = {kolon_anahtari(k): v for k, v in (ek_esleme or {}).items()}
+    for hedef, adlar in ESLEME.items():
+        for ad in adlar:
+            karsilik.setdefault(ad, hedef)
+    
+    sonuc = {}
+    for baslik in basliklar:
+        hedef = karsilik.get(kolon_anahtari(baslik))
+        if hedef and hedef not in sonuc.values():
+            sonuc[baslik] = hedef
+    
+    return sonuc
+
+
+# ============================================================================
+# KAYNAK OKUMA
+# ============================================================================
+
+def hucre_metni(deger):
+    """Excel hücresi → metin (1234.0 → '1234', tarih → ISO)"""
+    
+    if deger is None:
+        return None
+    if isinstance(deger, float) and deger.is_integer():
+        return str(int(deger))
+    if isinstance(deger, (datetime, date)):
+        return deger.isoformat()[:10]
+    
+    return str(deger)
+
+
+def excel_ara_yaz(dosya: str, klasor: str) -> list:
+    """
+    Excel sayfalarını satır satır okuyup metin kolonlu ara parquet'e yaz
+    Her sayfa bir dosya; bellekte en fazla EXCEL_PARCA satır tutulur.
+    """
+    
+    kitap = load_workbook(dosya, read_only=True, data_only=True)
+    yazilanlar = []
+    
+    try:
+        for sayfa_no, sayfa in enumerate(kitap.worksheets):
+            satirlar = sayfa.iter_rows(values_only=True)
+            basliklar = next(satirlar, None)
+            if not basliklar:
+                continue
+            
+            basliklar = [str(b) if b is not None else f"kolon_{i}" for i, b in enumerate(basliklar)]
+            sema = pa.schema([(b, pa.string()) for b in basliklar])
+            hedef = os.path.join(klasor, f"{os.path.basename(dosya)}.{sayfa_no}.parquet")
+            
+            with pq.ParquetWriter(hedef, sema) as yazici:
+                parca = []
+                for satir in satirlar:
+                    parca.append(satir)
+                    if len(parca) >= EXCEL_PARCA:
+                        yazici.write_table(excel_parcasi(parca, sema))
+                        parca = []
+                if parca:
+                    yazici.write_table(excel_parcasi(parca, sema))
+            
+            yazilanlar.append(hedef)
+    finally:
+        kitap.close()
+    
+    return yazilanlar
+
+
+def excel_parcasi(satirlar: list, sema: pa.Schema) -> pa.Table:
+    """Satır listesi → metin kolonlu arrow tablosu"""
+    
+    kolonlar = [[] for _ in sema.names]
+    for satir in satirlar:
+        for i, kolon in enumerate(kolonlar):
+            kolon.append(hucre_metni(satir[i]) if i < len(satir) else None)
+    
+    return pa.table(kolonlar, schema=sema)
+
+
+def kaynak_sql(dosya: str, ayrac: str = None) -> str:
+    """Ham dosyayı metin kolonlarla okuyan DuckDB ifadesi"""
+    
+    if dosya.endswith('.parquet'):
+        return f"read_parquet({sql_metin(dosya)})"
+    
+    secenekler = "header = true, all_varchar = true"
+    if ayrac:
+        secenekler += f", delim = {sql_metin(ayrac)}"
+    
+    return f"read_csv({sql_metin(dosya)}, {secenekler})"
+
+
+# ============================================================================
+# NORMALLEŞTİRME
+# ============================================================================
+
+def sayi_sql(kolon: str, ondalik: str) -> str:
+    """Metin → DOUBLE ('1.234,56' biçimi için ondalik=',')"""
+    
+    ifade = f"TRIM({kolon})"
+    if ondalik == ',':
+        ifade = f"REPLACE(REPLACE({ifade}, '.', ''), ',', '.')"
+    
+    return f"TRY_CAST({ifade} AS DOUBLE)"
+
+
+def normal_sql(kaynak: str, basliklar: list, ek_esleme: dict = None, ondalik: str = '.', yil: int = None) -> str:
+    """
+    Ham kaynak → uygulama şeması (boyutlar VARCHAR, Yil SMALLINT, ölçüler DOUBLE)
+    Eksik boyut veya yıl bilgisi hata; eksik ölçü 0 kabul edilir.
+    """
+    
+    esleme = {hedef: f'"{ham}"' for ham, hedef in basliklari_esle(basliklar, ek_esleme).items()}
+    
+    eksik = [k for k in BOYUTLAR if k not in esleme]
+    if eksik:
+        raise ValueError(f"Eşlenemeyen kolonlar: {', '.join(eksik)} (başlıklar: {', '.join(basliklar)})")
+    
+    # Boş boyut '' olarak kalır (uygulama filtreleri boş değeri böyle ayıklar)
+    kolonlar = [f"COALESCE(TRIM({esleme[k]}), '') AS {k}" for k in BOYUTLAR]
+    
+    tarih = None
+    if 'Tarih' in esleme:
+        tarih = f"COALESCE(TRY_CAST({esleme['Tarih']} AS DATE), TRY_STRPTIME({esleme['Tarih']}, '%d.%m.%Y')::DATE)"
+    
+    if yil is not None:
+        kolonlar.append(f"CAST({int(yil)} AS SMALLINT) AS Yil")
+    elif 'Yil' in esleme:
+        kolonlar.append(f"TRY_CAST(TRIM({esleme['Yil']}) AS SMALLINT) AS Yil")
+    elif tarih:
+        kolonlar.append(f"CAST(year({tarih}) AS SMALLINT) AS Yil")
+    else:
+        raise ValueError("Yıl bilgisi yok: Yil/Tarih kolonu veya --yil gerekli")
+    
+    if 'Ay' in esleme:
+        kolonlar.append(f"TRY_CAST(TRIM({esleme['Ay']}) AS TINYINT) AS Ay")
+    elif tarih:
+        kolonlar.append(f"CAST(month({tarih}) AS TINYINT) AS Ay")
+    
+    if tarih:
+        kolonlar.append(f"{tarih} AS Tarih")
+    
+    for k in NUMERIK_KOLONLAR:
+        kolonlar.append(f"{sayi_sql(esleme[k], ondalik)} AS {k}" if k in esleme else f"CAST(0 AS DOUBLE) AS {k}")
+    
+    return f"SELECT {', '.join(kolonlar)} FROM {kaynak}"
+
+
+# ============================================================================
+# DÖNÜŞTÜRME
+# ============================================================================
+
+def donustur(dosyalar: list, cikti: str = '.', ayrac: str = None, ondalik: str = '.',
+             yil: int = None, ek_esleme: dict = None, bellek: str = None) -> dict:
+    """
+    Ham dosyalar → yıl başına sıralı parquet (veri_<yil>.parquet)
+    Sıralama DuckDB'nin disk taşmalı sıralamasıyla yapılır; bellek sınırı aşılmaz.
+    Dönüş: {yıl: satır sayısı}
+    """
+    
+    os.makedirs(cikti, exist_ok=True)
+    
+    with tempfile.TemporaryDirectory(dir=cikti, prefix=".donusturucu_") as gecici:
+        con = duckdb.connect()
+        
+        try:
+            con.execute(f"SET temp_directory = {sql_metin(gecici)}")
+            if bellek:
+                con.execute(f"SET memory_limit = {sql_metin(bellek)}")
+            
+            secimler = []
+            for dosya in dosyalar:
+                if dosya.lower().endswith(('.xlsx', '.xlsm')):
+                    # Excel sayıları zaten '.' ondalıklı metne çevrildi
+                    kaynaklar = [(kaynak_sql(ara), '.') for ara in excel_ara_yaz(dosya, gecici)]
+                else:
+                    kaynaklar = [(kaynak_sql(dosya, ayrac), ondalik)]
+                
+                for kaynak, kaynak_ondalik in kaynaklar:
+                    basliklar = [k for (k, *_) in con.execute(f"DESCRIBE SELECT * FROM {kaynak}").fetchall()]
+                    secimler.append(normal_sql(kaynak, basliklar, ek_esleme, kaynak_ondalik, yil))
+            
+            # Ham dosyalar tek geçişte okunur; yıllara bölme bu ara dosyadan yapılır
+            hazir = os.path.join(gecici, "hazir.parquet")
+            con.execute(f"""
+                COPY ({' UNION ALL BY NAME '.join(f'({s})' for s in secimler)})
+                TO {sql_metin(hazir)} (FORMAT PARQUET)
+            """)
+            
+            sayilar = {}
+            for (y,) in con.execute(f"SELECT DISTINCT Yil FROM {sql_metin(hazir)} WHERE Yil IS NOT NULL ORDER BY 1").fetchall():
+                hedef = os.path.join(cikti, f"veri_{y}.parquet")
+                
+                con.execute(f"""
+                    COPY (
+                        SELECT * FROM {sql_metin(hazir)} WHERE Yil = {int(y)}
+                        ORDER BY {', '.join(DOSYA_SIRASI)}
+                    ) TO {sql_metin(hedef + '.tmp')} (FORMAT PARQUET, COMPRESSION ZSTD, ROW_GROUP_SIZE {SATIR_GRUBU})
+                """)
+                os.replace(hedef + ".tmp", hedef)
+                
+                sayilar[y] = pq.ParquetFile(hedef).metadata.num_rows
+            
+            sayilar['atlanan'] = con.execute(f"SELECT COUNT(*) FROM {sql_metin(hazir)} WHERE Yil IS NULL").fetchone()[0]
+        finally:
+            con.close()
+    
+    return sayilar
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Excel/CSV satış dökümlerini veri_<yıl>.parquet dosyalarına çevir")
+    parser.add_argument('dosyalar', nargs='+', help="Ham .xlsx / .csv dosyaları")
+    parser.add_argument('-o', '--cikti', default='.', help="Parquet dosyalarının yazılacağı klasör")
+    parser.add_argument('--ayrac', help="CSV ayıracı (varsayılan: otomatik)")
+    parser.add_argument('--ondalik', default='.', choices=['.', ','], help="CSV ondalık işareti")
+    parser.add_argument('--yil', type=int, help="Dosyada yıl kolonu yoksa tüm satırların yılı")
+    parser.add_argument('--esleme', help="Ek başlık eşlemesi (JSON): {\"Ham Başlık\": \"SM\"}")
+    parser.add_argument('--bellek', help="DuckDB bellek sınırı (örn. 2GB); aşan kısım diske taşar")
+    args = parser.parse_args()
+    
+    ek_esleme = None
+    if args.esleme:
+        with open(args.esleme, encoding='utf-8') as f:
+            ek_esleme = json.load(f)
+    
+    baslangic = time.time()
+    
+    try:
+        sayilar = donustur(args.dosyalar, args.cikti, args.ayrac, args.ondalik, args.yil, ek_esleme, args.bellek)
+    except ValueError as e:
+        parser.error(str(e))
+    
+    atlanan = sayilar.pop('atlanan')
+    for y, sayi in sayilar.items():
+        print(f"✅ {os.path.join(args.cikti, f'veri_{y}.parquet')}: {sayi:,} satır")
+    if atlanan:
+        print(f"⚠️ Yılı okunamayan {atlanan:,} satır atlandı")
+    print(f"({time.time() - baslangic:.1f} sn)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+🧭 BOYUT İNDEKSİ
+━━━━━━━━━━━━━━━━
+Sidebar filtreleri için ters indeks: her filtre kutusu, diğer tüm aktif
+filtreler altında hâlâ satırı olan değerleri gösterir (boş sorgu seçilemez).
+
+Kaynak, filtre boyutlarının satırı olan tekil birleşimleridir (boyut_indeksi
+tablosu). Her boyut değeri → birleşim satır numaraları (posting listesi);
+seçim en kısa listeden başlanarak daraltılır. Değer kodları sıralı atandığı
+için sonuç listeleri her etkileşimde yeniden sıralanmaz.
+"""
+
+from functools import lru_cache
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+from sorgu import FILTRE_KOLONLARI
+
+# ============================================================================
+# SABİTLER
+# ============================================================================
+
+INDEKS_SQL = f"SELECT DISTINCT {', '.join(FILTRE_KOLONLARI.values())} FROM {{tablo}}"
+
+SECIM_ONBELLEK = 4096   # son seçim birleşimlerinin sonuçları
+
+
+# ============================================================================
+# İNDEKS
+# ============================================================================
+
+class BoyutIndeksi:
+    """Filtre boyutları üzerinde ters indeks"""
+    
+    def __init__(self, sutunlar: dict):
+        """sutunlar: filtre anahtarı → birleşim başına değer dizisi"""
+        
+        self.degerler = {}     # anahtar → sıralı değerler (kod = sıra)
+        self.kodlar = {}       # anahtar → birleşim başına kod
+        self.postalar = {}     # anahtar → (sıralı satır no'ları, kod sınırları)
+        
+        for anahtar, dizi in sutunlar.items():
+            kodlar, degerler = pd.factorize(pd.Series(dizi).astype(str), sort=True)
+            degerler = np.asarray(degerler, dtype=object)
+            sira = np.argsort(kodlar, kind='stable')
+            sinirlar = np.searchsorted(kodlar[sira], np.arange(len(degerler) + 1))
+            
+            self.degerler[anahtar] = degerler
+            self.kodlar[anahtar] = kodlar.astype(np.int32)
+            self.postalar[anahtar] = (sira, sinirlar)
+        
+        self.kod_sozlugu = {a: {d: i for i, d in enumerate(v)} for a, v in self.degerler.items()}
+        self.satir = len(next(iter(self.kodlar.values()), ()))
+        self._secenekler = lru_cache(maxsize=SECIM_ONBELLEK)(self._hesapla)
+    
+    @classmethod
+    def olustur(cls, con) -> "BoyutIndeksi":
+        """Hazır boyut_indeksi tablosundan, yoksa küpten"""
+        
+        try:
+            sonuc = con.execute(INDEKS_SQL.format(tablo='boyut_indeksi')).fetchnumpy()
+        except duckdb.CatalogException:
+            sonuc = con.execute(INDEKS_SQL.format(tablo='veri_kup')).fetchnumpy()
+        
+        return cls({anahtar: sonuc[kolon] for anahtar, kolon in FILTRE_KOLONLARI.items()})
+    
+    def _satirlar(self, anahtar: str, kodlar: tuple) -> np.ndarray:
+        """Değer(ler)in geçtiği birleşim satırları"""
+        
+        sira, sinirlar = self.postalar[anahtar]
+        return np.concatenate([sira[sinirlar[k]:sinirlar[k + 1]] for k in kodlar])
+    
+    def _hesapla(self, secim: tuple) -> dict:
+        """secim: ((anahtar, (kod, ...)), ...) - her boyut kendi filtresi hariç daraltılır"""
+        
+        sonuc = {}
+        
+        for anahtar in self.degerler:
+            diger = [(a, k) for a, k in secim if a != anahtar]
+            
+            if not diger:
+                kodlar = np.arange(len(self.degerler[anahtar]))
+            else:
+                # En seçici filtrenin satırlarından başla, diğerlerini kod karşılaştırmasıyla ele
+                diger.sort(key=lambda s: sum(self.postalar[s[0]][1][k + 1] - self.postalar[s[0]][1][k] for k in s[1]))
+                satirlar = self._satirlar(*diger[0])
+                for a, k in diger[1:]:
+                    satirlar = satirlar[np.isin(self.kodlar[a][satirlar], k)]
+                kodlar = np.unique(self.kodlar[anahtar][satirlar])
+            
+            sonuc[anahtar] = [d for d in self.degerler[anahtar][kodlar].tolist() if d != '']
+        
+        return sonuc
+    
+    def secenekler(self, secim: dict) -> dict:
+        """
+        secim: filtre anahtarı → seçili değer(ler) ('Tümü'/boş = filtre yok)
+        Dönüş: filtre anahtarı → diğer seçimlerle uyumlu, sıralı değerler
+        """
+        
+        anahtar = []
+        for a in self.degerler:
+            degerler = secim.get(a)
+            if not degerler or degerler == 'Tümü':
+                continue
+            if isinstance(degerler, str):
+                degerler = (degerler,)
+            
+            kodlar = tuple(sorted(self.kod_sozlugu[a][d] for d in degerler if d in self.kod_sozlugu[a]))
+            anahtar.append((a, kodlar or (-1,)))
+        
+        return self._secenekler(tuple(anahtar))
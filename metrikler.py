@@ -0,0 +1,47 @@
+"""
+📐 TÜRETİLMİŞ METRİKLER
+━━━━━━━━━━━━━━━━━━━━━━━
+Değişim % ve marj oranı hesapları - satır satır döngü yerine kolon aritmetiği.
+Fonksiyonlar hem Series/dizi hem de tek sayı (skaler) ile çalışır.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def degisim(sonra, once, bos: float = 0):
+    """((sonra / once) - 1) * 100 - önceki dönem 0 veya altındaysa `bos`"""
+    
+    sonra = np.asarray(sonra, dtype=float)
+    once = np.asarray(once, dtype=float)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(once > 0, (sonra / once - 1) * 100, bos)
+
+
+def oran(pay, payda):
+    """(pay / payda) * 100 - payda 0 veya altındaysa 0"""
+    
+    pay = np.asarray(pay, dtype=float)
+    payda = np.asarray(payda, dtype=float)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(payda > 0, pay / payda * 100, 0)
+
+
+def degisim_ekle(df: pd.DataFrame, *metrikler: str, bos: float = 0) -> pd.DataFrame:
+    """Her metrik için {m}_once/{m}_sonra kolonlarından {m}_deg kolonu ekle"""
+    
+    for m in metrikler:
+        df[f'{m}_deg'] = degisim(df[f'{m}_sonra'], df[f'{m}_once'], bos)
+    
+    return df
+
+
+def marj_oran_ekle(df: pd.DataFrame) -> pd.DataFrame:
+    """marj_oran_once / marj_oran_sonra kolonlarını ekle (marj / ciro * 100)"""
+    
+    df['marj_oran_once'] = oran(df['marj_once'], df['ciro_once'])
+    df['marj_oran_sonra'] = oran(df['marj_sonra'], df['ciro_sonra'])
+    
+    return df
@@ -0,0 +1,139 @@
+"""
+🧠 SONUÇ ÖNBELLEĞİ
+━━━━━━━━━━━━━━━━━━
+Tüm oturumların paylaştığı, süreç genelinde sorgu sonucu önbelleği.
+Anahtar: (veri sürümü, fonksiyon, argümanlar - filtre koşulu dahil)
+Bellek boyutuna göre LRU ile boşaltılır, veri sürümü değişince temizlenir.
+
+Streamlit app.py'yi her etkileşimde yeniden çalıştırır; önbellek bu ayrı
+modülde yaşadığı için yeniden çalıştırmalar arasında korunur.
+"""
+
+import inspect
+import sys
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+import pandas as pd
+
+# ============================================================================
+# SABİTLER
+# ============================================================================
+
+SONUC_ONBELLEK_MB = 256
+
+
+# ============================================================================
+# ÖNBELLEK
+# ============================================================================
+
+def boyut_hesapla(deger) -> int:
+    """Sonucun yaklaşık bellek boyutu (bayt)"""
+    
+    if isinstance(deger, pd.DataFrame):
+        return int(deger.memory_usage(index=True, deep=True).sum())
+    
+    if isinstance(deger, dict):
+        return sys.getsizeof(deger) + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in deger.items())
+    
+    return sys.getsizeof(deger)
+
+
+def kopya(deger):
+    """Çağıran sonucu değiştirse de önbellekteki kayıt bozulmasın"""
+    return deger.copy() if isinstance(deger, (pd.DataFrame, dict)) else deger
+
+
+class SonucOnbellegi:
+    """Boyut sınırlı, iş parçacığı güvenli LRU önbellek"""
+    
+    def __init__(self, azami_bayt: int):
+        self.azami_bayt = azami_bayt
+        self.kayitlar = OrderedDict()   # anahtar → (değer, boyut)
+        self.boyut = 0
+        self.isabet = 0
+        self.iska = 0
+        self.surum = None
+        self.kilit = threading.Lock()
+    
+    def surum_ayarla(self, surum: str):
+        """Veri sürümü değişince eski sonuçları at"""
+        
+        with self.kilit:
+            if surum != self.surum:
+                self.kayitlar.clear()
+                self.boyut = 0
+                self.surum = surum
+    
+    def getir(self, anahtar, hesapla):
+        """Önbellekte varsa döndür, yoksa hesapla ve sakla"""
+        
+        with self.kilit:
+            kayit = self.kayitlar.get(anahtar)
+            if kayit is not None:
+                self.kayitlar.move_to_end(anahtar)
+                self.isabet += 1
+                return kopya(kayit[0])
+            self.iska += 1
+        
+        # Sorgu kilit dışında çalışır; aynı anda gelen iki ıska ikisi de hesaplar
+        deger = hesapla()
+        boyut = boyut_hesapla(deger)
+        
+        with self.kilit:
+            if boyut <= self.azami_bayt and anahtar not in self.kayitlar:
+                self.kayitlar[anahtar] = (deger, boyut)
+                self.boyut += boyut
+                
+                while self.boyut > self.azami_bayt:
+                    _, (_, eski_boyut) = self.kayitlar.popitem(last=False)
+                    self.boyut -= eski_boyut
+        
+        return kopya(deger)
+    
+    def temizle(self):
+        """Tüm kayıtları ve sayaçları sıfırla"""
+        
+        with self.kilit:
+            self.kayitlar.clear()
+            self.boyut = 0
+            self.isabet = 0
+            self.iska = 0
+    
+    def istatistik(self) -> dict:
+        """Yönetim paneli için sayaçlar"""
+        
+        with self.kilit:
+            toplam = self.isabet + self.iska
+            return {
+                'isabet': self.isabet,
+                'iska': self.iska,
+                'oran': self.isabet / toplam * 100 if toplam else 0,
+                'kayit': len(self.kayitlar),
+                'boyut_mb': self.boyut / 1024 / 1024,
+                'azami_mb': self.azami_bayt / 1024 / 1024,
+                'surum': self.surum,
+            }
+
+
+ONBELLEK = SonucOnbellegi(SONUC_ONBELLEK_MB * 1024 * 1024)
+
+
+def onbellekli(fonk):
+    """
+    get_* fonksiyonları için dekoratör
+    İlk argüman (con) anahtara girmez; varsayılan değerler anahtara açılır.
+    """
+    
+    imza = inspect.signature(fonk)
+    
+    @wraps(fonk)
+    def sarmal(con, *args, **kwargs):
+        baglanmis = imza.bind(con, *args, **kwargs)
+        baglanmis.apply_defaults()
+        
+        anahtar = (ONBELLEK.surum, fonk.__name__, tuple(baglanmis.arguments.values())[1:])
+        return ONBELLEK.getir(anahtar, lambda: fonk(con, *args, **kwargs))
+    
+    return sarmal
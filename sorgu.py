@@ -0,0 +1,556 @@
+"""
+🔎 SORGU KATMANI
+━━━━━━━━━━━━━━━━
+Filtre değerleri SQL metnine gömülmez, `?` parametresi olarak bağlanır.
+Böylece aynı sorgu şekli her filtre değeri için aynı metni üretir
+(tırnak/kesme işareti içeren isimler de sorunsuz çalışır).
+
+Sorgular SABLONLAR içinde isimle tutulur; {where} ve {having} yerlerine
+sadece `?` içeren koşul metni gelir, değerler ayrı bağlanır.
+
+Şablonlar `FROM veri_kup` yazar; küpün ön toplamları (kup_* tabloları) varsa
+sorgunun kullandığı boyutları taşıyan en küçüğü seçilir (bkz. Yonlendirici).
+
+Mağaza/ürün kırılımları (ilk N düşen, en çok satan ...) KIRILIMLAR içinde
+tanımlıdır; ilk N SQL'de seçilir (LIMIT veya QUALIFY), Python'a sadece
+gösterilecek satırlar gelir.
+"""
+
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+from donem import KUP_BOYUTLARI
+
+# ============================================================================
+# KOŞULLAR
+# ============================================================================
+
+# Filtre anahtarı → küp kolonu
+FILTRE_KOLONLARI = {
+    'sm': 'SM',
+    'bs': 'BS',
+    'magaza': 'Magaza_Kod',
+    'nitelik': 'Nitelik',
+    'urun_grubu': 'Urun_Grubu',
+    'ust_mal': 'Ust_Mal',
+    'mal_grubu': 'Mal_Grubu',
+}
+
+# Bu sayıya kadar çoklu seçim IN (?, ?, ...) listesi olur; fazlası tek bir liste
+# parametresiyle yarı-birleştirmeye (semi-join) döner - sorgu metni sabit kalır
+IN_LISTE_SINIRI = 32
+
+
+class Kosul(NamedTuple):
+    """AND ile bağlanan ifadeler + sıralı parametreleri (hashlenebilir)"""
+    
+    ifadeler: tuple = ()
+    parametreler: tuple = ()
+    
+    def ekle(self, ifade: str, *parametreler) -> "Kosul":
+        """Yeni ifade eklenmiş kopya"""
+        return Kosul(self.ifadeler + (ifade,), self.parametreler + parametreler)
+    
+    def metin(self, anahtar: str = "WHERE") -> str:
+        """'WHERE a = ? AND b = ?' - ifade yoksa boş"""
+        return f"{anahtar} " + " AND ".join(self.ifadeler) if self.ifadeler else ""
+
+
+BOS = Kosul()
+
+
+def secim_listesi(deger) -> tuple:
+    """Filtre değeri → sıralı seçili değerler ('Tümü' / boş → filtre yok)"""
+    
+    if not deger or deger == 'Tümü':
+        return ()
+    if isinstance(deger, str):
+        return (deger,)
+    
+    return tuple(sorted(set(deger)))
+
+
+def enum_tipi(kolon: str) -> str:
+    """veri.duckdb'de boyut kolonunun ENUM tipi: Mal_Grubu → e_mal_grubu"""
+    return f"e_{kolon.lower()}"
+
+
+def yer_tutucu(kolon: str, ifade: str = "?") -> str:
+    """
+    Bağlanan değer kolon ENUM ise kolonun tipine çevrilir: karşılaştırma kodlar üzerinde
+    yapılır ve satır grubu min/max'ı (zone map) eşleşmeyen grupları atlatır.
+    VARCHAR'la karşılaştırmada kolon metne çevrildiği için hiçbir grup atlanmaz.
+    Tipte olmayan değer NULL olur (hata yerine boş sonuç).
+    """
+    
+    tip = YONLENDIRICI.tipler.get(kolon)
+    return f"TRY_CAST({ifade} AS {tip})" if tip else ifade
+
+
+def secim_kosulu(kosul: Kosul, kolon: str, degerler: tuple) -> Kosul:
+    """Tek değer '=', az değer IN listesi, çok değer bağlı listeyle semi-join"""
+    
+    if not degerler:
+        return kosul
+    if len(degerler) == 1:
+        return kosul.ekle(f"{kolon} = {yer_tutucu(kolon)}", degerler[0])
+    if len(degerler) <= IN_LISTE_SINIRI:
+        return kosul.ekle(f"{kolon} IN ({', '.join([yer_tutucu(kolon)] * len(degerler))})", *degerler)
+    
+    return kosul.ekle(f"{kolon} IN (SELECT {yer_tutucu(kolon, 'unnest(?::VARCHAR[])')})", degerler)
+
+
+def filtre_kosulu(f: dict) -> Kosul:
+    """Filtre (tek değer veya değer listesi) → parametreli WHERE koşulu"""
+    
+    kosul = BOS
+    
+    for anahtar, kolon in FILTRE_KOLONLARI.items():
+        kosul = secim_kosulu(kosul, kolon, secim_listesi(f.get(anahtar)))
+    
+    return kosul
+
+
+# Mağaza kırılımlarında sık kullanılan HAVING koşulları
+GECEN_YIL_SATIS = BOS.ekle("SUM(Adet_Once) > 0")
+HERHANGI_SATIS = BOS.ekle("(SUM(Adet_Once) > 0 OR SUM(Adet_Sonra) > 0)")
+
+
+def esik(ifade: str, deger: float) -> Kosul:
+    """Sıfırdan büyük eşik varsa 'ifade >= ?' koşulu (HAVING için)"""
+    return BOS.ekle(f"{ifade} >= ?", deger) if deger > 0 else BOS
+
+
+# ============================================================================
+# ŞABLONLAR
+# ============================================================================
+
+SABLONLAR = {
+    # Başlık KPI'ları - tüm sekmeler için tek tarama
+    'ozet': """
+        SELECT
+            SUM(Adet_Once) as adet_once,
+            SUM(Adet_Sonra) as adet_sonra,
+            SUM(Ciro_Once) as ciro_once,
+            SUM(Ciro_Sonra) as ciro_sonra,
+            SUM(Marj_Once) as marj_once,
+            SUM(Marj_Sonra) as marj_sonra,
+            SUM(Fire_Once) as fire_once,
+            SUM(Fire_Sonra) as fire_sonra,
+            SUM(Envanter_Once) as envanter_once,
+            SUM(Envanter_Sonra) as envanter_sonra,
+            SUM(Kampanya_Once) as kampanya_once,
+            SUM(Kampanya_Sonra) as kampanya_sonra
+        FROM veri_kup
+        {where}
+    """,
+    
+    'mal_grubu_analiz': """
+        SELECT
+            Mal_Grubu,
+            MAX(Ust_Mal) as Ust_Mal,
+            SUM(Adet_Once) as Adet_Once,
+            SUM(Adet_Sonra) as Adet_Sonra,
+            SUM(Ciro_Once) as Ciro_Once,
+            SUM(Ciro_Sonra) as Ciro_Sonra,
+            SUM(Marj_Once) as Marj_Once,
+            SUM(Marj_Sonra) as Marj_Sonra,
+            SUM(Fire_Once) as Fire_Once,
+            SUM(Fire_Sonra) as Fire_Sonra
+        FROM veri_kup
+        {where}
+        GROUP BY Mal_Grubu
+        {having}
+    """,
+    
+    'urun_detay': """
+        SELECT
+            Urun_Kod,
+            MAX(Urun_Ad) as Urun_Ad,
+            SUM(Adet_Once) as Adet_Once,
+            SUM(Adet_Sonra) as Adet_Sonra,
+            SUM(Ciro_Once) as Ciro_Once,
+            SUM(Ciro_Sonra) as Ciro_Sonra,
+            SUM(Fire_Sonra) as Fire_Sonra
+        FROM veri_kup
+        {where}
+        GROUP BY Urun_Kod
+        ORDER BY Adet_Sonra DESC, Urun_Kod::VARCHAR
+    """,
+    
+    'urun_grubu_analiz': """
+        SELECT
+            Urun_Grubu,
+            SUM(Adet_Once) as Adet_Once,
+            SUM(Adet_Sonra) as Adet_Sonra,
+            SUM(Ciro_Once) as Ciro_Once,
+            SUM(Ciro_Sonra) as Ciro_Sonra,
+            SUM(Marj_Once) as Marj_Once,
+            SUM(Marj_Sonra) as Marj_Sonra,
+            SUM(Fire_Once) as Fire_Once,
+            SUM(Fire_Sonra) as Fire_Sonra
+        FROM veri_kup
+        {where}
+        GROUP BY Urun_Grubu
+        {having}
+    """,
+    
+    'mal_grubu_detay': """
+        SELECT
+            Mal_Grubu,
+            MAX(Ust_Mal) as Ust_Mal,
+            SUM(Adet_Once) as Adet_Once,
+            SUM(Adet_Sonra) as Adet_Sonra,
+            SUM(Ciro_Once) as Ciro_Once,
+            SUM(Ciro_Sonra) as Ciro_Sonra,
+            SUM(Fire_Sonra) as Fire_Sonra
+        FROM veri_kup
+        {where}
+        GROUP BY Mal_Grubu
+        ORDER BY Adet_Sonra DESC
+    """,
+    
+    # Görünen kartların ürünleri - mal grubu başına tek sorguda
+    'urun_detay_toplu': """
+        SELECT
+            Mal_Grubu,
+            Urun_Kod,
+            MAX(Urun_Ad) as Urun_Ad,
+            SUM(Adet_Once) as Adet_Once,
+            SUM(Adet_Sonra) as Adet_Sonra,
+            SUM(Ciro_Once) as Ciro_Once,
+            SUM(Ciro_Sonra) as Ciro_Sonra,
+            SUM(Fire_Sonra) as Fire_Sonra
+        FROM veri_kup
+        {where}
+        GROUP BY Mal_Grubu, Urun_Kod
+        ORDER BY Mal_Grubu, Adet_Sonra DESC, Urun_Kod::VARCHAR
+    """,
+    
+    'urun_analiz': """
+        SELECT
+            Urun_Kod,
+            MAX(Urun_Ad) as Urun_Ad,
+            MAX(Mal_Grubu) as Mal_Grubu,
+            MAX(Ust_Mal) as Ust_Mal,
+            MAX(Urun_Grubu) as Urun_Grubu,
+            SUM(Adet_Once) as Adet_Once,
+            SUM(Adet_Sonra) as Adet_Sonra,
+            SUM(Ciro_Once) as Ciro_Once,
+            SUM(Ciro_Sonra) as Ciro_Sonra,
+            SUM(Marj_Once) as Marj_Once,
+            SUM(Marj_Sonra) as Marj_Sonra,
+            SUM(Fire_Once) as Fire_Once,
+            SUM(Fire_Sonra) as Fire_Sonra
+        FROM veri_kup
+        {where}
+        GROUP BY Urun_Kod
+        {having}
+    """,
+    
+    # Adet / ciro sıralamaları için ürün listesi
+    'urun_sirali': """
+        SELECT
+            Urun_Kod,
+            MAX(Urun_Ad) as Urun_Ad,
+            MAX(Mal_Grubu) as Mal_Grubu,
+            MAX(Urun_Grubu) as Urun_Grubu,
+            SUM(Adet_Once) as Adet_Once,
+            SUM(Adet_Sonra) as Adet_Sonra,
+            SUM(Ciro_Once) as Ciro_Once,
+            SUM(Ciro_Sonra) as Ciro_Sonra,
+            SUM(Marj_Once) as Marj_Once,
+            SUM(Marj_Sonra) as Marj_Sonra
+        FROM veri_kup
+        {where}
+        GROUP BY Urun_Kod
+        {having}
+    """,
+    
+    'marj_mal_grubu': """
+        SELECT
+            Mal_Grubu,
+            MAX(Ust_Mal) as Ust_Mal,
+            SUM(Marj_Once) as Marj_Once,
+            SUM(Marj_Sonra) as Marj_Sonra,
+            SUM(Ciro_Once) as Ciro_Once,
+            SUM(Ciro_Sonra) as Ciro_Sonra,
+            SUM(Adet_Once) as Adet_Once,
+            SUM(Adet_Sonra) as Adet_Sonra,
+            SUM(Fire_Once) as Fire_Once,
+            SUM(Fire_Sonra) as Fire_Sonra,
+            SUM(Envanter_Once) as Envanter_Once,
+            SUM(Envanter_Sonra) as Envanter_Sonra,
+            SUM(Kampanya_Once) as Kampanya_Once,
+            SUM(Kampanya_Sonra) as Kampanya_Sonra
+        FROM veri_kup
+        {where}
+        GROUP BY Mal_Grubu
+        {having}
+    """,
+    
+    'marj_malzeme': """
+        SELECT
+            Urun_Kod,
+            MAX(Urun_Ad) as Urun_Ad,
+            MAX(Mal_Grubu) as Mal_Grubu,
+            SUM(Marj_Once) as Marj_Once,
+            SUM(Marj_Sonra) as Marj_Sonra,
+            SUM(Ciro_Once) as Ciro_Once,
+            SUM(Ciro_Sonra) as Ciro_Sonra,
+            SUM(Adet_Once) as Adet_Once,
+            SUM(Adet_Sonra) as Adet_Sonra,
+            SUM(Fire_Once) as Fire_Once,
+            SUM(Fire_Sonra) as Fire_Sonra,
+            SUM(Envanter_Once) as Envanter_Once,
+            SUM(Envanter_Sonra) as Envanter_Sonra,
+            SUM(Kampanya_Once) as Kampanya_Once,
+            SUM(Kampanya_Sonra) as Kampanya_Sonra
+        FROM veri_kup
+        {where}
+        GROUP BY Urun_Kod
+        {having}
+    """,
+}
+
+
+# ============================================================================
+# KIRILIMLAR
+# ============================================================================
+
+# Kırılım çocuğu → (anahtar kolon, satırla birlikte taşınan ad kolonları)
+COCUKLAR = {
+    'magaza': ('Magaza_Kod', ('Magaza_Ad', 'BS')),
+    'urun': ('Urun_Kod', ('Urun_Ad',)),
+}
+
+
+def ciftler(*metrikler: str) -> tuple:
+    """('Adet', 'Ciro') → ('Adet_Once', 'Adet_Sonra', 'Ciro_Once', 'Ciro_Sonra')"""
+    return tuple(f"{m}_{rol}" for m in metrikler for rol in ('Once', 'Sonra'))
+
+
+class Sira(NamedTuple):
+    """Kırılım sıralaması - ifade ve koşul toplanmış kolon adlarıyla yazılır"""
+    
+    ad: str               # toplu sonuçta sıra kolonu: {ad}_Sira
+    ifade: str
+    artan: bool = False
+    kosul: str = ''       # sadece bu koşulu sağlayan satırlar sıralanır
+
+
+class Kirilim(NamedTuple):
+    """Ebeveyn boyut altında çocuk boyutun (mağaza/ürün) ilk N satırı"""
+    
+    cocuk: str            # COCUKLAR anahtarı
+    olculer: tuple        # SUM alınan kolonlar
+    siralar: tuple        # Sira, ... - birden fazlaysa her sıranın ilk N'i birlikte döner
+    farklar: tuple = ()   # metrik → {m}_Fark = {m}_Sonra - {m}_Once
+    having: Kosul = BOS   # parametresiz HAVING
+    ekler: tuple = ()     # çocuğun ad kolonlarına ek taşınan kolonlar
+
+
+DEGISIM_OLCULERI = ciftler('Adet', 'Ciro') + ('Fire_Sonra',)
+DUSUS = Sira('Dusus', 'Adet_Fark', artan=True)
+ARTIS = Sira('Artis', 'Adet_Fark')
+
+
+def sirali(olcu: str, en_cok: bool) -> Kirilim:
+    """En çok / en az (satışı olanlar arasında) satan mağazalar"""
+    kosul = '' if en_cok else f"{olcu}_Sonra > 0"
+    return Kirilim('magaza', ciftler('Adet', 'Ciro'), (Sira(olcu, f"{olcu}_Sonra", not en_cok, kosul),))
+
+
+def marj_kirilimi(cocuk: str) -> Kirilim:
+    """Marj yapanlar arasında en yüksek marjlı mağaza/ürünler"""
+    return Kirilim(cocuk, ciftler('Marj', 'Ciro', 'Adet'), (Sira('Marj', 'Marj_Sonra'),), ('Marj',),
+                   BOS.ekle("SUM(Marj_Sonra) > 0"))
+
+
+KIRILIMLAR = {
+    # Düşüş geçen yıl satışı olan, artış herhangi dönemde satışı olan mağazalar arasında
+    'magaza_dusus': Kirilim('magaza', DEGISIM_OLCULERI, (DUSUS,), ('Adet',), GECEN_YIL_SATIS),
+    'magaza_artis': Kirilim('magaza', DEGISIM_OLCULERI, (ARTIS,), ('Adet',), HERHANGI_SATIS),
+    
+    # Mal grubu kartları: iki yön tek sorguda (marj dahil)
+    'magaza_degisim_marj': Kirilim(
+        'magaza', ciftler('Adet', 'Ciro', 'Marj') + ('Fire_Sonra',),
+        (DUSUS._replace(kosul="Adet_Once > 0"), ARTIS), ('Adet',), HERHANGI_SATIS,
+    ),
+    
+    'magaza_adet_cok': sirali('Adet', en_cok=True),
+    'magaza_adet_az': sirali('Adet', en_cok=False),
+    'magaza_ciro_cok': sirali('Ciro', en_cok=True),
+    'magaza_ciro_az': sirali('Ciro', en_cok=False),
+    
+    'magaza_marj': marj_kirilimi('magaza'),
+    'urun_marj': marj_kirilimi('urun'),
+    
+    # Sıralama sekmeleri (ebeveynsiz): en çok ve en az satan ürünler tek sorguda
+    'urun_adet_uclar': Kirilim(
+        'urun', ciftler('Adet', 'Ciro', 'Marj'),
+        (Sira('Cok', 'Adet_Sonra'), Sira('Az', 'Adet_Sonra', artan=True, kosul="Adet_Sonra > 0")),
+        ekler=('Mal_Grubu', 'Urun_Grubu'),
+    ),
+    'urun_ciro_uclar': Kirilim(
+        'urun', ciftler('Adet', 'Ciro', 'Marj'),
+        (Sira('Cok', 'Ciro_Sonra'), Sira('Az', 'Ciro_Sonra', artan=True)),
+        having=BOS.ekle("SUM(Ciro_Sonra) > 0"), ekler=('Mal_Grubu', 'Urun_Grubu'),
+    ),
+}
+
+
+# ============================================================================
+# ÖN TOPLAM YÖNLENDİRME
+# ============================================================================
+
+KATMAN_ONEKI = 'kup_'   # ön toplam tabloları: kup_sm, kup_bs, ... (veritabani.KATMANLAR)
+BOYUT_DESENI = re.compile(r"\b(" + "|".join(KUP_BOYUTLARI) + r")\b")
+
+
+class Yonlendirici:
+    """Bağlantıdaki ön toplam tabloları, taşıdıkları boyutlar ve boyut kolonlarının ENUM tipleri"""
+    
+    def __init__(self):
+        self.katmanlar = ()   # ((tablo, boyut kümesi), ...) - küçükten büyüğe
+        self.tipler = {}      # kolon → ENUM tipi (parquet/bellek modunda boş: kolonlar VARCHAR)
+    
+    def ayarla(self, con):
+        """Katmanları ve tipleri katalogdan oku (veri sürümü başına bir kez; yoksa her şey veri_kup'a gider)"""
+        
+        tablolar = con.execute(f"""
+            SELECT t.table_name, list(c.column_name)
+            FROM duckdb_tables() t
+            JOIN duckdb_columns() c USING (database_name, schema_name, table_name)
+            WHERE t.database_name = current_database() AND t.table_name LIKE '{KATMAN_ONEKI}%'
+            GROUP BY t.table_name, t.estimated_size
+            ORDER BY t.estimated_size
+        """).fetchall()
+        
+        self.katmanlar = tuple((tablo, frozenset(kolonlar) & set(KUP_BOYUTLARI)) for tablo, kolonlar in tablolar)
+        
+        kolonlar, tipler = con.execute("""
+            SELECT
+                (SELECT list(column_name) FROM duckdb_columns()
+                 WHERE database_name = current_database() AND table_name = 'veri_kup' AND data_type LIKE 'ENUM(%'),
+                (SELECT list(type_name) FROM duckdb_types()
+                 WHERE database_name = current_database() AND logical_type = 'ENUM')
+        """).fetchone()
+        
+        self.tipler = {k: enum_tipi(k) for k in kolonlar or () if enum_tipi(k) in (tipler or ())}
+
+
+YONLENDIRICI = Yonlendirici()
+
+
+def katman_sec(sql: str, katmanlar: tuple) -> str:
+    """SQL'in değindiği tüm boyutları taşıyan en küçük tablo (hiçbiri yetmezse veri_kup)"""
+    
+    gereken = set(BOYUT_DESENI.findall(sql))
+    return next((tablo for tablo, boyutlar in katmanlar if gereken <= boyutlar), 'veri_kup')
+
+
+def yonlendir(sql: str, katmanlar: tuple) -> str:
+    """FROM veri_kup → seçilen ön toplam"""
+    return sql.replace("FROM veri_kup", f"FROM {katman_sec(sql, katmanlar)}")
+
+
+# ============================================================================
+# ÇALIŞTIRMA
+# ============================================================================
+
+@lru_cache(maxsize=512)
+def sorgu_metni(ad: str, where_ifadeler: tuple = (), having_ifadeler: tuple = (), katmanlar: tuple = ()) -> str:
+    """Şablon + koşul şekli → SQL metni (değerlerden bağımsız, bir kez üretilir)"""
+    
+    sql = SABLONLAR[ad].format(
+        where=Kosul(where_ifadeler).metin("WHERE"),
+        having=Kosul(having_ifadeler).metin("HAVING"),
+    )
+    return yonlendir(sql, katmanlar)
+
+
+def calistir(con, ad: str, where: Kosul = BOS, having: Kosul = BOS):
+    """İsimli şablonu bağlı parametrelerle çalıştır (fetchdf/fetchone çağırana kalır)"""
+    
+    sql = sorgu_metni(ad, where.ifadeler, having.ifadeler, YONLENDIRICI.katmanlar)
+    return con.execute(sql, where.parametreler + having.parametreler)
+
+
+def sira_anahtari(kolon: str) -> str:
+    """
+    Boyut kolonuyla sıralama ifadesi - ENUM'lar alfabetik kurulduğu için metin sırası aynıdır;
+    büyük ENUM'a (on binlerce ürün kodu) göre sıralama satır sayısından bağımsız onlarca ms sürer
+    """
+    return f"{kolon}::VARCHAR"
+
+
+def sira_ifadesi(sira: "Sira", anahtar: str) -> str:
+    """ORDER BY metni - eşitlikte çocuk anahtarı sırayı sabitler"""
+    return f"{sira.ifade} {'ASC' if sira.artan else 'DESC'}, {sira_anahtari(anahtar)}"
+
+
+@lru_cache(maxsize=256)
+def kirilim_metni(ad: str, ebeveyn: str, toplu: bool, where_ifadeler: tuple = (), katmanlar: tuple = ()) -> str:
+    """
+    Kırılım + ebeveyn kolonu + koşul şekli → SQL metni
+    Tek sıra, tek ebeveyn değeri: ORDER BY ... LIMIT ?
+    Toplu: ebeveyn kolonu da döner, her sıra {ad}_Sira kolonu olur ve
+    QUALIFY her ebeveyn için her sıranın ilk N satırını bırakır.
+    Ebeveyn boşsa ('') sıralar tüm filtrelenmiş veri üzerinden verilir.
+    """
+    
+    k = KIRILIMLAR[ad]
+    anahtar, adlar = COCUKLAR[k.cocuk]
+    ebeveynler = [ebeveyn] if ebeveyn else []
+    gruplar = (ebeveynler if toplu else []) + [anahtar]
+    kolonlar = (
+        gruplar
+        + [f"MAX({a}) as {a}" for a in adlar + k.ekler]
+        + [f"SUM({o}) as {o}" for o in k.olculer]
+        + [f"SUM({m}_Sonra) - SUM({m}_Once) as {m}_Fark" for m in k.farklar]
+    )
+    ic = f"""
+        SELECT {', '.join(kolonlar)}
+        FROM veri_kup
+        {Kosul(where_ifadeler).metin("WHERE")}
+        GROUP BY {', '.join(gruplar)}
+        {k.having.metin("HAVING")}
+    """
+    ic = yonlendir(ic, katmanlar)
+    
+    if not toplu:
+        sira = k.siralar[0]
+        kosul = f"WHERE {sira.kosul}" if sira.kosul else ""
+        return f"SELECT * FROM ({ic}) {kosul} ORDER BY {sira_ifadesi(sira, anahtar)} LIMIT ?"
+    
+    pencereler = []
+    for sira in k.siralar:
+        bolum = ebeveynler + ([sira.kosul] if sira.kosul else [])
+        bolum = f"PARTITION BY {', '.join(bolum)} " if bolum else ""
+        pencere = f"ROW_NUMBER() OVER ({bolum}ORDER BY {sira_ifadesi(sira, anahtar)})"
+        if sira.kosul:
+            pencere = f"CASE WHEN {sira.kosul} THEN {pencere} END"
+        pencereler.append(f"{pencere} as {sira.ad}_Sira")
+    
+    return f"""
+        SELECT *, {', '.join(pencereler)}
+        FROM ({ic})
+        QUALIFY {' OR '.join(f'{sira.ad}_Sira <= ?' for sira in k.siralar)}
+        ORDER BY {', '.join([sira_anahtari(e) for e in ebeveynler] + [f'{k.siralar[0].ad}_Sira'])}
+    """
+
+
+def kirilim(con, ad: str, ebeveyn: str, degerler: tuple, where: Kosul = BOS, limit: int = 5):
+    """
+    İsimli kırılımı çalıştır: ebeveyn kolonu değer(ler)i altında ilk `limit` çocuk
+    Birden fazla değer veya sıra varsa sonuç topludur (bkz. kirilim_metni).
+    """
+    
+    k = KIRILIMLAR[ad]
+    toplu = len(degerler) > 1 or len(k.siralar) > 1
+    where = secim_kosulu(where, ebeveyn, degerler)
+    
+    sql = kirilim_metni(ad, ebeveyn, toplu, where.ifadeler, YONLENDIRICI.katmanlar)
+    return con.execute(sql, where.parametreler + (limit,) * (len(k.siralar) if toplu else 1))
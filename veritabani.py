@@ -0,0 +1,838 @@
+"""
+🗄️ VERİ TABANI OLUŞTURUCU
+━━━━━━━━━━━━━━━━━━━━━━━━
+Parquet dosyalarından kalıcı DuckDB dosyası (veri.duckdb) üretir.
+Uygulama açılışta bu dosyayı salt-okunur bağlar - pandas'a hiç yüklemez.
+
+Sadece seçilen iki dönemin satırları okunur (dönem kodları için donem.py).
+Dönem verilmezse kaynaktaki en son iki yıl karşılaştırılır.
+
+Kaynak olarak düz dosyalar (veri_2024.parquet, ...) ya da Yil/SM klasörlerine
+bölünmüş (hive) veri seti kullanılabilir. veri/ klasörü varsa o okunur.
+
+Kullanım:
+    python veritabani.py                               # veri/ veya veri_*.parquet → veri.duckdb
+    python veritabani.py --once 2024-11 --sonra 2025-11
+    python veritabani.py a.parquet b.parquet -o veri.duckdb
+    python veritabani.py --bolumlu-yaz                 # veri_*.parquet → veri/Yil=.../SM=.../*.parquet
+    python veritabani.py --ekle veri_2025_12.parquet   # yeni ayı ekle (tam kurulum yok)
+    python veritabani.py --atlama                      # filtre başına atlanan satır grubu raporu
+"""
+
+import argparse
+import glob
+import json
+import os
+import shutil
+import time
+
+import duckdb
+
+from donem import KUP_BOYUTLARI, KUP_OLCULERI, donem_coz, donem_sql, kup_sql, son_iki_yil
+from indeks import INDEKS_SQL
+from sorgu import KATMAN_ONEKI, enum_tipi
+
+# ============================================================================
+# SABİTLER
+# ============================================================================
+
+VERITABANI = "veri.duckdb"
+KAYNAKLAR = ["veri_*.parquet"]
+
+# Bölümlü (hive) veri seti: klasör adları filtre gibi çalışır, eşleşmeyen dosyalar hiç açılmaz
+BOLUMLU_KLASOR = "veri"
+BOLUMLER = ['Yil', 'SM']
+BOLUM_BILGISI = "_bilgi.json"   # bölümlü klasörün sürüm dosyası (parquet okuyucu görmez)
+
+# Filtre/boyut kolonları - ENUM (sözlük kodlu) olarak saklanır
+BOYUTLAR = ['SM', 'BS', 'Magaza_Kod', 'Magaza_Ad', 'Nitelik',
+            'Urun_Grubu', 'Ust_Mal', 'Mal_Grubu', 'Urun_Kod', 'Urun_Ad']
+
+NUMERIK_KOLONLAR = ['Adet', 'Ciro', 'Marj', 'Fire', 'Envanter', 'Kampanya_Zarar']
+
+# Satırlar sık filtrelenen kolonlara göre kümeli (sıralı) yazılır: önce Mal Grubu, sonra
+# organizasyon. Tek Mal Grubu bitişik birkaç satır grubunda durur; mağaza satırları her mal
+# grubu içinde SM → BS sırasıyla öbeklenir. Satır grubu min/max'ı (zone map) filtreyle
+# eşleşmeyen grupları okumadan atlatır (bkz. --atlama raporu). Ürün Grubu / Üst Mal öne
+# konmaz: ENUM kodları alfabetik olduğundan araya giren mal grubu kodları dağılır, min/max
+# aralığı tüm grupları kapsar. Ürünsüz mağaza görünümleri zaten SM → BS → Mağaza sıralı
+# kup_magaza* ön toplamlarına gider.
+VERI_SIRASI = ['Donem', 'Mal_Grubu', 'SM', 'BS', 'Magaza_Kod', 'Urun_Kod']
+KUP_SIRASI = ['Mal_Grubu', 'SM', 'BS', 'Magaza_Kod', 'Urun_Kod']
+
+# veri.duckdb satır grubu: DuckDB varsayılanı (122.880) tek mal grubunu/mağazayı birkaç
+# grupta toplamak için kaba kalır; küçük grup daha çok atlama, fazla küçüğü tam taramayı yavaşlatır
+SATIR_GRUBU = 32_768
+
+# --atlama raporunda zone map etkinliği ölçülen tablolar ve kolonlar
+ATLAMA_TABLOLARI = ['veri_kup', f'{KATMAN_ONEKI}magaza', 'veri']
+ATLAMA_KOLONLARI = ['Urun_Grubu', 'Mal_Grubu', 'SM', 'BS', 'Magaza_Kod', 'Urun_Kod']
+
+KUP_SQL = kup_sql()
+
+# Ön toplamlar (rollup): küpün ürün/mağaza kırılımı olmayan kaba seviyeleri.
+# Sorgu katmanı, sorgunun kullandığı boyutları taşıyan en küçük tabloyu seçer (sorgu.Yonlendirici).
+KATMANLAR = {
+    f'{KATMAN_ONEKI}sm': ['SM', 'Nitelik', 'Urun_Grubu', 'Ust_Mal', 'Mal_Grubu'],
+    f'{KATMAN_ONEKI}bs': ['SM', 'BS', 'Nitelik', 'Urun_Grubu', 'Ust_Mal', 'Mal_Grubu'],
+    f'{KATMAN_ONEKI}magaza_ug': ['SM', 'BS', 'Magaza_Kod', 'Magaza_Ad', 'Nitelik', 'Urun_Grubu'],
+    f'{KATMAN_ONEKI}magaza': ['SM', 'BS', 'Magaza_Kod', 'Magaza_Ad', 'Nitelik', 'Urun_Grubu', 'Ust_Mal', 'Mal_Grubu'],
+}
+
+# Sidebar seçenekleri: düz listeler ve üst → alt hiyerarşiler
+# Organizasyon ve ürün boyutları ayrı tekilleştirilir (birlikte çarpım gibi büyür)
+ORG_KOLONLARI = ['SM', 'BS', 'Magaza_Kod', 'Magaza_Ad']
+URUN_KOLONLARI = ['Nitelik', 'Urun_Grubu', 'Ust_Mal', 'Mal_Grubu']
+FILTRE_LISTELERI = {'sm': 'SM', 'nitelik': 'Nitelik', 'urun_grubu': 'Urun_Grubu'}
+FILTRE_HARITALARI = {
+    'bs_map': ('SM', ['BS']),
+    'magaza_map': ('BS', ['Magaza_Kod', 'Magaza_Ad']),
+    'ust_mal_map': ('Urun_Grubu', ['Ust_Mal']),
+    'mal_grubu_map': ('Ust_Mal', ['Mal_Grubu']),
+}
+
+
+# ============================================================================
+# FİLTRE SEÇENEKLERİ
+# ============================================================================
+
+def filtre_secenekleri(con, tablo: str = 'veri_kup') -> dict:
+    """
+    Sidebar filtre seçenekleri ve hiyerarşileri - tek tarama (GROUPING SETS)
+    Kurulumda bilgi tablosuna yazılır; açılışta satır sayısından bağımsız okunur.
+    """
+    
+    kolonlar = ', '.join(f"{k}::VARCHAR AS {k}" for k in ORG_KOLONLARI + URUN_KOLONLARI)
+    
+    def kume(kolon):
+        return "org" if kolon in ORG_KOLONLARI else "urun"
+    
+    secimler = []
+    for ad, kolon in FILTRE_LISTELERI.items():
+        secimler.append(f"(SELECT list(DISTINCT {kolon} ORDER BY {kolon}) FROM {kume(kolon)} WHERE {kolon} <> '') AS {ad}")
+    
+    for ad, (ust, alt) in FILTRE_HARITALARI.items():
+        deger = alt[0] if len(alt) == 1 else f"[{', '.join(alt)}]"
+        secimler.append(f"""(
+            SELECT map(list(ust), list(altlar)) FROM (
+                SELECT {ust} AS ust, list(DISTINCT {deger} ORDER BY {deger}) AS altlar
+                FROM {kume(ust)} WHERE {alt[0]} <> '' AND {ust} IS NOT NULL GROUP BY 1
+            )
+        ) AS {ad}""")
+    
+    cur = con.execute(f"""
+        WITH b AS MATERIALIZED (
+            SELECT grouping(SM) AS urun_mu, {kolonlar}
+            FROM {tablo}
+            GROUP BY GROUPING SETS (({', '.join(ORG_KOLONLARI)}), ({', '.join(URUN_KOLONLARI)}))
+        ),
+        org AS (SELECT * FROM b WHERE urun_mu = 0),
+        urun AS (SELECT * FROM b WHERE urun_mu = 1)
+        SELECT {', '.join(secimler)}
+    """)
+    
+    adlar = [k[0] for k in cur.description]
+    return {ad: deger or ({} if ad in FILTRE_HARITALARI else []) for ad, deger in zip(adlar, cur.fetchone())}
+
+
+def birlesik_liste(a: list, b: list) -> list:
+    """İki seçenek listesinin sıralı, tekrarsız birleşimi (mağaza [kod, ad] çiftleri dahil)"""
+    
+    degerler = {tuple(x) if isinstance(x, list) else x for x in a + b}
+    return [list(x) if isinstance(x, tuple) else x for x in sorted(degerler)]
+
+
+def filtreleri_birlestir(eski: dict, yeni: dict) -> dict:
+    """Eklenen ayın filtre seçeneklerini mevcutlara kat - tam tarama gerekmez"""
+    
+    sonuc = {}
+    for ad in FILTRE_LISTELERI:
+        sonuc[ad] = birlesik_liste(eski.get(ad, []), yeni.get(ad, []))
+    
+    for ad in FILTRE_HARITALARI:
+        a, b = eski.get(ad, {}), yeni.get(ad, {})
+        sonuc[ad] = {k: birlesik_liste(a.get(k, []), b.get(k, [])) for k in a.keys() | b.keys()}
+    
+    return sonuc
+
+
+# ============================================================================
+# OLUŞTURMA
+# ============================================================================
+
+def varsayilan_kaynaklar() -> list:
+    """Bölümlü veri seti varsa o, yoksa düz dönem dosyaları"""
+    
+    if os.path.isdir(BOLUMLU_KLASOR):
+        return [os.path.join(BOLUMLU_KLASOR, '**', '*.parquet')]
+    
+    return KAYNAKLAR
+
+
+def kaynak_adlari(kaynaklar: list) -> list:
+    """
+    Kaynak desenlerinin gerçek dosya adları (bilgi kaydı ve 'zaten eklenmiş' kontrolü için)
+    veri_*.parquet gibi desenler açılır; bölümlü klasör için o klasöre yazılmış
+    kaynakların kayıtlı adları alınır (bölüm dosyalarının adları kaynak adı değildir).
+    """
+    
+    adlar = []
+    
+    for desen in kaynaklar:
+        if '**' in desen:
+            klasor = desen.split('**')[0].rstrip('/\\') or '.'
+            adlar += bolum_bilgisi(klasor)['kaynaklar']
+        else:
+            adlar += [os.path.basename(y) for y in sorted(glob.glob(desen))] or [os.path.basename(desen)]
+    
+    return list(dict.fromkeys(adlar))
+
+
+def sql_metin(deger: str) -> str:
+    """DDL içine gömülecek metin sabiti (parametre alamayan yerler için)"""
+    return "'" + str(deger).replace("'", "''") + "'"
+
+
+def kaynak_gorunumu(con, kaynaklar: list, once=None, sonra=None, gecici: bool = True) -> tuple:
+    """
+    kaynak (tüm parquet) ve secili (iki dönemin satırları + Donem) görünümleri
+    Dönem koşulu Yil klasörlerini / satır grubu istatistiklerini budar.
+    """
+    
+    tur = "TEMP VIEW" if gecici else "VIEW"
+    dosyalar = ', '.join(sql_metin(k) for k in kaynaklar)
+    
+    con.execute(f"""
+        CREATE {tur} kaynak AS
+        SELECT * FROM read_parquet([{dosyalar}], hive_partitioning = true, union_by_name = true)
+    """)
+    
+    if once is None or sonra is None:
+        once, sonra = son_iki_yil(con)
+    
+    con.execute(f"""
+        CREATE {tur} secili AS
+        SELECT *, {donem_sql(once, sonra)} AS Donem
+        FROM kaynak
+        WHERE ({once.kosul}) OR ({sonra.kosul})
+    """)
+    
+    return once, sonra
+
+
+def yeni_surum() -> str:
+    """Veri sürümü damgası - her kurulum/eklemede değişir"""
+    return time.strftime('%Y%m%d%H%M%S')
+
+
+def donem_sayilari(con, tablo: str = 'veri') -> dict:
+    """Dönem başına satır sayısı"""
+    
+    sayilar = {'once': 0, 'sonra': 0}
+    for donem, sayi in con.execute(f"SELECT Donem::VARCHAR, COUNT(*) FROM {tablo} GROUP BY ALL").fetchall():
+        sayilar[donem] = sayi
+    
+    return sayilar
+
+
+def bilgi_kaydet(con, bilgi: dict):
+    """bilgi tablosunu (yeniden) yaz"""
+    
+    con.execute("CREATE OR REPLACE TABLE bilgi (anahtar VARCHAR, deger VARCHAR)")
+    con.executemany("INSERT INTO bilgi VALUES (?, ?)", [[k, json.dumps(v)] for k, v in bilgi.items()])
+
+
+def bilgi_yaz(con, once, sonra, kaynaklar: list, filtreler: dict = None) -> dict:
+    """Dönem sayıları, filtre seçenekleri ve sürüm bilgisini bilgi tablosuna yaz"""
+    
+    bilgi = {
+        'surum': yeni_surum(),
+        'donemler': [once.kod, sonra.kod],
+        'sayilar': donem_sayilari(con),
+        'kaynaklar': kaynak_adlari(kaynaklar),
+        'filtreler': filtreler if filtreler is not None else filtre_secenekleri(con),
+    }
+    
+    bilgi_kaydet(con, bilgi)
+    
+    return bilgi
+
+
+def veri_kolonlari() -> list:
+    """secili → veri dönüşümü: boyutlar ENUM, ölçüler DOUBLE"""
+    
+    kolonlar = [f"CAST({k} AS {enum_tipi(k)}) AS {k}" for k in BOYUTLAR]
+    kolonlar += ["CAST(Donem AS e_donem) AS Donem", "CAST(Yil AS SMALLINT) AS Yil"]
+    kolonlar += [f"CAST({k} AS DOUBLE) AS {k}" for k in NUMERIK_KOLONLAR]
+    
+    return kolonlar
+
+
+def tablolari_olustur(con, kaynaklar: list, once=None, sonra=None) -> dict:
+    """
+    Parquet → tipli, sıralı, sözlük kodlu veri + veri_kup + bilgi tabloları
+    once/sonra: donem.Donem (verilmezse en son iki yıl)
+    """
+    
+    once, sonra = kaynak_gorunumu(con, kaynaklar, once, sonra)
+    
+    # Boyutlar için sıralı ENUM tipleri (MAX/ORDER BY alfabetik kalır)
+    for kolon in BOYUTLAR:
+        con.execute(f"""
+            CREATE TYPE {enum_tipi(kolon)} AS ENUM (
+                SELECT DISTINCT CAST({kolon} AS VARCHAR) FROM secili
+                WHERE {kolon} IS NOT NULL ORDER BY 1
+            )
+        """)
+    con.execute("CREATE TYPE e_donem AS ENUM ('once', 'sonra')")
+    
+    con.execute(f"""
+        CREATE TABLE veri AS
+        SELECT {', '.join(veri_kolonlari())}
+        FROM secili
+        ORDER BY {', '.join(VERI_SIRASI)}
+    """)
+    
+    con.execute(f"CREATE TABLE veri_kup AS SELECT * FROM ({KUP_SQL}) ORDER BY {', '.join(KUP_SIRASI)}")
+    katmanlari_olustur(con)
+    
+    # Sidebar ters indeksinin kaynağı: filtre boyutlarının tekil birleşimleri
+    con.execute(f"CREATE TABLE boyut_indeksi AS {INDEKS_SQL.format(tablo='veri_kup')} ORDER BY ALL")
+    
+    return bilgi_yaz(con, once, sonra, kaynaklar)
+
+
+def katmanlari_olustur(con):
+    """veri_kup'tan ön toplam tablolarını kur (varsa baştan)"""
+    
+    olculer = ', '.join(f"SUM({o}) AS {o}" for o in KUP_OLCULERI)
+    
+    for tablo, boyutlar in KATMANLAR.items():
+        con.execute(f"""
+            CREATE OR REPLACE TABLE {tablo} AS
+            SELECT {', '.join(boyutlar)}, {olculer}
+            FROM veri_kup
+            GROUP BY ALL
+            ORDER BY {', '.join(boyutlar)}
+        """)
+
+
+def gorunumleri_olustur(con, kaynaklar: list, once=None, sonra=None, filtreler: dict = None) -> dict:
+    """
+    Doğrudan parquet modu: tablo kurmadan veri / veri_kup görünümleri
+    Her sorgu parquet'e gider; filtreler bölüm klasörlerini budar,
+    sadece sorgunun kullandığı kolonlar okunur. (Cursor'lar da görsün diye kalıcı görünüm.)
+    filtreler: bölüm bilgisindeki hazır seçenekler (yoksa tüm veri taranır)
+    """
+    
+    once, sonra = kaynak_gorunumu(con, kaynaklar, once, sonra, gecici=False)
+    
+    con.execute("CREATE VIEW veri AS SELECT * FROM secili")
+    con.execute(f"CREATE VIEW veri_kup AS {KUP_SQL}")
+    
+    return bilgi_yaz(con, once, sonra, kaynaklar, filtreler)
+
+
+def bolum_sirasi(bolumler: list) -> list:
+    """Bölüm kolonları + küp sırası: bölüm dosyaları içinde de satır grupları kümeli kalır"""
+    return bolumler + [k for k in KUP_SIRASI if k not in bolumler]
+
+
+def bolumlu_yaz(kaynaklar: list, klasor: str = BOLUMLU_KLASOR, bolumler: list = BOLUMLER) -> int:
+    """
+    Parquet dosyalarını Yil/SM klasörlerine bölünmüş veri setine yaz
+    Geçici klasöre yazılır, bitince eskisiyle yer değiştirir.
+    """
+    
+    gecici = klasor.rstrip('/') + ".tmp"
+    eski = klasor.rstrip('/') + ".eski"
+    
+    for yol in (gecici, eski):
+        if os.path.isdir(yol):
+            shutil.rmtree(yol)
+    
+    con = duckdb.connect()
+    
+    try:
+        con.read_parquet(kaynaklar, union_by_name=True, hive_partitioning=True).create_view('kaynak')
+        sayi = con.execute("SELECT COUNT(*) FROM kaynak").fetchone()[0]
+        filtreler = filtre_secenekleri(con, 'kaynak')
+        
+        con.execute(f"""
+            COPY (SELECT * FROM kaynak ORDER BY {', '.join(bolum_sirasi(bolumler))})
+            TO {sql_metin(gecici)} (FORMAT PARQUET, PARTITION_BY ({', '.join(bolumler)}))
+        """)
+    finally:
+        con.close()
+    
+    bolum_bilgisi_yaz(gecici, {
+        'surum': yeni_surum(),
+        'kaynaklar': kaynak_adlari(kaynaklar),
+        'filtreler': filtreler,
+    })
+    
+    if os.path.isdir(klasor):
+        os.replace(klasor, eski)
+    os.replace(gecici, klasor)
+    
+    if os.path.isdir(eski):
+        shutil.rmtree(eski)
+    
+    return sayi
+
+
+def yazma_baglantisi(yol: str):
+    """
+    Veritabanı dosyasına yazan bağlantı - yeni satır grupları SATIR_GRUBU boyunda
+    (satır grubu boyu dosya bağlanırken verilir, bağlantı ayarı değildir)
+    """
+    
+    con = duckdb.connect()
+    con.execute(f"ATTACH {sql_metin(yol)} AS hedef (ROW_GROUP_SIZE {SATIR_GRUBU})")
+    con.execute("USE hedef")
+    
+    return con
+
+
+def veritabani_olustur(kaynaklar: list, hedef: str = VERITABANI, once=None, sonra=None) -> dict:
+    """
+    Tabloları dosyaya yaz
+    Önce geçici dosyaya yazar, bitince tek hamlede yerine koyar;
+    açık uygulama eski dosyayı okumaya devam eder.
+    """
+    
+    gecici = hedef + ".tmp"
+    if os.path.exists(gecici):
+        os.remove(gecici)
+    
+    con = yazma_baglantisi(gecici)
+    
+    try:
+        bilgi = tablolari_olustur(con, kaynaklar, once, sonra)
+        con.execute("CHECKPOINT")
+    finally:
+        con.close()
+    
+    os.replace(gecici, hedef)
+    
+    return bilgi
+
+
+def veritabani_bilgi(con) -> dict:
+    """bilgi tablosunu sözlük olarak oku"""
+    return {k: json.loads(v) for k, v in con.execute("SELECT anahtar, deger FROM bilgi").fetchall()}
+
+
+def bolum_bilgisi(klasor: str = BOLUMLU_KLASOR) -> dict:
+    """Bölümlü klasörün sürüm/kaynak bilgisi (yoksa boş)"""
+    
+    yol = os.path.join(klasor, BOLUM_BILGISI)
+    if not os.path.exists(yol):
+        return {'kaynaklar': []}
+    
+    with open(yol, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def bolum_bilgisi_yaz(klasor: str, bilgi: dict):
+    """Sürüm dosyasını yaz - uygulama bu dosyanın değişmesinden yeni veriyi anlar"""
+    
+    yol = os.path.join(klasor, BOLUM_BILGISI)
+    with open(yol + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(bilgi, f, ensure_ascii=False)
+    os.replace(yol + ".tmp", yol)
+
+
+# ============================================================================
+# ARTIMLI EKLEME (yeni ay)
+# ============================================================================
+
+def daha_once_eklenmis(yeni: list, kaynaklar: list) -> list:
+    """Kayıtlı kaynaklar arasında zaten bulunan dosyalar"""
+    
+    kayitli = set(kaynaklar)
+    return [ad for ad in kaynak_adlari(yeni) if ad in kayitli]
+
+
+def eklenmis_kaynaklar(hedef: str = VERITABANI, klasor: str = BOLUMLU_KLASOR) -> dict:
+    """Mevcut ekleme yerleri (veri.duckdb / veri/) → kayıtlı kaynak adları"""
+    
+    kayitlar = {}
+    
+    if os.path.exists(hedef):
+        con = duckdb.connect(hedef, read_only=True)
+        try:
+            kayitlar[hedef] = veritabani_bilgi(con)['kaynaklar']
+        finally:
+            con.close()
+    
+    if os.path.isdir(klasor):
+        kayitlar[f"{klasor}/"] = bolum_bilgisi(klasor)['kaynaklar']
+    
+    return kayitlar
+
+
+def enum_tablolari(con, kolon: str) -> list:
+    """
+    Kolonu ENUM olarak taşıyan tablolar (veri, veri_kup, boyut_indeksi, ön toplamlar)
+    CREATE TABLE AS ile kurulan tablolar tipin adını değil değer listesini kopyalar;
+    tip yeniden kurulunca her biri ayrıca genişletilmelidir.
+    """
+    
+    return [t for (t,) in con.execute("""
+        SELECT table_name FROM duckdb_columns()
+        JOIN duckdb_tables() USING (database_name, schema_name, table_name)
+        WHERE database_name = current_database()
+          AND column_name = ? AND data_type LIKE 'ENUM(%'
+        ORDER BY table_name
+    """, [kolon]).fetchall()]
+
+
+def enumlari_genislet(con):
+    """
+    ek tablosunda ENUM'da olmayan boyut değerleri varsa tipi genişlet
+    ENUM'a değer eklenemediği için tip yeni değerlerle yeniden kurulur;
+    sadece yeni değer gelen kolonlar (genelde ürün kodu/adı) yeniden yazılır.
+    """
+    
+    for kolon in BOYUTLAR:
+        tip = enum_tipi(kolon)
+        yeni_var = con.execute(f"""
+            SELECT COUNT(*) FROM (
+                SELECT DISTINCT CAST({kolon} AS VARCHAR) AS deger FROM ek WHERE {kolon} IS NOT NULL
+            ) WHERE deger NOT IN (SELECT unnest(enum_range(NULL::{tip}))::VARCHAR)
+        """).fetchone()[0]
+        
+        if not yeni_var:
+            continue
+        
+        con.execute(f"""
+            CREATE TYPE {tip}_gecici AS ENUM (
+                SELECT unnest(enum_range(NULL::{tip}))::VARCHAR
+                UNION
+                SELECT CAST({kolon} AS VARCHAR) FROM ek WHERE {kolon} IS NOT NULL
+                ORDER BY 1
+            )
+        """)
+        
+        tablolar = enum_tablolari(con, kolon)
+        
+        # Tip adı sabit kalsın diye geçici tip üzerinden iki adımda
+        for eski, hedef in ((tip, f"{tip}_gecici"), (f"{tip}_gecici", tip)):
+            for tablo in tablolar:
+                con.execute(f"ALTER TABLE {tablo} ALTER {kolon} TYPE {hedef}")
+            con.execute(f"DROP TYPE {eski}")
+            if hedef != tip:
+                con.execute(f"CREATE TYPE {tip} AS ENUM (SELECT unnest(enum_range(NULL::{hedef}))::VARCHAR)")
+
+
+def toplama_ekle(con, tablo: str, boyutlar: list, sira: list):
+    """
+    Toplam tablosunda sadece ek_kup'un düştüğü anahtar satırlarını yeniden hesapla
+    Toplamlar toplamsal olduğu için eski satır + ek toplanır; diğer satırlara dokunulmaz.
+    """
+    
+    anahtar = ', '.join(boyutlar)
+    eslesme = ' AND '.join(f"t.{b} IS NOT DISTINCT FROM e.{b}" for b in boyutlar)
+    olculer = ', '.join(f"SUM({o}) AS {o}" for o in KUP_OLCULERI)
+    
+    con.execute(f"CREATE OR REPLACE TEMP TABLE ek_toplam AS SELECT {anahtar}, {olculer} FROM ek_kup GROUP BY ALL")
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE birlesik_toplam AS
+        SELECT {anahtar}, {olculer}
+        FROM (
+            SELECT {anahtar}, {', '.join(KUP_OLCULERI)} FROM {tablo} t
+            WHERE EXISTS (SELECT 1 FROM ek_toplam e WHERE {eslesme})
+            UNION ALL
+            SELECT * FROM ek_toplam
+        )
+        GROUP BY ALL
+    """)
+    
+    con.execute(f"DELETE FROM {tablo} t WHERE EXISTS (SELECT 1 FROM ek_toplam e WHERE {eslesme})")
+    con.execute(f"INSERT INTO {tablo} BY NAME SELECT * FROM birlesik_toplam ORDER BY {', '.join(sira)}")
+
+
+def kupu_guncelle(con):
+    """
+    veri_kup ve ön toplamlarda sadece eklenen satırların düştüğü anahtarları yeniden hesapla
+    Maliyet tablo boyuna değil eklenen ayın dokunduğu mağaza x ürün sayısına bağlıdır.
+    
+    Yeniden hesaplanan satırlar tablonun sonuna kendi içinde sıralı eklenir: eski satır
+    grupları kümeli kalır, yeni satır grupları da dar min/max aralıklarıyla atlanabilir.
+    Eski dosyalarda bulunmayan ön toplamlar küpten kurulur.
+    """
+    
+    con.execute(f"CREATE TEMP TABLE ek_kup AS {kup_sql('ek_veri')}")
+    toplama_ekle(con, 'veri_kup', KUP_BOYUTLARI, KUP_SIRASI)
+    
+    mevcut = {t for (t,) in con.execute(
+        "SELECT table_name FROM duckdb_tables() WHERE database_name = current_database()"
+    ).fetchall()}
+    
+    if not mevcut.issuperset(KATMANLAR):
+        katmanlari_olustur(con)
+        return
+    
+    for tablo, boyutlar in KATMANLAR.items():
+        toplama_ekle(con, tablo, boyutlar, boyutlar)
+
+
+def veritabanina_ekle(yeni: list, hedef: str = VERITABANI) -> dict:
+    """
+    Yeni ay dosyalarını veri.duckdb'ye ekle - tam kurulum yapmaz
+    veri'ye sadece yeni satırlar eklenir, veri_kup'ta ve ön toplamlarda sadece etkilenen
+    satırlar yeniden hesaplanır, sürüm değişir. Kopya üzerinde çalışılıp yerine konur;
+    açık uygulama eski dosyayı okumaya devam eder.
+    """
+    
+    gecici = hedef + ".tmp"
+    shutil.copyfile(hedef, gecici)
+    
+    con = yazma_baglantisi(gecici)
+    
+    try:
+        bilgi = veritabani_bilgi(con)
+        
+        tekrar = daha_once_eklenmis(yeni, bilgi['kaynaklar'])
+        if tekrar:
+            raise ValueError(f"Zaten eklenmiş: {', '.join(tekrar)}")
+        
+        once, sonra = (donem_coz(kod) for kod in bilgi['donemler'])
+        
+        # Yazılan dosyada kalıcı katalog nesnesi olmasın: görünümler TEMP (ek dosyasının yoluna bağlı)
+        con.execute(f"""
+            CREATE TEMP VIEW ek_kaynak AS
+            SELECT * FROM read_parquet([{', '.join(sql_metin(k) for k in yeni)}],
+                                       union_by_name = true, hive_partitioning = true)
+        """)
+        con.execute(f"""
+            CREATE TEMP VIEW ek AS
+            SELECT *, {donem_sql(once, sonra)} AS Donem
+            FROM ek_kaynak
+            WHERE ({once.kosul}) OR ({sonra.kosul})
+        """)
+        
+        enumlari_genislet(con)
+        
+        con.execute(f"CREATE TEMP TABLE ek_veri AS SELECT {', '.join(veri_kolonlari())} FROM ek")
+        con.execute(f"INSERT INTO veri SELECT * FROM ek_veri ORDER BY {', '.join(VERI_SIRASI)}")
+        
+        kupu_guncelle(con)
+        con.execute(f"""
+            INSERT INTO boyut_indeksi
+            {INDEKS_SQL.format(tablo='ek_veri')}
+            EXCEPT SELECT * FROM boyut_indeksi
+        """)
+        
+        eklenen = donem_sayilari(con, 'ek_veri')
+        bilgi['sayilar'] = {d: bilgi['sayilar'].get(d, 0) + eklenen[d] for d in eklenen}
+        bilgi['filtreler'] = filtreleri_birlestir(bilgi.get('filtreler', {}), filtre_secenekleri(con, 'ek_veri'))
+        bilgi['kaynaklar'] += kaynak_adlari(yeni)
+        bilgi['surum'] = yeni_surum()
+        bilgi_kaydet(con, bilgi)
+        
+        con.execute("CHECKPOINT")
+    except Exception:
+        con.close()
+        os.remove(gecici)
+        raise
+    
+    con.close()
+    os.replace(gecici, hedef)
+    
+    bilgi['eklenen'] = eklenen
+    return bilgi
+
+
+def bolumlere_ekle(yeni: list, klasor: str = BOLUMLU_KLASOR, bolumler: list = BOLUMLER) -> int:
+    """
+    Yeni ay dosyalarını bölümlü veri setine ekle
+    Mevcut dosyalara dokunulmaz; her bölüme yeni bir parquet dosyası eklenir.
+    """
+    
+    bilgi = bolum_bilgisi(klasor)
+    
+    tekrar = daha_once_eklenmis(yeni, bilgi['kaynaklar'])
+    if tekrar:
+        raise ValueError(f"Zaten eklenmiş: {', '.join(tekrar)}")
+    
+    con = duckdb.connect()
+    
+    try:
+        con.read_parquet(yeni, union_by_name=True, hive_partitioning=True).create_view('ek_kaynak')
+        sayi = con.execute("SELECT COUNT(*) FROM ek_kaynak").fetchone()[0]
+        yeni_filtreler = filtre_secenekleri(con, 'ek_kaynak')
+        
+        con.execute(f"""
+            COPY (SELECT * FROM ek_kaynak ORDER BY {', '.join(bolum_sirasi(bolumler))})
+            TO {sql_metin(klasor)} (FORMAT PARQUET, PARTITION_BY ({', '.join(bolumler)}), APPEND)
+        """)
+    finally:
+        con.close()
+    
+    bilgi['kaynaklar'] += kaynak_adlari(yeni)
+    bilgi['filtreler'] = filtreleri_birlestir(bilgi.get('filtreler', {}), yeni_filtreler)
+    bilgi['surum'] = yeni_surum()
+    bolum_bilgisi_yaz(klasor, bilgi)
+    
+    return sayi
+
+
+# ============================================================================
+# ZONE MAP RAPORU
+# ============================================================================
+
+def atlama_raporu(con, tablolar: list = ATLAMA_TABLOLARI, kolonlar: list = ATLAMA_KOLONLARI) -> dict:
+    """
+    Kümelemenin etkisi: kolonun her değeri için eşitlik filtresinin satır grubu
+    min/max'ına bakıp hiç okumadan atladığı grup sayısı (değerler üzerinden ortalama/en kötü)
+    Dönüş: tablo → {'satir', 'grup', 'kolonlar': {kolon: {'deger', 'ortalama', 'en_az'}}}
+    """
+    
+    rapor = {}
+    
+    for tablo in tablolar:
+        mevcut = {k for (k,) in con.execute("""
+            SELECT column_name FROM duckdb_columns() WHERE database_name = current_database() AND table_name = ?
+        """, [tablo]).fetchall()}
+        if not mevcut:
+            continue
+        tablo_kolonlari = [k for k in kolonlar if k in mevcut]
+        
+        # Grup sınırları depolamadan; rowid satırın grubundaki yerini verir
+        con.execute(f"""
+            CREATE OR REPLACE TEMP TABLE gruplar AS
+            SELECT row_group_id AS grup, SUM(SUM(count)) OVER (ORDER BY row_group_id) - SUM(count) AS bas
+            FROM pragma_storage_info({sql_metin(tablo)})
+            WHERE column_id = 0 AND column_path = '[0]'
+            GROUP BY 1
+        """)
+        
+        araliklar = ', '.join(f"MIN({k}) AS {k}_en_az, MAX({k}) AS {k}_en_cok" for k in tablo_kolonlari)
+        con.execute(f"""
+            CREATE OR REPLACE TEMP TABLE araliklar AS
+            SELECT g.grup, COUNT(*) AS satir, {araliklar}
+            FROM (SELECT rowid AS sira, * FROM {tablo}) t
+            ASOF JOIN gruplar g ON t.sira >= g.bas
+            GROUP BY 1
+        """)
+        
+        satir, grup = con.execute("SELECT SUM(satir), COUNT(*) FROM araliklar").fetchone()
+        rapor[tablo] = {'satir': int(satir or 0), 'grup': grup, 'kolonlar': {}}
+        
+        for kolon in tablo_kolonlari:
+            deger, ortalama, en_az = con.execute(f"""
+                SELECT COUNT(*), AVG(atlanan), MIN(atlanan)
+                FROM (
+                    SELECT d.deger, COUNT(*) FILTER (WHERE d.deger < a.{kolon}_en_az OR d.deger > a.{kolon}_en_cok) AS atlanan
+                    FROM (SELECT DISTINCT {kolon} AS deger FROM {tablo} WHERE {kolon} IS NOT NULL) d
+                    CROSS JOIN araliklar a
+                    GROUP BY 1
+                )
+            """).fetchone()
+            rapor[tablo]['kolonlar'][kolon] = {'deger': deger, 'ortalama': ortalama or 0, 'en_az': en_az or 0}
+    
+    return rapor
+
+
+def atlama_raporu_yaz(rapor: dict):
+    """atlama_raporu → okunur tablo"""
+    
+    for tablo, r in rapor.items():
+        print(f"\n{tablo}: {r['satir']:,} satır, {r['grup']} satır grubu")
+        print(f"  {'kolon':<12} {'değer':>8} {'ort. atlanan':>14} {'en kötü':>9}")
+        for kolon, k in r['kolonlar'].items():
+            oran = k['ortalama'] / r['grup'] if r['grup'] else 0
+            print(f"  {kolon:<12} {k['deger']:>8,} {k['ortalama']:>8.1f} (%{oran * 100:>3.0f}) {k['en_az']:>9}")
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Parquet dosyalarından veri.duckdb oluştur")
+    parser.add_argument('kaynaklar', nargs='*', help="Parquet dosyaları (varsayılan: veri/ veya veri_*.parquet)")
+    parser.add_argument('-o', '--cikti', default=VERITABANI, help="Oluşacak DuckDB dosyası")
+    parser.add_argument('--once', help="Baz dönem: 2024 | 2024-11 | 2024-11-01:2024-11-30")
+    parser.add_argument('--sonra', help="Karşılaştırma dönemi (aynı biçim)")
+    parser.add_argument('--bolumlu-yaz', action='store_true',
+                        help=f"Veritabanı kurma; kaynakları {BOLUMLU_KLASOR}/ altına {'/'.join(BOLUMLER)} bölümlü yaz")
+    parser.add_argument('--ekle', action='store_true',
+                        help="Verilen yeni ay dosyalarını mevcut veri.duckdb / veri/ klasörüne ekle (tam kurulum yok)")
+    parser.add_argument('--atlama', action='store_true',
+                        help="Kurulum yapma; veritabanında filtre başına atlanan satır grubu (zone map) raporu")
+    args = parser.parse_args()
+    
+    if args.atlama:
+        if not os.path.exists(args.cikti):
+            parser.error(f"{args.cikti} yok: önce veritabanı oluşturulmalı")
+        
+        con = duckdb.connect(args.cikti, read_only=True)
+        try:
+            atlama_raporu_yaz(atlama_raporu(con))
+        finally:
+            con.close()
+        return
+    
+    if args.ekle:
+        if not args.kaynaklar:
+            parser.error("--ekle için yeni parquet dosyaları verilmeli")
+        
+        if not os.path.isdir(BOLUMLU_KLASOR) and not os.path.exists(args.cikti):
+            parser.error(f"Eklenecek yer yok: önce {args.cikti} veya {BOLUMLU_KLASOR}/ oluşturulmalı")
+        
+        # Hiçbir yere yazmadan önce iki kayıt da kontrol edilir (biri eklenip diğeri reddedilmesin)
+        for yer, kayitli in eklenmis_kaynaklar(args.cikti).items():
+            tekrar = daha_once_eklenmis(args.kaynaklar, kayitli)
+            if tekrar:
+                parser.error(f"{yer} içinde zaten eklenmiş: {', '.join(tekrar)}")
+        
+        baslangic = time.time()
+        veritabani_guncel = False
+        
+        try:
+            # Önce veritabanı: kopya üzerinde çalışır, hata olursa hiçbir şey değişmez
+            if os.path.exists(args.cikti):
+                bilgi = veritabanina_ekle(args.kaynaklar, args.cikti)
+                veritabani_guncel = True
+                print(f"✅ {args.cikti} güncellendi: {bilgi['eklenen']} satır eklendi, sürüm {bilgi['surum']}")
+            
+            if os.path.isdir(BOLUMLU_KLASOR):
+                sayi = bolumlere_ekle(args.kaynaklar)
+                print(f"✅ {BOLUMLU_KLASOR}/ bölümlerine {sayi:,} satır eklendi")
+        except Exception as e:
+            if veritabani_guncel:
+                print(f"⚠️ {args.cikti} güncellendi ama {BOLUMLU_KLASOR}/ güncellenemedi - iki kaynak artık farklı; "
+                      f"{BOLUMLU_KLASOR}/ tüm kaynak dosyalarla --bolumlu-yaz ile yeniden yazılmalı")
+            if isinstance(e, ValueError):
+                parser.error(str(e))
+            raise
+        
+        print(f"({time.time() - baslangic:.1f} sn)")
+        return
+    
+    kaynaklar = args.kaynaklar or (KAYNAKLAR if args.bolumlu_yaz else varsayilan_kaynaklar())
+    
+    if args.bolumlu_yaz:
+        baslangic = time.time()
+        sayi = bolumlu_yaz(kaynaklar)
+        print(f"✅ {BOLUMLU_KLASOR}/ oluşturuldu: {sayi:,} satır, bölümler {BOLUMLER} ({time.time() - baslangic:.1f} sn)")
+        return
+    
+    if bool(args.once) != bool(args.sonra):
+        parser.error("--once ve --sonra birlikte verilmeli")
+    
+    once = donem_coz(args.once) if args.once else None
+    sonra = donem_coz(args.sonra) if args.sonra else None
+    
+    baslangic = time.time()
+    bilgi = veritabani_olustur(kaynaklar, args.cikti, once, sonra)
+    
+    toplam = sum(bilgi['sayilar'].values())
+    print(f"✅ {args.cikti} oluşturuldu: {' → '.join(bilgi['donemler'])} | {toplam:,} satır {bilgi['sayilar']} ({time.time() - baslangic:.1f} sn)")
+
+
+if __name__ == "__main__":
+    main()